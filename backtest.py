@@ -0,0 +1,265 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from strategies import DonchianEmaMacd, StrategySet, config_strategies, load_strategy
+
+# Canlı botun sabit değerleri (enter_position / check_entry_conditions)
+DEFAULT_PARAMS = {
+    'ema_period': 200,
+    'donchian_period': 20,
+    'stop_atr_mult': 2.0,
+    'target_atr_mult': 4.0,
+    'macd_threshold': 100.0,
+    'band_atr_ratio': 1.0,
+    'wick_points': 3.0,
+    'cvd_atr_spike': 1.5,
+    'risk_per_trade': 0.02,
+    'trading_mode': 'both',
+}
+
+# Stratejiye değil simülasyona ait parametreler
+SIMULATION_PARAMS = ('stop_atr_mult', 'target_atr_mult', 'cvd_atr_spike', 'risk_per_trade', 'trading_mode')
+
+
+def build_strategies(params=None, specs=None):
+    """Config'teki stratejiler (yoksa botun özgün kuralları); `params` birincili ezer.
+
+    Izgara/CLI değerlerinden sadece birincil stratejinin tanıdığı
+    parametreler (ör. ema_period, donchian_period) uygulanır; simülasyon
+    parametreleri (stop_atr_mult vb.) stratejiye gitmez.
+    """
+    strategies = [load_strategy(spec) for spec in (specs or [DonchianEmaMacd.name])]
+    primary = strategies[0]
+    overrides = {k: v for k, v in (params or {}).items() if k in primary.defaults}
+    strategies[0] = type(primary)(**{**primary.params, **overrides})
+    return StrategySet(strategies)
+
+
+def load_strategy_specs(path):
+    """config.json'daki strateji tanımları (botla aynı varsayılanlar); yol yoksa None"""
+    if not path:
+        return None
+    with open(path, 'r') as f:
+        return config_strategies(json.load(f))
+
+
+def ignored_grid_keys(grid, specs=None):
+    """Ne birincil stratejinin ne de simülasyonun tanıdığı ızgara parametreleri"""
+    primary = build_strategies(specs=specs).primary
+    return [k for k in grid if k not in primary.defaults and k not in SIMULATION_PARAMS]
+
+
+def entry_signals(ohlcv, ind, params=None, strategies=None):
+    """check_entry_conditions kararlarını tüm mumlar için (long, short) bool dizisi olarak hesapla"""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    strategies = strategies or build_strategies(params)
+    columns = {'open': ohlcv[:, 1], 'high': ohlcv[:, 2], 'low': ohlcv[:, 3], 'close': ohlcv[:, 4], **ind}
+    return strategies.entry_signals(columns, trading_mode=p['trading_mode'])
+
+
+def simulate(ohlcv, ind, long_signal, short_signal, params=None, initial_balance=10000.0,
+             position=None, close_at_end=True):
+    """Pozisyon durumunu mum mum ilerlet; pozisyon yokken sinyale atla.
+
+    `position` önceki dilimden devreden açık pozisyondur (entry_index dilime
+    göre, negatif): özgün SL/TP'siyle ilk mumdan itibaren izlenir. Veri sonunda
+    açık kalan pozisyon close_at_end ise 'end_of_data' ile kapatılır, değilse
+    kapatılmaz. Bakiye eğrisi açık pozisyonu mum kapanışından değerler.
+    (işlemler, bakiye eğrisi, açık kalan pozisyon veya None) döner.
+    """
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    ts, high, low, close = ohlcv[:, 0], ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4]
+    atr = ind['atr']
+    n = len(close)
+
+    # check_exit_conditions'daki ATR sıçraması (cvd_exit)
+    atr_spike = np.zeros(n, dtype=bool)
+    atr_spike[1:] = atr[1:] > atr[:-1] * p['cvd_atr_spike']
+    cvd_long = np.zeros(n, dtype=bool)
+    cvd_short = np.zeros(n, dtype=bool)
+    cvd_long[1:] = atr_spike[1:] & (close[1:] < close[:-1])
+    cvd_short[1:] = atr_spike[1:] & (close[1:] > close[:-1])
+
+    # Long sinyali short'tan önceliklidir (enter_position çağrı sırası)
+    entries = np.flatnonzero(long_signal | short_signal)
+    pnl = np.zeros(n)
+    unrealized = np.zeros(n)
+    trades = []
+    balance = initial_balance
+    i = 0
+
+    while True:
+        if position is None:
+            k = np.searchsorted(entries, i)
+            if k == len(entries):
+                break
+            entry_idx = entries[k]
+            is_long = bool(long_signal[entry_idx])
+            entry_price = close[entry_idx]
+            stop_distance = atr[entry_idx] * p['stop_atr_mult']
+            target_distance = atr[entry_idx] * p['target_atr_mult']
+            if is_long:
+                stop_loss, take_profit = entry_price - stop_distance, entry_price + target_distance
+            else:
+                stop_loss, take_profit = entry_price + stop_distance, entry_price - target_distance
+
+            if stop_distance <= 0:
+                i = entry_idx + 1
+                continue
+            position = {
+                'side': 'long' if is_long else 'short',
+                'entry_index': int(entry_idx),
+                'entry_time': int(ts[entry_idx]),
+                'entry_price': float(entry_price),
+                'stop_loss': float(stop_loss),
+                'take_profit': float(take_profit),
+                'position_size': float(balance * p['risk_per_trade'] / stop_distance),
+            }
+            i = entry_idx + 1
+
+        is_long = position['side'] == 'long'
+        stop_loss, take_profit = position['stop_loss'], position['take_profit']
+        exit_idx = None
+        for j in range(i, n):
+            if is_long:
+                if low[j] <= stop_loss:
+                    exit_idx, exit_reason, exit_price = j, 'stop_loss', stop_loss
+                    break
+                if high[j] >= take_profit:
+                    exit_idx, exit_reason, exit_price = j, 'take_profit', take_profit
+                    break
+                if cvd_long[j]:
+                    exit_idx, exit_reason, exit_price = j, 'cvd_exit', close[j]
+                    break
+            else:
+                if high[j] >= stop_loss:
+                    exit_idx, exit_reason, exit_price = j, 'stop_loss', stop_loss
+                    break
+                if low[j] <= take_profit:
+                    exit_idx, exit_reason, exit_price = j, 'take_profit', take_profit
+                    break
+                if cvd_short[j]:
+                    exit_idx, exit_reason, exit_price = j, 'cvd_exit', close[j]
+                    break
+        direction = 1.0 if is_long else -1.0
+        # Açık pozisyon her mum kapanışında piyasa fiyatıyla değerlenir (işlem içi düşüş de görünsün)
+        held = slice(i, n if exit_idx is None else exit_idx)
+        unrealized[held] = (close[held] - position['entry_price']) * position['position_size'] * direction
+        if exit_idx is None:
+            if not close_at_end or n == 0:
+                break
+            exit_idx, exit_reason, exit_price = n - 1, 'end_of_data', close[n - 1]
+
+        profit = (exit_price - position['entry_price']) * position['position_size'] * direction
+        balance += profit
+        pnl[exit_idx] += profit
+        trades.append({
+            **position,
+            'exit_index': int(exit_idx),
+            'exit_time': int(ts[exit_idx]),
+            'exit_price': float(exit_price),
+            'profit': float(profit),
+            'exit_reason': exit_reason,
+            'balance_after': float(balance),
+        })
+        position = None
+        i = exit_idx + 1
+
+    equity = initial_balance + np.cumsum(pnl) + unrealized
+    return trades, equity, position
+
+
+def summarize(trades, equity, initial_balance=10000.0):
+    """Getiri, maksimum düşüş, işlem sayısı ve başarı oranı"""
+    peak = np.maximum.accumulate(equity) if len(equity) else equity
+    drawdown = (peak - equity) / peak if len(equity) else np.zeros(1)
+    wins = sum(1 for t in trades if t['profit'] > 0)
+    final_balance = float(equity[-1]) if len(equity) else initial_balance
+    return {
+        'total_return': final_balance / initial_balance - 1,
+        'max_drawdown': float(drawdown.max()) if len(drawdown) else 0.0,
+        'trade_count': len(trades),
+        'win_rate': wins / len(trades) if trades else 0.0,
+        'final_balance': final_balance,
+    }
+
+
+def run_backtest(ohlcv, params=None, initial_balance=10000.0, indicators=None, strategies=None):
+    """Stratejileri (varsayılan: Donchian+EMA+MACD) geçmiş mumlar üzerinde çalıştır"""
+    p = {**DEFAULT_PARAMS, **(params or {})}
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    strategies = strategies or build_strategies(params)
+    ind = indicators if indicators is not None else strategies.compute_arrays(ohlcv)
+    long_signal, short_signal = entry_signals(ohlcv, ind, p, strategies)
+    trades, equity, _ = simulate(ohlcv, ind, long_signal, short_signal, p, initial_balance)
+    return {
+        'trades': trades,
+        'equity': equity,
+        'summary': summarize(trades, equity, initial_balance),
+    }
+
+
+def load_ohlcv_csv(path):
+    """timestamp,open,high,low,close,volume kolonlu CSV dosyasını oku"""
+    return np.loadtxt(path, delimiter=',', skiprows=1, usecols=range(6), dtype=np.float64, ndmin=2)
+
+
+def add_data_arguments(parser):
+    """CSV dosyası veya diskteki geçmiş önbelleği için ortak argümanlar"""
+    parser.add_argument('csv', nargs='?', help='timestamp,open,high,low,close,volume CSV dosyası')
+    parser.add_argument('--symbol', default='BTC/USDT', help='CSV yoksa geçmiş önbelleğinden okunur')
+    parser.add_argument('--timeframe', default='15m')
+    parser.add_argument('--market', choices=['spot', 'futures'], default='spot')
+    parser.add_argument('--history-dir', default='history')
+
+
+def load_ohlcv_from_args(args):
+    """CSV verilmişse onu, yoksa memmap geçmiş önbelleğini yükle"""
+    if args.csv:
+        return load_ohlcv_csv(args.csv)
+    from history_cache import HistoryCache
+
+    ohlcv = HistoryCache(args.symbol, args.timeframe, args.history_dir, market=args.market).load()
+    if len(ohlcv) == 0:
+        raise SystemExit(f"❌ {args.symbol} {args.timeframe} ({args.market}) için önbellek boş, "
+                         f"önce: python history_cache.py {args.symbol} {args.timeframe} --market {args.market} "
+                         f"--since YYYY-MM-DD")
+    return ohlcv
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Strateji backtest (varsayılan: Donchian+EMA+MACD)')
+    add_data_arguments(parser)
+    parser.add_argument('--config', default=None, help='stratejiler bu config.json dosyasından okunur')
+    parser.add_argument('--donchian-period', type=int, default=None,
+                        help=f"birincil stratejiyi ezer (varsayılan {DEFAULT_PARAMS['donchian_period']})")
+    parser.add_argument('--ema-period', type=int, default=None,
+                        help=f"birincil stratejiyi ezer (varsayılan {DEFAULT_PARAMS['ema_period']})")
+    parser.add_argument('--mode', choices=['long', 'short', 'both'], default='both')
+    parser.add_argument('--capital', type=float, default=10000.0)
+    args = parser.parse_args()
+
+    ohlcv = load_ohlcv_from_args(args)
+    params = {'trading_mode': args.mode}
+    if args.donchian_period is not None:
+        params['donchian_period'] = args.donchian_period
+    if args.ema_period is not None:
+        params['ema_period'] = args.ema_period
+    strategies = build_strategies(params, load_strategy_specs(args.config))
+
+    started = time.perf_counter()
+    result = run_backtest(ohlcv, params, initial_balance=args.capital, strategies=strategies)
+    elapsed = time.perf_counter() - started
+
+    summary = result['summary']
+    print(f"📊 {len(ohlcv)} mum, {elapsed * 1000:.1f} ms")
+    print(f"🔢 İşlem: {summary['trade_count']}  ✅ Başarı: {summary['win_rate'] * 100:.1f}%")
+    print(f"💰 Getiri: {summary['total_return'] * 100:+.2f}%  📉 Maks. düşüş: {summary['max_drawdown'] * 100:.2f}%")
+    print(f"💵 Son bakiye: ${summary['final_balance']:,.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,339 @@
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from candle_store import timeframe_to_ms
+from exchange_pool import ExchangeClientPool
+from history_cache import HistoryCache
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modified_trading_bot (9).py')
+
+DEFAULT_SIZES = (500, 10_000, 100_000, 1_000_000)
+DEFAULT_SYMBOLS = (1, 10, 50, 200)
+
+
+def load_bot_module(path=BOT_PATH, name='trading_bot'):
+    """Dosya adı boşluk/parantez içerdiği için botu yol üzerinden yükle"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_ohlcv(rows, seed=0, timeframe='15m', end_ms=None):
+    """Tekrarlanabilir rastgele yürüyüş OHLCV (kayıtlı fikstür yoksa)"""
+    tf_ms = timeframe_to_ms(timeframe)
+    end_ms = end_ms or int(time.time() * 1000) // tf_ms * tf_ms
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 150, rows))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 100, rows)
+    low = np.minimum(open_, close) - rng.uniform(0, 100, rows)
+    ts = end_ms - (rows - 1 - np.arange(rows)) * tf_ms
+    return np.column_stack([ts, open_, high, low, close, rng.uniform(1, 50, rows)])
+
+
+def load_fixture(symbol, timeframe, rows, history_dir=None, seed=0):
+    """Kayıtlı geçmiş (history_cache.py ile indirilmiş) varsa onu, yoksa sentetik veri.
+
+    Kayıt istenen boydan kısaysa fiyat hareketleri tekrarlanarak uzatılır.
+    """
+    recorded = None
+    if history_dir:
+        cache = HistoryCache(symbol, timeframe, history_dir)
+        if len(cache):
+            recorded = np.array(cache.load(), dtype=np.float64)
+    if recorded is None or len(recorded) < 2:
+        return synthetic_ohlcv(rows, seed=seed, timeframe=timeframe)
+
+    tf_ms = timeframe_to_ms(timeframe)
+    reps = -(-rows // len(recorded))
+    data = np.concatenate([recorded] * reps)[-rows:].copy()
+    # Tekrarlanan parçaları fiyat sürekliliğiyle ve düzgün zaman ızgarasıyla birleştir
+    drift = np.zeros(len(data))
+    seams = np.flatnonzero(np.diff(data[:, 0]) <= 0) + 1
+    for seam in seams:
+        drift[seam:] += data[seam - 1, 4] - data[seam, 1]
+    data[:, 1:5] += drift[:, None]
+    data[:, 0] = recorded[-1, 0] - (rows - 1 - np.arange(rows)) * tf_ms
+    return data
+
+
+class FakeExchange:
+    """Fikstürlerden cevap veren ağsız ccxt yerine geçen nesne.
+
+    Her sembol için `rows + headroom` mum hazırlanır; görünür pencere
+    advance() ile birer mum ilerler (yeni mum kapanmış gibi).
+    """
+
+    rateLimit = 0
+
+    def __init__(self, symbols, timeframe='15m', rows=500, headroom=1000, history_dir=None):
+        self.timeframe = timeframe
+        self.options = {'defaultType': 'spot'}
+        self.data = {}
+        for i, symbol in enumerate(symbols):
+            self.data[symbol] = load_fixture(symbol, timeframe, rows + headroom, history_dir, seed=i)
+        self.end = rows
+        self.calls = 0
+
+    def advance(self, candles=1):
+        self.end = min(self.end + candles, len(next(iter(self.data.values()))))
+
+    def _visible(self, symbol):
+        return self.data[symbol][:self.end]
+
+    def fetch_ohlcv(self, symbol, timeframe='15m', since=None, limit=None):
+        self.calls += 1
+        data = self._visible(symbol)
+        if since is not None:
+            data = data[np.searchsorted(data[:, 0], since):]
+            return data[:limit or 1000].tolist()
+        # Gerçek borsa 1000 mumla sınırlar; fikstür büyük pencereleri ölçebilmek için sınırlamaz
+        return data[-(limit or 500):].tolist()
+
+    def fetch_ticker(self, symbol):
+        self.calls += 1
+        data = self._visible(symbol)
+        day = data[-96:]
+        last = data[-1]
+        return {
+            'symbol': symbol, 'last': last[4], 'high': day[:, 2].max(), 'low': day[:, 3].min(),
+            'change': last[4] - day[0, 1], 'percentage': (last[4] / day[0, 1] - 1) * 100,
+            'quoteVolume': float((day[:, 5] * day[:, 4]).sum()),
+        }
+
+    def fetch_balance(self, params=None):
+        self.calls += 1
+        return {'USDT': {'free': 10000.0, 'used': 0.0, 'total': 10000.0}}
+
+    def load_markets(self, reload=False):
+        return {}
+
+    def market(self, symbol):
+        return {'symbol': symbol, 'precision': {'amount': 6}, 'limits': {}}
+
+
+def make_bot(module, exchange, workdir, symbols, config_overrides=None):
+    """Ağ ve Telegram olmadan gerçek SimpleTelegramBot örneği"""
+
+    class BenchBot(module.SimpleTelegramBot):
+        sent = []
+
+        def create_exchange_pool(self):
+            return ExchangeClientPool(self.config, rate_limit=1e9, factory=lambda options: exchange)
+
+        def send_telegram_message(self, message, reply_markup=None, coalesce_key=None):
+            self.sent.append(message)
+            return True
+
+    config = {
+        'api_key': 'bench', 'secret': 'bench',
+        'telegram_bot_token': 'bench', 'telegram_chat_id': '0',
+        'telegram_async': False,
+        'intrabar_exits': False,
+        'lazy_startup': False,
+        'history_dir': None,
+        'base_timeframe': exchange.timeframe,  # fikstür tek çözünürlük sunar
+        'symbols': list(symbols),
+        'symbol': symbols[0],
+        'snapshot_path': os.path.join(workdir, 'engine_state.pkl'),
+        'snapshot_interval_seconds': 1e9,
+        **(config_overrides or {}),
+    }
+    config_path = os.path.join(workdir, 'config.json')
+    with open(config_path, 'w') as f:
+        json.dump(config, f)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)  # trading_bot.db / log çalışma dizinine yazılır
+    try:
+        bot = BenchBot(config_path)
+    finally:
+        os.chdir(cwd)
+    bot.sent = []
+    return bot
+
+
+def measure(fn, setup=None, repeat=5):
+    """(süreler, en yüksek ek bellek) — bellek ayrı turda tracemalloc ile ölçülür"""
+    timings = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return timings, peak
+
+
+def _result(name, rows, symbols, timings, peak):
+    return {
+        'name': name,
+        'rows': rows,
+        'symbols': symbols,
+        'key': f"{name}[rows={rows},symbols={symbols}]",
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def bench_hot_path(module, rows, repeat=5, history_dir=None):
+    """Tek sembolde fetch/indikatör/koşul fonksiyonları"""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        exchange = FakeExchange(['BTC/USDT'], rows=rows, headroom=repeat * 4 + 10, history_dir=history_dir)
+        bot = make_bot(module, exchange, workdir, ['BTC/USDT'])
+
+        def cold_fetch():
+            bot.market_feeds.clear()
+            return ()
+
+        timings, peak = measure(lambda: bot.fetch_recent_data(limit=rows), cold_fetch, repeat)
+        results.append(_result('fetch_recent_data.cold', rows, 1, timings, peak))
+
+        def next_candle():
+            exchange.advance()
+            return ()
+
+        timings, peak = measure(lambda: bot.fetch_recent_data(limit=rows), next_candle, repeat)
+        results.append(_result('fetch_recent_data', rows, 1, timings, peak))
+
+        def fresh_frame(cold=False):
+            if cold:
+                bot.indicator_engines.clear()
+            else:
+                exchange.advance()
+            return (bot.fetch_recent_data(limit=rows),)
+
+        timings, peak = measure(bot.calculate_indicators, lambda: fresh_frame(cold=True), repeat)
+        results.append(_result('calculate_indicators.cold', rows, 1, timings, peak))
+        timings, peak = measure(bot.calculate_indicators, fresh_frame, repeat)
+        results.append(_result('calculate_indicators', rows, 1, timings, peak))
+
+        df = bot.calculate_indicators(bot.fetch_recent_data(limit=rows))
+        timings, peak = measure(lambda: bot.check_entry_conditions(df), repeat=repeat)
+        results.append(_result('check_entry_conditions', rows, 1, timings, peak))
+
+        last = df.iloc[-1]
+        bot.position, bot.entry_price = 'long', last['close']
+        bot.stop_loss, bot.take_profit = last['close'] * 0.5, last['close'] * 2
+        timings, peak = measure(lambda: bot.check_exit_conditions(df), repeat=repeat)
+        results.append(_result('check_exit_conditions', rows, 1, timings, peak))
+        bot.position = None
+        bot.journal.close()
+        bot.snapshot_writer.close()
+    return results
+
+
+def bench_loop(module, symbols, repeat=5, history_dir=None):
+    """Tam trading_loop turu: tek sembolde run_scheduled_step, çoklu sembolde portföy"""
+    names = ['BTC/USDT'] + [f"SYM{i}/USDT" for i in range(1, symbols)]
+    with tempfile.TemporaryDirectory() as workdir:
+        exchange = FakeExchange(names, headroom=repeat * 4 + 10, history_dir=history_dir)
+        bot = make_bot(module, exchange, workdir, names)
+        bot.loop_scheduler = bot.create_loop_scheduler()
+        if symbols > 1:
+            bot.portfolio = module.PortfolioEngine(bot, names, max_workers=bot.config.get('portfolio_workers', 8))
+        bot.run_scheduled_step('tick')  # ısınma: ilk tam pencere
+
+        def next_candle():
+            exchange.advance()
+            return ()
+
+        timings, peak = measure(lambda: bot.run_scheduled_step('tick'), next_candle, repeat)
+        if bot.portfolio is not None:
+            bot.portfolio.close()
+        bot.journal.close()
+        bot.snapshot_writer.close()
+    return [_result('trading_loop_iteration', 500, symbols, timings, peak)]
+
+
+def compare(results, baseline, threshold=0.10):
+    """Baz çizgiye göre medyan süre değişimi; eşiği aşan gerilemeleri döndür"""
+    previous = {r['key']: r for r in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result['key'])
+        if old is None or not old['median_ms']:
+            result['change'] = None
+            continue
+        result['change'] = result['median_ms'] / old['median_ms'] - 1
+        if result['change'] > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def format_table(results):
+    lines = [f"{'benchmark':<52} {'median ms':>11} {'min ms':>11} {'peak KB':>11} {'vs base':>9}"]
+    for r in results:
+        change = r.get('change')
+        change_text = '' if change is None else f"{change:+.1%}"
+        lines.append(f"{r['key']:<52} {r['median_ms']:>11.3f} {r['min_ms']:>11.3f} "
+                     f"{r['peak_kb']:>11.1f} {change_text:>9}")
+    return '\n'.join(lines)
+
+
+def _int_list(text):
+    return [int(v) for v in text.split(',') if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Trading sıcak yolu benchmark (ağsız, fikstürlü)')
+    parser.add_argument('--sizes', type=_int_list, default=list(DEFAULT_SIZES),
+                        help='mum sayıları, virgülle (varsayılan 500,10000,100000,1000000)')
+    parser.add_argument('--symbols', type=_int_list, default=list(DEFAULT_SYMBOLS),
+                        help='portföy sembol sayıları, virgülle (varsayılan 1,10,50,200)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--history-dir', help='kayıtlı fikstürler (history_cache.py çıktısı)')
+    parser.add_argument('--save-baseline', help='sonuçları bu JSON dosyasına yaz')
+    parser.add_argument('--compare', help='bu baz çizgi JSON dosyasıyla karşılaştır')
+    parser.add_argument('--threshold', type=float, default=0.10, help='gerileme eşiği (0.10 = %%10)')
+    args = parser.parse_args()
+
+    module = load_bot_module()
+    results = []
+    for rows in args.sizes:
+        results.extend(bench_hot_path(module, rows, args.repeat, args.history_dir))
+    for symbols in args.symbols:
+        results.extend(bench_loop(module, symbols, args.repeat, args.history_dir))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f)['results'], args.threshold)
+    print(format_table(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump({'created': time.time(), 'python': sys.version.split()[0], 'results': results}, f, indent=2)
+        print(f"💾 Baz çizgi kaydedildi: {args.save_baseline}")
+
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark %{args.threshold * 100:.0f} eşiğinden fazla yavaşladı:")
+        for r in regressions:
+            print(f"   {r['key']}: {r['change']:+.1%}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
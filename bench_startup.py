@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'modified_trading_bot (9).py')
+
+# Alt süreçte çalışır: import + kurucu süresini ölçer (soğuk başlangıç)
+_PROBE = r'''
+import importlib.util, json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+spec = importlib.util.spec_from_file_location('trading_bot', {bot!r})
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+imported = time.perf_counter()
+bot = module.SimpleTelegramBot('config.json')
+ready = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - started) * 1000,
+    'init_ms': (ready - imported) * 1000,
+    'ready_ms': (ready - started) * 1000,
+    'heavy_modules': sorted(m for m in ('pandas', 'ccxt', 'talib') if m in sys.modules),
+}}))
+'''
+
+
+def measure(lazy=True, runs=5):
+    """Her çalıştırma ayrı süreçte; Telegram'a cevap verebilir hale gelme süresi"""
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        config = {
+            'api_key': 'bench', 'secret': 'bench',
+            'telegram_bot_token': 'bench', 'telegram_chat_id': '0',
+            'lazy_startup': lazy,
+            'exchange_connect_timeout': 5,
+            'history_dir': os.path.join(workdir, 'history'),
+        }
+        with open(os.path.join(workdir, 'config.json'), 'w') as f:
+            json.dump(config, f)
+
+        probe = _PROBE.format(root=os.path.dirname(BOT_PATH), bot=BOT_PATH)
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', probe], cwd=workdir,
+                                    capture_output=True, text=True, timeout=120)
+            lines = [line for line in output.stdout.splitlines() if line.startswith('{')]
+            if not lines:
+                raise RuntimeError(f"Ölçüm başarısız: {output.stderr.strip()[-500:]}")
+            results.append(json.loads(lines[-1]))
+    return results
+
+
+def summarize(results):
+    ready = [r['ready_ms'] for r in results]
+    return {
+        'import_ms': statistics.median(r['import_ms'] for r in results),
+        'init_ms': statistics.median(r['init_ms'] for r in results),
+        'ready_median_ms': statistics.median(ready),
+        'ready_max_ms': max(ready),
+        'heavy_modules': results[-1]['heavy_modules'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bot açılış süresi ölçümü (soğuk süreç)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--eager', action='store_true', help='eski davranışı da ölç (senkron bağlantı testi)')
+    args = parser.parse_args()
+
+    modes = [('lazy', True)] + ([('eager', False)] if args.eager else [])
+    for label, lazy in modes:
+        summary = summarize(measure(lazy=lazy, runs=args.runs))
+        print(f"{label:>5}: hazır {summary['ready_median_ms']:.0f} ms (medyan, max {summary['ready_max_ms']:.0f}) | "
+              f"import {summary['import_ms']:.0f} ms, kurucu {summary['init_ms']:.0f} ms | "
+              f"yüklü ağır modüller: {', '.join(summary['heavy_modules']) or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import time
+
+import numpy as np
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+_TIMEFRAME_UNITS_MS = {
+    'm': 60_000,
+    'h': 3_600_000,
+    'd': 86_400_000,
+    'w': 604_800_000,
+}
+
+
+def timeframe_to_ms(timeframe):
+    """'15m', '1h', '4h', '1d' gibi zaman dilimini milisaniyeye çevir"""
+    amount, unit = timeframe[:-1], timeframe[-1]
+    if unit not in _TIMEFRAME_UNITS_MS or not amount.isdigit():
+        raise ValueError(f"Geçersiz zaman dilimi: {timeframe}")
+    return int(amount) * _TIMEFRAME_UNITS_MS[unit]
+
+
+class RingBuffer:
+    """Sabit kapasiteli, satır tabanlı float64 halka tamponu.
+
+    Her satır tamponda iki kez (i ve i + capacity) yazılır; böylece
+    kronolojik pencere kopyalamadan tek bir ardışık dilim olarak okunur.
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.width = width
+        self._buffer = np.full((capacity * 2, width), np.nan, dtype=np.float64)
+        self._start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _write(self, slot, row):
+        self._buffer[slot] = row
+        self._buffer[slot + self.capacity] = row
+
+    def append(self, row):
+        if self.count < self.capacity:
+            self._write((self._start + self.count) % self.capacity, row)
+            self.count += 1
+        else:
+            # En eski satırın üzerine yaz, pencereyi bir kaydır
+            self._write(self._start, row)
+            self._start = (self._start + 1) % self.capacity
+
+    def replace(self, offset, row):
+        """Sondan `offset` kadar gerideki satırı yerinde güncelle (0 = son satır)"""
+        self._write((self._start + self.count - 1 - offset) % self.capacity, row)
+
+    def row(self, offset=0):
+        return self._buffer[self._start + self.count - 1 - offset]
+
+    def clear(self):
+        self._start = 0
+        self.count = 0
+
+    def view(self, limit=None):
+        """Kronolojik sıradaki satırlar (kopyasız NumPy görünümü)"""
+        count = self.count if limit is None else min(limit, self.count)
+        end = self._start + self.count
+        return self._buffer[end - count:end]
+
+    def __getstate__(self):
+        # Anlık görüntüde sadece dolu satırlar (çift yazılmış tampon değil)
+        state = self.__dict__.copy()
+        del state['_buffer'], state['_start'], state['count']
+        state['rows'] = self.view().copy()
+        return state
+
+    def __setstate__(self, state):
+        rows = state.pop('rows')
+        self.__dict__.update(state)
+        self._buffer = np.full((self.capacity * 2, self.width), np.nan, dtype=np.float64)
+        self._start = 0
+        self.count = 0
+        for row in rows:
+            self.append(row)
+
+
+class CandleStore(RingBuffer):
+    """Sembol/zaman dilimi başına sabit kapasiteli OHLCV halka tamponu"""
+
+    def __init__(self, symbol, timeframe, capacity=500):
+        super().__init__(capacity, len(OHLCV_COLUMNS))
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.last_sync = None
+
+    def last_timestamp(self):
+        if self.count == 0:
+            return None
+        return int(self.row()[0])
+
+    def update(self, ohlcv):
+        """Yeni/revize mumları tampona işle, değişen satır sayısını döndür"""
+        changed = 0
+        for row in ohlcv:
+            ts = int(row[0])
+            last_ts = self.last_timestamp()
+            if last_ts is None or ts > last_ts:
+                self.append(row)
+                changed += 1
+                continue
+
+            # Henüz kapanmamış (veya yeni kapanmış) mum: yerinde güncelle
+            offset = (last_ts - ts) // self.timeframe_ms
+            if offset < self.count and int(self.row(offset)[0]) == ts:
+                self.replace(offset, row)
+                changed += 1
+        return changed
+
+    def next_request(self, now_ms=None):
+        """Bir sonraki fetch_ohlcv argümanları: {'since': ts} veya tam pencere için {'limit': n}"""
+        last_ts = self.last_timestamp()
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        if last_ts is None or (now_ms - last_ts) // self.timeframe_ms >= self.capacity:
+            # Boş tampon veya kapasiteden büyük boşluk: tam pencere yükle
+            return {'limit': self.capacity}
+        # Son mum hâlâ oluşuyor olabilir, onu da tekrar iste
+        return {'since': last_ts}
+
+    def apply(self, request, ohlcv):
+        """next_request() ile çekilen mumları işle, değişen satır sayısını döndür"""
+        if 'limit' in request:
+            self.clear()
+        changed = self.update(ohlcv)
+        self.last_sync = int(time.time() * 1000)
+        return changed
+
+    def sync(self, exchange, now_ms=None):
+        """Sadece son kayıtlı mumdan itibaren yeni mumları çek"""
+        request = self.next_request(now_ms)
+        ohlcv = exchange.fetch_ohlcv(self.symbol, self.timeframe, **request)
+        return self.apply(request, ohlcv)
+
+    def to_dataframe(self, limit=None, copy=True):
+        """fetch_recent_data ile aynı biçimde DataFrame döndür"""
+        import pandas as pd  # ağır import: bot açılışını yavaşlatmasın
+
+        data = self.view(limit)
+        df = pd.DataFrame(data[:, 1:], columns=OHLCV_COLUMNS[1:], copy=copy)
+        df.index = pd.to_datetime(data[:, 0].astype('int64'), unit='ms')
+        df.index.name = 'timestamp'
+        return df
@@ -0,0 +1,102 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def _params_key(params):
+    """params sözlüğünü birleştirme anahtarına girecek hashlenebilir biçime çevir"""
+    if not params:
+        return ()
+    return tuple(sorted((key, repr(value)) for key, value in params.items()))
+
+
+class ExchangeGateway:
+    """ccxt istemcisi önünde tek-uçuş (single-flight) istek birleştirici.
+
+    Aynı anahtarla (metod + argümanlar + params) eşzamanlı gelen okuma istekleri tek
+    bir ağ çağrısına indirgenir: ilk gelen isteği yapar, diğerleri onun
+    sonucunu bekler. Birleştirme sadece uçuştaki isteklerde geçerlidir,
+    sonuç saklanmaz (önbellek için MarketDataCache). Diğer tüm metodlar
+    doğrudan istemciye iletilir.
+    """
+
+    def __init__(self, client, max_workers=4):
+        self.client = client
+        self.max_workers = max_workers
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self.calls = 0
+        self.coalesced = 0
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _single_flight(self, key, fn):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return future.result()
+
+    def fetch_ticker(self, symbol, params=None):
+        return self._single_flight(
+            ('fetch_ticker', symbol, _params_key(params)),
+            lambda: self.client.fetch_ticker(symbol, **({'params': params} if params else {})))
+
+    def fetch_balance(self, params=None):
+        return self._single_flight(
+            ('fetch_balance', _params_key(params)),
+            lambda: self.client.fetch_balance(**({'params': params} if params else {})))
+
+    def fetch_ohlcv(self, symbol, timeframe='1m', since=None, limit=None):
+        return self._single_flight(
+            ('fetch_ohlcv', symbol, timeframe, since, limit),
+            lambda: self.client.fetch_ohlcv(symbol, timeframe, since=since, limit=limit))
+
+    def gather(self, *calls):
+        """Bağımsız çağrıları eşzamanlı çalıştır, sonuçları aynı sırada döndür.
+
+        Hata veren çağrının yerine istisna nesnesi döner; çağıran kontrol eder.
+        """
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='gateway')
+        futures = [self._pool.submit(call) for call in calls]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.error(f"Eşzamanlı istek hatası: {e}")
+                results.append(e)
+        return results
+
+    def stats(self):
+        total = self.calls + self.coalesced
+        return {
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'inflight': len(self._inflight),
+            'coalesce_ratio': self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,154 @@
+import logging
+import threading
+import time
+
+from exchange_gateway import ExchangeGateway
+
+logger = logging.getLogger(__name__)
+
+# Bot içindeki piyasa tipi -> ccxt defaultType
+MARKET_TYPES = {
+    'spot': 'spot',
+    'futures': 'future',
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket; tüm istekler aynı bütçeyi paylaşır.
+
+    Jetonlar istek anında düşülür ve eksiye inebilir (borç); istek borç
+    kapanana kadar bekler. Böylece kapasiteden ağır istekler (ör. 40
+    ağırlıklı ticker/24hr) de sonsuza kadar beklemez, sadece daha uzun bekler.
+    """
+
+    def __init__(self, rate_per_second=10.0, burst=None):
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst or rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self, weight=1.0):
+        """`weight` kadar jeton düş, bütçe eksideyse borç kapanana kadar bekle"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= weight
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += delay
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ExchangeClientPool:
+    """Piyasa tipi başına tek, tembel oluşturulan ccxt istemcisi.
+
+    İstemciler ilk kullanımda kurulur ve tekrar kullanılır. Market bilgisi
+    (hassasiyet, limitler) tek bir arka plan thread'inde ilk kullanımda
+    yüklenir ve `markets_ttl` saniyede bir yenilenir; ccxt'nin kendi tembel
+    load_markets() çağrısı da aynı kilitten geçer. Tüm istemcilerin ccxt
+    throttle'ı tek bir RateLimiter'a bağlanır; böylece spot ve futures aynı
+    istek ağırlığı bütçesini paylaşır.
+    """
+
+    def __init__(self, config, rate_limit=20.0, markets_ttl=3600, retry_seconds=60, factory=None):
+        self.config = config
+        self.limiter = RateLimiter(rate_limit)
+        self.markets_ttl = markets_ttl
+        self.retry_seconds = retry_seconds
+        self.factory = factory
+        self._clients = {}
+        self._markets_loaded_at = {}
+        self._markets_due = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._refresher = None
+
+    def _create(self, market_type):
+        options = {
+            'apiKey': self.config['api_key'],
+            'secret': self.config['secret'],
+            'sandbox': self.config.get('sandbox', True),
+            'enableRateLimit': True,
+            'options': {'defaultType': MARKET_TYPES[market_type]}
+        }
+        if self.factory is not None:
+            client = self.factory(options)
+        else:
+            import ccxt
+            client = ccxt.binance(options)
+
+        # ccxt her istekte throttle(cost) çağırır: ortak bütçeye yönlendir
+        client.throttle = lambda cost=None: self.limiter.acquire(cost or 1)
+        # ccxt ilk istekte load_markets()'ı kendisi çağırır: yenileme thread'iyle aynı kilitten geçsin
+        load_markets = client.load_markets
+        markets_lock = threading.Lock()
+
+        def locked_load_markets(reload=False, *args, **kwargs):
+            with markets_lock:
+                first = market_type not in self._markets_loaded_at
+                markets = load_markets(reload, *args, **kwargs)
+                if reload or first:
+                    self._markets_loaded_at[market_type] = time.time()
+            return markets
+
+        client.load_markets = locked_load_markets
+        # Eşzamanlı özdeş okuma isteklerini tek çağrıda birleştir
+        return ExchangeGateway(client)
+
+    def get(self, market_type='spot'):
+        """Piyasa tipi için paylaşılan istemciyi döndür (gerekirse oluştur)"""
+        with self._lock:
+            client = self._clients.get(market_type)
+            if client is None:
+                client = self._create(market_type)
+                self._clients[market_type] = client
+                self._markets_due[market_type] = 0.0
+                self._start_refresher()
+        return client
+
+    def _start_refresher(self):
+        if self._closed:
+            return
+        if self._refresher is None:
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True, name='markets-refresh')
+            self._refresher.start()
+        self._wake.set()
+
+    def _refresh_loop(self):
+        """Vadesi gelen market bilgilerini yükle, sonraki vadeye kadar uyu"""
+        while not self._closed:
+            self._wake.clear()
+            for market_type, due in list(self._markets_due.items()):
+                if due <= time.time() and not self._closed:
+                    self._refresh_markets(market_type)
+            delay = min(self._markets_due.values(), default=time.time() + self.markets_ttl) - time.time()
+            self._wake.wait(max(delay, 0.0))
+
+    def _refresh_markets(self, market_type):
+        try:
+            client = self._clients[market_type]
+            client.load_markets(reload=market_type in self._markets_loaded_at)
+            self._markets_due[market_type] = time.time() + self.markets_ttl
+        except Exception as e:
+            logger.error(f"Market bilgisi yüklenemedi ({market_type}): {e}")
+            self._markets_due[market_type] = time.time() + self.retry_seconds
+
+    def close(self, timeout=5.0):
+        """Yenileme thread'ini durdur"""
+        self._closed = True
+        self._wake.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout)
+
+    def market(self, symbol, market_type='spot'):
+        """Paritenin hassasiyet/limit bilgisi (yüklenmemişse yükler)"""
+        client = self.get(market_type)
+        client.load_markets()
+        return client.market(symbol)
+
+    def fetch_balance(self, market_type='spot'):
+        return self.get(market_type).fetch_balance()
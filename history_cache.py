@@ -0,0 +1,217 @@
+import argparse
+from datetime import datetime, timezone
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+from candle_store import OHLCV_COLUMNS, timeframe_to_ms
+from exchange_pool import MARKET_TYPES
+
+ROW_DTYPE = np.dtype('<f8')
+ROW_WIDTH = len(OHLCV_COLUMNS)
+ROW_BYTES = ROW_DTYPE.itemsize * ROW_WIDTH
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryCache:
+    """(symbol, timeframe, piyasa) başına diskte sabit genişlikli OHLCV dosyası.
+
+    Her satır 6 adet little-endian float64'tür (timestamp ms, open, high,
+    low, close, volume); dosya zaman sırasına göre sadece sona eklenir ve
+    okumalar np.memmap ile kopyasız yapılır. Sadece kapanmış mumlar yazılır.
+    Spot ve futures mumları farklıdır; piyasa tipi dosya adına girer.
+    """
+
+    def __init__(self, symbol, timeframe, directory='history', market='spot'):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.directory = directory
+        self.market = market
+        filename = f"{symbol.replace('/', '-').replace(':', '-')}_{timeframe}_{market}.bin"
+        self.path = os.path.join(directory, filename)
+        # Aynı dosyaya eşzamanlı indirme/ekleme (ör. ısınma + akış) mükerrer satır yazmasın
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self.path) // ROW_BYTES
+        except FileNotFoundError:
+            return 0
+
+    def load(self, limit=None):
+        """Kayıtlı mumları (n, 6) memmap olarak döndür (son `limit` satır)"""
+        rows = len(self)
+        if rows == 0:
+            return np.empty((0, ROW_WIDTH), dtype=ROW_DTYPE)
+        data = np.memmap(self.path, dtype=ROW_DTYPE, mode='r', shape=(rows, ROW_WIDTH))
+        return data if limit is None else data[-limit:]
+
+    def _timestamp_at(self, row):
+        with open(self.path, 'rb') as f:
+            f.seek(row * ROW_BYTES)
+            return int(np.frombuffer(f.read(ROW_DTYPE.itemsize), dtype=ROW_DTYPE)[0])
+
+    def first_timestamp(self):
+        return self._timestamp_at(0) if len(self) else None
+
+    def last_timestamp(self):
+        rows = len(self)
+        return self._timestamp_at(rows - 1) if rows else None
+
+    def append(self, ohlcv, now_ms=None):
+        """Son kayıttan yeni ve kapanmış mumları dosyaya ekle"""
+        rows = np.asarray(ohlcv, dtype=ROW_DTYPE).reshape(-1, ROW_WIDTH)
+        if len(rows) == 0:
+            return 0
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        with self._lock:
+            last_ts = self.last_timestamp()
+
+            mask = rows[:, 0] + self.timeframe_ms <= now_ms
+            if last_ts is not None:
+                mask &= rows[:, 0] > last_ts
+            rows = rows[mask]
+            if len(rows) == 0:
+                return 0
+
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path, 'ab') as f:
+                f.write(rows.tobytes())
+            return len(rows)
+
+    def find_gaps(self):
+        """Eksik mum aralıklarını [(ilk eksik ts, son eksik ts), ...] olarak döndür"""
+        data = self.load()
+        if len(data) < 2:
+            return []
+        ts = data[:, 0]
+        steps = np.diff(ts)
+        idx = np.flatnonzero(steps > self.timeframe_ms)
+        return [(int(ts[i] + self.timeframe_ms), int(ts[i + 1] - self.timeframe_ms)) for i in idx]
+
+    def _fetch_page(self, exchange, since, limit, retries=5):
+        import ccxt
+
+        delay = max(getattr(exchange, 'rateLimit', 1000), 250) / 1000
+        for attempt in range(retries):
+            try:
+                return exchange.fetch_ohlcv(self.symbol, self.timeframe, since=since, limit=limit)
+            except ccxt.NetworkError as e:
+                # Zaman aşımı / rate limit: geri çekilip tekrar dene
+                if attempt == retries - 1:
+                    raise
+                logger.warning(f"Geçmiş veri isteği başarısız ({e}), {delay:.1f} sn sonra tekrar")
+                time.sleep(delay)
+                delay *= 2
+        return []
+
+    def download(self, exchange, since=None, until=None, limit=1000):
+        """Son kayıtlı mumdan itibaren sayfa sayfa indir, eklenen mum sayısını döndür"""
+        with self._lock:
+            return self._download(exchange, since, until, limit)
+
+    def _pages(self, exchange, cursor, until, limit):
+        """[cursor, until) aralığını sayfa sayfa indir"""
+        while cursor < until:
+            page = self._fetch_page(exchange, cursor, limit)
+            if not page:
+                break
+            page = [row for row in page if row[0] < until]
+            if page:
+                yield page
+            next_cursor = int(page[-1][0]) + self.timeframe_ms if page else until
+            if next_cursor <= cursor:
+                break
+            cursor = next_cursor
+            if not getattr(exchange, 'enableRateLimit', False):
+                time.sleep(getattr(exchange, 'rateLimit', 0) / 1000)
+
+    def _download(self, exchange, since, until, limit):
+        last_ts = self.last_timestamp()
+        cursor = last_ts + self.timeframe_ms if last_ts is not None else since
+        if cursor is None:
+            cursor = int(time.time() * 1000) - limit * self.timeframe_ms
+        until = int(time.time() * 1000) if until is None else until
+
+        added = 0
+        for page in self._pages(exchange, cursor, until, limit):
+            added += self.append(page)
+
+        if added:
+            gaps = self.find_gaps()
+            if gaps:
+                logger.warning(f"{self.path}: {len(gaps)} mum boşluğu var (ilk: {gaps[0]})")
+        return added
+
+    def _prepend(self, exchange, since, first_ts, limit):
+        """Dosyanın başından eksik [since, first_ts) aralığını indirip öne ekle"""
+        rows = [row for page in self._pages(exchange, since, first_ts, limit) for row in page]
+        older = np.asarray(rows, dtype=ROW_DTYPE).reshape(-1, ROW_WIDTH)
+        if len(older) == 0:
+            return 0
+        # Sadece sona eklenen dosya: öne ekleme geçici dosyaya yazıp atomik değiştirme
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(older.tobytes())
+            with open(self.path, 'rb') as current:
+                shutil.copyfileobj(current, f)
+        os.replace(tmp_path, self.path)
+        return len(older)
+
+    def ensure(self, exchange, min_rows, limit=1000):
+        """En az son `min_rows` kapanmış mumun diskte olmasını sağla.
+
+        Dolu önbellekte sadece eksik kısımlar indirilir: son kayıttan
+        sonrası, önbellek pencereden geç başlıyorsa baştaki eksik aralık.
+        Son kayıt pencereden de eskiyse aradaki boşluk indirilmez, pencere
+        baştan çekilir (eski satırlar dosyada kalır, boşluk uyarısı verilir).
+        """
+        since = int(time.time() * 1000) - (min_rows + 1) * self.timeframe_ms
+        with self._lock:
+            first_ts, last_ts = self.first_timestamp(), self.last_timestamp()
+            added = 0
+            if last_ts is not None and last_ts + self.timeframe_ms < since:
+                for page in self._pages(exchange, since, int(time.time() * 1000), limit):
+                    added += self.append(page)
+            elif first_ts is not None and first_ts > since:
+                added += self._prepend(exchange, since, first_ts, limit)
+            return added + self._download(exchange, since, None, limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Geçmiş mum önbelleğini indir/güncelle')
+    parser.add_argument('symbol', help='örnek: BTC/USDT')
+    parser.add_argument('timeframe', help='örnek: 15m')
+    parser.add_argument('--since', help='YYYY-MM-DD (boş önbellek için başlangıç)')
+    parser.add_argument('--market', choices=list(MARKET_TYPES), default='spot')
+    parser.add_argument('--dir', default='history')
+    args = parser.parse_args()
+
+    since = None
+    if args.since:
+        since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+    import ccxt
+
+    exchange = ccxt.binance({'enableRateLimit': True, 'options': {'defaultType': MARKET_TYPES[args.market]}})
+    cache = HistoryCache(args.symbol, args.timeframe, args.dir, market=args.market)
+    started = time.time()
+    added = cache.download(exchange, since=since)
+    print(f"✅ {added} yeni mum eklendi ({time.time() - started:.1f} sn), toplam {len(cache)}")
+
+    gaps = cache.find_gaps()
+    if gaps:
+        print(f"⚠️ {len(gaps)} boşluk bulundu:")
+        for start, end in gaps[:10]:
+            print(f"   {datetime.fromtimestamp(start / 1000, timezone.utc)} → "
+                  f"{datetime.fromtimestamp(end / 1000, timezone.utc)}")
+
+
+if __name__ == '__main__':
+    main()
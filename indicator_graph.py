@@ -0,0 +1,347 @@
+import math
+
+import numpy as np
+
+from candle_store import RingBuffer
+from indicators import NAN, CandleEngine, StreamingEMA, StreamingExtreme, rolling_extreme
+
+
+class Indicator:
+    """İndikatör tanımı. Aynı sınıf ve parametreler = aynı `key`.
+
+    Grafikte her key bir kez hesaplanır. Alt sınıflar `outputs`,
+    gerekirse dependencies(), ısınma için lookback(), artımlı hesap için
+    stream() ve tüm geçmiş için vektörel compute() tanımlar.
+    """
+
+    outputs = ('value',)
+
+    def __init__(self, *params):
+        self.params = params
+
+    @property
+    def key(self):
+        return (type(self).__name__,) + self.params
+
+    def __eq__(self, other):
+        return isinstance(other, Indicator) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(str(p) for p in self.params)})"
+
+    def dependencies(self):
+        return ()
+
+    def lookback(self):
+        """İlk geçerli çıktıdan önceki boş (NaN) mum sayısı"""
+        return max((dependency.lookback() for dependency in self.dependencies()), default=0)
+
+    def stream(self):
+        """peek(candle, prev_close, deps) / push(...) yapan artımlı düğüm"""
+        raise NotImplementedError
+
+    def compute(self, ohlcv, deps):
+        """Tüm geçmiş için `outputs` sırasıyla dizi demeti"""
+        raise NotImplementedError
+
+
+def _true_range(high, low, prev_close):
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class _EMANode:
+    def __init__(self, period):
+        self.ema = StreamingEMA(period)
+
+    def peek(self, candle, prev_close, deps):
+        return (self.ema.peek(candle[4]),)
+
+    def push(self, candle, prev_close, deps):
+        return (self.ema.push(candle[4]),)
+
+
+class EMA(Indicator):
+    def __init__(self, period):
+        super().__init__(int(period))
+
+    def lookback(self):
+        return self.params[0] - 1
+
+    def stream(self):
+        return _EMANode(self.params[0])
+
+    def compute(self, ohlcv, deps):
+        import talib
+
+        return (talib.EMA(ohlcv[:, 4], timeperiod=self.params[0]),)
+
+
+class _ATRNode:
+    def __init__(self, period):
+        # talib ATR: TR ilk mumda tanımsız, ilk ATR = ilk `period` TR'nin SMA'sı
+        self.atr = StreamingEMA(period, wilder=True)
+
+    def peek(self, candle, prev_close, deps):
+        if prev_close is None:
+            return (NAN,)
+        return (self.atr.peek(_true_range(candle[2], candle[3], prev_close)),)
+
+    def push(self, candle, prev_close, deps):
+        if prev_close is None:
+            return (NAN,)
+        return (self.atr.push(_true_range(candle[2], candle[3], prev_close)),)
+
+
+class ATR(Indicator):
+    def __init__(self, period=14):
+        super().__init__(int(period))
+
+    def lookback(self):
+        return self.params[0]  # TR ilk mumda tanımsız
+
+    def stream(self):
+        return _ATRNode(self.params[0])
+
+    def compute(self, ohlcv, deps):
+        import talib
+
+        return (talib.ATR(ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4], timeperiod=self.params[0]),)
+
+
+class _DonchianNode:
+    def __init__(self, period):
+        self.upper = StreamingExtreme(period, 'max')
+        self.lower = StreamingExtreme(period, 'min')
+
+    @staticmethod
+    def _bands(upper, lower):
+        return (upper, lower, (upper + lower) / 2, upper - lower)
+
+    def peek(self, candle, prev_close, deps):
+        return self._bands(self.upper.peek(candle[2]), self.lower.peek(candle[3]))
+
+    def push(self, candle, prev_close, deps):
+        return self._bands(self.upper.push(candle[2]), self.lower.push(candle[3]))
+
+
+class Donchian(Indicator):
+    outputs = ('upper', 'lower', 'middle', 'distance')
+
+    def __init__(self, period=20):
+        super().__init__(int(period))
+
+    def lookback(self):
+        return self.params[0] - 1
+
+    def stream(self):
+        return _DonchianNode(self.params[0])
+
+    def compute(self, ohlcv, deps):
+        upper = rolling_extreme(ohlcv[:, 2], self.params[0], 'max')
+        lower = rolling_extreme(ohlcv[:, 3], self.params[0], 'min')
+        return (upper, lower, (upper + lower) / 2, upper - lower)
+
+
+class _MACDNode:
+    def __init__(self, fast, slow, signal):
+        # talib MACD: hızlı EMA yavaş EMA ile aynı mumda tohumlanır
+        self.fast = StreamingEMA(fast, seed_index=slow - 1)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingEMA(signal)
+
+    @staticmethod
+    def _lines(macd, signal):
+        if math.isnan(signal):
+            # talib MACD sinyal hattı oluşana kadar üç çıktıyı da boş döndürür
+            macd = NAN
+        return (macd, signal, macd - signal)
+
+    def peek(self, candle, prev_close, deps):
+        macd = self.fast.peek(candle[4]) - self.slow.peek(candle[4])
+        signal = self.signal.peek(macd) if not math.isnan(macd) else NAN
+        return self._lines(macd, signal)
+
+    def push(self, candle, prev_close, deps):
+        macd = self.fast.push(candle[4]) - self.slow.push(candle[4])
+        signal = self.signal.push(macd) if not math.isnan(macd) else NAN
+        return self._lines(macd, signal)
+
+
+class MACD(Indicator):
+    outputs = ('macd', 'signal', 'hist')
+
+    def __init__(self, fast=12, slow=26, signal=9):
+        super().__init__(int(fast), int(slow), int(signal))
+
+    def lookback(self):
+        _, slow, signal = self.params
+        return slow + signal - 2
+
+    def stream(self):
+        return _MACDNode(*self.params)
+
+    def compute(self, ohlcv, deps):
+        import talib
+
+        fast, slow, signal = self.params
+        return talib.MACD(ohlcv[:, 4], fastperiod=fast, slowperiod=slow, signalperiod=signal)
+
+
+class _BandDistanceVsATRNode:
+    @staticmethod
+    def peek(candle, prev_close, deps):
+        (_, _, _, distance), (atr,) = deps
+        return (distance / (atr * 4) if atr else NAN,)
+
+    push = peek
+
+
+class BandDistanceVsATR(Indicator):
+    """Donchian bant genişliği / (4 * ATR)"""
+
+    def __init__(self, donchian_period=20, atr_period=14):
+        super().__init__(int(donchian_period), int(atr_period))
+
+    def dependencies(self):
+        return (Donchian(self.params[0]), ATR(self.params[1]))
+
+    def stream(self):
+        return _BandDistanceVsATRNode()
+
+    def compute(self, ohlcv, deps):
+        (_, _, _, distance), (atr,) = deps
+        return (distance / (atr * 4),)
+
+
+def resolve(indicators):
+    """Bağımlılıklar önce gelecek şekilde tekil indikatör listesi"""
+    ordered = []
+    seen = set()
+
+    def visit(indicator):
+        if indicator.key in seen:
+            return
+        for dependency in indicator.dependencies():
+            visit(dependency)
+        seen.add(indicator.key)
+        ordered.append(indicator)
+
+    for indicator in indicators:
+        visit(indicator)
+    return ordered
+
+
+class IndicatorGraph(CandleEngine):
+    """Stratejilerin istediği indikatörlerin tekilleştirilmiş bağımlılık grafiği.
+
+    Her benzersiz indikatör (ör. iki stratejinin ortak ATR(14)'ü) mum
+    başına bir kez hesaplanır; çıktılar tek satırda `columns` sırasıyla
+    tutulur. Bekleyen mum davranışı için bkz. CandleEngine.
+    """
+
+    def __init__(self, indicators, capacity=500):
+        self.nodes = resolve(indicators)
+        positions = {node.key: i for i, node in enumerate(self.nodes)}
+        # Düğüm başına bağımlılıkların self.nodes içindeki sıraları
+        self.dependency_positions = [tuple(positions[dependency.key] for dependency in node.dependencies())
+                                     for node in self.nodes]
+        self.columns = [(node.key, output) for node in self.nodes for output in node.outputs]
+        self.index = {column: i for i, column in enumerate(self.columns)}
+        self.capacity = capacity
+        self.reset()
+
+    def reset(self):
+        self.streams = [node.stream() for node in self.nodes]
+        self.outputs = RingBuffer(self.capacity, 1 + len(self.columns))
+        self.pending = None
+        self.prev_close = None
+
+    def _commit(self, candle):
+        outputs = []
+        for stream, deps in zip(self.streams, self.dependency_positions):
+            outputs.append(stream.push(candle, self.prev_close, [outputs[i] for i in deps]))
+        self.prev_close = candle[4]
+
+    def _evaluate(self, candle):
+        candle = tuple(candle.tolist()) if isinstance(candle, np.ndarray) else candle
+        outputs = []
+        row = [candle[0]]
+        for stream, deps in zip(self.streams, self.dependency_positions):
+            out = stream.peek(candle, self.prev_close, [outputs[i] for i in deps])
+            outputs.append(out)
+            row.extend(out)
+        return row
+
+    def column(self, indicator, output='value'):
+        """view() satırındaki kolon numarası (0 = zaman damgası)"""
+        return 1 + self.index[(indicator.key, output)]
+
+
+def compute_graph_arrays(ohlcv, indicators):
+    """Tüm geçmiş için {(key, çıktı): dizi}; her benzersiz indikatör bir kez hesaplanır"""
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    results = {}
+    arrays = {}
+    for node in resolve(indicators):
+        deps = [results[dependency.key] for dependency in node.dependencies()]
+        results[node.key] = node.compute(ohlcv, deps)
+        for output, values in zip(node.outputs, results[node.key]):
+            arrays[(node.key, output)] = values
+    return arrays
+
+
+def check_talib_parity(ohlcv, indicators, atol=1e-6):
+    """Artımlı grafiği vektörel (talib) hesapla karşılaştır; {(key, çıktı): en büyük fark}"""
+    import pandas as pd
+
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    expected = compute_graph_arrays(ohlcv, indicators)
+    # Donchian referansı rolling_extreme değil, bağımsız pandas hesabı
+    for node in resolve(indicators):
+        if isinstance(node, Donchian):
+            upper = pd.Series(ohlcv[:, 2]).rolling(node.params[0]).max().to_numpy()
+            lower = pd.Series(ohlcv[:, 3]).rolling(node.params[0]).min().to_numpy()
+            expected.update({(node.key, 'upper'): upper, (node.key, 'lower'): lower,
+                             (node.key, 'middle'): (upper + lower) / 2, (node.key, 'distance'): upper - lower})
+        elif isinstance(node, BandDistanceVsATR):
+            donchian, atr = node.dependencies()
+            expected[(node.key, 'value')] = (expected[(donchian.key, 'distance')] /
+                                             (expected[(atr.key, 'value')] * 4))
+
+    graph = IndicatorGraph(indicators, capacity=len(ohlcv))
+    # Her mumu önce yarım, sonra kapanmış haliyle besle (revizyon yolu da sınansın)
+    for candle in ohlcv:
+        partial = candle.copy()
+        partial[2] = partial[4] = (candle[1] + candle[4]) / 2
+        partial[3] = min(candle[1], partial[4])
+        graph.update(partial)
+        graph.update(candle)
+
+    actual = graph.view()
+    mismatches = {}
+    for column, values in expected.items():
+        got = actual[:, 1 + graph.index[column]]
+        if not np.allclose(got, values, atol=atol, rtol=1e-9, equal_nan=True):
+            mismatches[column] = float(np.nanmax(np.abs(got - values)))
+    return mismatches
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(42)
+    n = 2000
+    close = 30000 + np.cumsum(rng.normal(0, 50, n))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) + rng.uniform(0, 40, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 40, n)
+    ts = np.arange(n) * 900_000
+    sample = np.column_stack([ts, open_, high, low, close, rng.uniform(1, 100, n)])
+
+    # Botun varsayılan stratejisinin indikatörleri
+    result = check_talib_parity(sample, [EMA(200), ATR(14), Donchian(20), MACD(12, 26, 9), BandDistanceVsATR(20, 14)])
+    if result:
+        print(f"❌ talib uyumsuzluğu: {result}")
+        raise SystemExit(1)
+    print("✅ Artımlı indikatör grafiği talib ile birebir uyumlu")
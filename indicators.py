@@ -0,0 +1,147 @@
+from collections import deque
+
+import numpy as np
+
+NAN = float('nan')
+
+
+class StreamingEMA:
+    """talib EMA ile aynı tohumlamaya sahip artımlı EMA.
+
+    İlk değer, `seed_index` numaralı girdide son `period` girdinin SMA'sıdır
+    (varsayılan period - 1). `wilder=True` ise talib ATR'deki Wilder
+    yumuşatması kullanılır.
+    """
+
+    def __init__(self, period, seed_index=None, wilder=False):
+        self.period = period
+        self.seed_index = period - 1 if seed_index is None else seed_index
+        self.wilder = wilder
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.value = None
+        self._window = deque(maxlen=period)
+        self._window_sum = 0.0
+
+    def peek(self, x):
+        """Bir sonraki girdi x olsaydı çıkacak değer (durum değişmez)"""
+        if self.value is not None:
+            if self.wilder:
+                return (self.value * (self.period - 1) + x) / self.period
+            return (x - self.value) * self.k + self.value
+        if self.count == self.seed_index:
+            dropped = self._window[0] if len(self._window) == self.period else 0.0
+            return (self._window_sum - dropped + x) / self.period
+        return NAN
+
+    def push(self, x):
+        out = self.peek(x)
+        if self.value is None:
+            if len(self._window) == self.period:
+                self._window_sum -= self._window[0]
+            self._window.append(x)
+            self._window_sum += x
+            if self.count == self.seed_index:
+                self.value = out
+                self._window.clear()
+        else:
+            self.value = out
+        self.count += 1
+        return out
+
+
+class StreamingExtreme:
+    """Monoton deque ile kayan pencere max/min (pandas rolling ile aynı)"""
+
+    def __init__(self, period, mode='max'):
+        self.period = period
+        self.is_max = mode == 'max'
+        self.count = 0
+        self._deque = deque()
+
+    def _dominates(self, a, b):
+        return a >= b if self.is_max else a <= b
+
+    def peek(self, x):
+        if self.count + 1 < self.period:
+            return NAN
+        if self._deque and not self._dominates(x, self._deque[0][1]):
+            return self._deque[0][1]
+        return x
+
+    def push(self, x):
+        out = self.peek(x)
+        idx = self.count
+        while self._deque and self._dominates(x, self._deque[-1][1]):
+            self._deque.pop()
+        self._deque.append((idx, x))
+        # Bir sonraki mum için sadece son period-1 kapanmış mum gerekli
+        while self._deque[0][0] <= idx - (self.period - 1):
+            self._deque.popleft()
+        self.count += 1
+        return out
+
+
+class CandleEngine:
+    """Mum başına O(1) artımlı indikatör motoru iskeleti.
+
+    Son mum "bekleyen" (henüz kapanmamış olabilir) kabul edilir: aynı
+    zaman damgasıyla tekrar gelirse sadece çıktısı yeniden hesaplanır,
+    daha yeni bir mum gelince durum kalıcı olarak ilerletilir. Alt
+    sınıflar reset(), _commit(candle) ve _evaluate(candle) tanımlar;
+    reset() `outputs`, `pending` ve `prev_close` alanlarını kurar.
+    """
+
+    def last_timestamp(self):
+        return None if self.pending is None else int(self.pending[0])
+
+    def update(self, candle):
+        """Yeni veya revize edilmiş tek mumu işle, indikatör satırını döndür"""
+        ts = int(candle[0])
+        if self.pending is not None and ts < self.pending[0]:
+            return None
+        if self.pending is not None and ts > self.pending[0]:
+            self._commit(self.pending)
+            self.pending = None
+
+        row = self._evaluate(candle)
+        if self.pending is None:
+            self.outputs.append(row)
+        else:
+            self.outputs.replace(0, row)
+        self.pending = tuple(float(v) for v in candle)
+        return row
+
+    def update_many(self, ohlcv):
+        """Zaman damgası bekleyen mumdan eski olmayan tüm satırları işle"""
+        ohlcv = np.asarray(ohlcv, dtype=np.float64)
+        last_ts = self.last_timestamp()
+        if last_ts is not None and len(ohlcv):
+            start = int(np.searchsorted(ohlcv[:, 0], last_ts))
+            if start == len(ohlcv) or int(ohlcv[start, 0]) != last_ts:
+                # Bekleyen mum pencerede yok (boşluk): baştan hesapla
+                self.reset()
+                start = 0
+            ohlcv = ohlcv[start:]
+        for candle in ohlcv:
+            self.update(candle)
+        return len(ohlcv)
+
+    def view(self, limit=None):
+        """Son `limit` mumun indikatör satırları: [timestamp, *kolonlar]"""
+        return self.outputs.view(limit)
+
+    def view_until(self, timestamp, limit=None):
+        """`timestamp` dahil ona kadarki son `limit` satır; bekleyen mum değişmez"""
+        rows = self.outputs.view()
+        rows = rows[:int(np.searchsorted(rows[:, 0], timestamp, side='right'))]
+        return rows if limit is None else rows[len(rows) - min(limit, len(rows)):]
+
+
+def rolling_extreme(values, period, mode='max'):
+    """pandas rolling(period).max()/min() ile aynı, başı NaN dolu dizi"""
+    out = np.full(len(values), np.nan)
+    if len(values) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(values, period)
+        out[period - 1:] = windows.max(axis=1) if mode == 'max' else windows.min(axis=1)
+    return out
@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Veri tipi başına (taze kalma süresi, en fazla bayat sunulma süresi) saniye
+DEFAULT_TTLS = {
+    'ticker': (5, 30),
+    'balance': (30, 120),
+    'ohlcv': (60, 300),
+}
+
+
+class MarketDataCache:
+    """Ticker, bakiye ve mum verisi için TTL önbelleği (stale-while-revalidate).
+
+    Taze kayıt doğrudan döner. Süresi geçmiş ama bayat sınırı içindeki
+    kayıt da hemen döner, arka planda tek bir yenileme başlatılır. Bayat
+    sınırını da aşmış veya hiç olmayan kayıt senkron yüklenir.
+    """
+
+    def __init__(self, ttls=None, clock=time.time):
+        self.clock = clock
+        self.ttls = dict(DEFAULT_TTLS)
+        for kind, value in (ttls or {}).items():
+            self.ttls[kind] = tuple(value)
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {kind: {'hits': 0, 'stale_hits': 0, 'misses': 0} for kind in self.ttls}
+
+    def _count(self, kind, field):
+        self.stats.setdefault(kind, {'hits': 0, 'stale_hits': 0, 'misses': 0})[field] += 1
+
+    def get(self, kind, key, loader):
+        """(kind, key) değerini önbellekten ver, gerekirse loader() ile yükle"""
+        fresh_ttl, stale_ttl = self.ttls.get(kind, (0, 0))
+        entry = self._entries.get((kind, key))
+        now = self.clock()
+
+        if entry is not None:
+            value, stored_at = entry
+            age = now - stored_at
+            if age < fresh_ttl:
+                self._count(kind, 'hits')
+                return value
+            if age < stale_ttl:
+                self._count(kind, 'stale_hits')
+                self._refresh_in_background(kind, key, loader)
+                return value
+
+        self._count(kind, 'misses')
+        return self._load(kind, key, loader)
+
+    def _load(self, kind, key, loader):
+        value = loader()
+        self._entries[(kind, key)] = (value, self.clock())
+        return value
+
+    def _refresh_in_background(self, kind, key, loader):
+        with self._lock:
+            if (kind, key) in self._refreshing:
+                return
+            self._refreshing.add((kind, key))
+
+        def refresh():
+            try:
+                self._load(kind, key, loader)
+            except Exception as e:
+                logger.error(f"Önbellek yenilenemedi ({kind} {key}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard((kind, key))
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def put(self, kind, key, value):
+        """Başka yoldan gelen güncel veriyi önbelleğe yaz (ör. akış/trading döngüsü)"""
+        self._entries[(kind, key)] = (value, self.clock())
+
+    def invalidate(self, kind=None, key=None):
+        for entry_key in list(self._entries):
+            if (kind is None or entry_key[0] == kind) and (key is None or entry_key[1] == key):
+                self._entries.pop(entry_key, None)
+
+    def hit_ratio(self):
+        hits = sum(s['hits'] + s['stale_hits'] for s in self.stats.values())
+        total = hits + sum(s['misses'] for s in self.stats.values())
+        return hits / total if total else 0.0
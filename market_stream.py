@@ -0,0 +1,249 @@
+import argparse
+import base64
+import hashlib
+import json
+import logging
+import socket
+import struct
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+STREAM_URLS = {
+    'spot': 'wss://stream.binance.com:9443/stream?streams=',
+    'futures': 'wss://fstream.binance.com/stream?streams=',
+}
+
+
+def stream_names(symbol, timeframe, trades=True, klines=True):
+    """BTC/USDT + 15m -> ['btcusdt@kline_15m', 'btcusdt@aggTrade']"""
+    pair = symbol.replace('/', '').split(':')[0].lower()
+    names = [f"{pair}@kline_{timeframe}"] if klines else []
+    if trades:
+        names.append(f"{pair}@aggTrade")
+    return names
+
+
+def parse_message(raw):
+    """Binance kline/aggTrade mesajını ('kline', candle, closed) veya ('trade', ...) olarak çöz"""
+    msg = json.loads(raw)
+    data = msg.get('data', msg)
+    event = data.get('e')
+    if event == 'kline':
+        k = data['k']
+        candle = [k['t'], float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v'])]
+        return 'kline', candle, bool(k['x'])
+    if event == 'aggTrade':
+        return 'trade', float(data['p']), float(data['q']), int(data['T'])
+    return None
+
+
+class MarketStream:
+    """Binance kline + aggTrade WebSocket akışı, kopunca otomatik yeniden bağlanır.
+
+    on_kline(candle, closed) her kline güncellemesinde, on_trade(price, qty, ts)
+    her işlemde ve on_reconnect() kopmadan sonraki her bağlantıda çağrılır.
+    Geri çağırmalar akış thread'inde çalışır.
+    """
+
+    def __init__(self, symbol, timeframe, on_kline=None, on_trade=None, on_reconnect=None,
+                 market='spot', url=None, trades=True, max_reconnect_delay=60, klines=True):
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.on_kline = on_kline
+        self.on_trade = on_trade
+        self.on_reconnect = on_reconnect
+        self.url = url or STREAM_URLS[market] + '/'.join(stream_names(symbol, timeframe, trades, klines))
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.running = False
+        self.connected = threading.Event()
+        self.messages = 0
+        self.reconnects = 0
+        self.last_message_at = None
+        self._app = None
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        if self._app is not None:
+            self._app.close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        import websocket
+
+        delay = 1
+        first = True
+        while self.running:
+            self._app = websocket.WebSocketApp(
+                self.url,
+                on_open=lambda ws: self._on_open(first),
+                on_message=lambda ws, raw: self._on_message(raw),
+                on_error=lambda ws, e: logger.error(f"WebSocket hatası: {e}"),
+            )
+            started = time.time()
+            self._app.run_forever(ping_interval=60, ping_timeout=10)
+            self.connected.clear()
+            if not self.running:
+                break
+
+            # Uzun süre bağlı kaldıysa bekleme süresini sıfırla
+            if time.time() - started > self.max_reconnect_delay:
+                delay = 1
+            logger.warning(f"WebSocket bağlantısı koptu, {delay} sn sonra yeniden bağlanılacak")
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+            first = False
+            self.reconnects += 1
+
+    def _on_open(self, first):
+        self.connected.set()
+        if not first and self.on_reconnect:
+            # Kopukken kaçan mumlar REST ile tek seferde tamamlanır
+            self.on_reconnect()
+
+    def _on_message(self, raw):
+        self.messages += 1
+        self.last_message_at = time.time()
+        try:
+            event = parse_message(raw)
+            if event is None:
+                return
+            if event[0] == 'kline' and self.on_kline:
+                self.on_kline(event[1], event[2])
+            elif event[0] == 'trade' and self.on_trade:
+                self.on_trade(*event[1:])
+        except Exception as e:
+            logger.error(f"Akış mesajı işlenemedi: {e}")
+
+
+class ReplayWebSocketServer:
+    """Kayıtlı mesajları yerel bağlantılara tekrar oynatan minimal WebSocket sunucusu.
+
+    Testlerde ve geliştirmede gerçek Binance yerine kullanılır. Her bağlantıya
+    mesajları baştan gönderir; close_after=True ise sonunda bağlantıyı kapatır
+    (istemcinin yeniden bağlanma yolunu sınamak için).
+    """
+
+    GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+    def __init__(self, messages, host='127.0.0.1', port=0, interval=0.0, close_after=True):
+        self.messages = [m if isinstance(m, str) else json.dumps(m) for m in messages]
+        self.interval = interval
+        self.close_after = close_after
+        self.connections = 0
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self._sock.listen(5)
+        self.host, self.port = self._sock.getsockname()
+        self._running = False
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}/stream"
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """Satır başına bir JSON mesaj içeren kayıt dosyasından oluştur"""
+        with open(path, 'r') as f:
+            return cls([line.strip() for line in f if line.strip()], **kwargs)
+
+    def start(self):
+        self._running = True
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._sock.close()
+
+    def _serve(self):
+        while self._running:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            self.connections += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        try:
+            request = b''
+            while b'\r\n\r\n' not in request:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return
+                request += chunk
+            key = ''
+            for line in request.decode('latin-1').split('\r\n'):
+                if line.lower().startswith('sec-websocket-key:'):
+                    key = line.split(':', 1)[1].strip()
+            accept = base64.b64encode(hashlib.sha1((key + self.GUID).encode()).digest()).decode()
+            conn.sendall((
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+            ).encode())
+
+            for message in self.messages:
+                conn.sendall(self._frame(0x1, message.encode()))
+                if self.interval:
+                    time.sleep(self.interval)
+
+            if self.close_after:
+                conn.sendall(self._frame(0x8, struct.pack('!H', 1000)))
+            else:
+                while self._running and conn.recv(4096):
+                    pass
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _frame(opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        return header + payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kayıtlı akış mesajlarını yerel sunucudan oynat')
+    parser.add_argument('recording', help='satır başına bir Binance JSON mesajı')
+    parser.add_argument('--interval', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ReplayWebSocketServer.from_file(args.recording, interval=args.interval).start()
+    stream = MarketStream(
+        'BTC/USDT', '15m', url=server.url,
+        on_kline=lambda candle, closed: print(f"🕯️ {candle} {'(kapandı)' if closed else ''}"),
+        on_trade=lambda price, qty, ts: print(f"💱 {price} x {qty}"),
+    )
+    stream.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stream.stop()
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
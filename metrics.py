@@ -0,0 +1,158 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 50 µs'den ~110 sn'ye 1.5 katlı kova sınırları (saniye)
+DEFAULT_BUCKETS = tuple(0.00005 * 1.5 ** i for i in range(37))
+
+# kısa ad -> (Prometheus metrik adı, etiket adı, açıklama)
+METRIC_FAMILIES = {
+    'stage': ('bot_stage_seconds', 'stage', 'Trading döngüsü aşama süreleri'),
+    'handler': ('bot_telegram_handler_seconds', 'handler', 'Telegram komut/buton işleme süreleri'),
+}
+
+
+class LatencyHistogram:
+    """Sabit kovalı gecikme histogramı; kayıt O(log kova), bellek sabit"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # son kova: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """Kova içinde doğrusal ara değerle tahmini yüzdelik (saniye)"""
+        with self._lock:
+            counts, total, maximum = list(self.counts), self.count, self.max
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for index, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else maximum
+                return min(lower + (upper - lower) * (rank - seen) / count, maximum)
+            seen += count
+        return maximum
+
+    def cumulative(self):
+        """Prometheus için (le, kümülatif sayı) çiftleri"""
+        with self._lock:
+            counts = list(self.counts)
+        total = 0
+        pairs = []
+        for bound, count in zip(self.bounds + [float('inf')], counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+class MetricsRegistry:
+    """Aile + etiket başına gecikme histogramları"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms = {family: {} for family in METRIC_FAMILIES}
+        self._lock = threading.Lock()
+
+    def histogram(self, family, label):
+        series = self.histograms[family]
+        hist = series.get(label)
+        if hist is None:
+            with self._lock:
+                hist = series.setdefault(label, LatencyHistogram(self.buckets))
+        return hist
+
+    def observe(self, family, label, seconds):
+        self.histogram(family, label).observe(seconds)
+
+    @contextmanager
+    def time(self, family, label):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(family, label, time.perf_counter() - started)
+
+    def render_prometheus(self):
+        """Prometheus metin formatı (text/plain; version=0.0.4)"""
+        lines = []
+        for family, (name, label_name, help_text) in METRIC_FAMILIES.items():
+            series = self.histograms[family]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for label, hist in sorted(series.items()):
+                label_value = str(label).replace('\\', '\\\\').replace('"', '\\"')
+                for bound, total in hist.cumulative():
+                    le = '+Inf' if bound == float('inf') else f"{bound:.6g}"
+                    lines.append(f'{name}_bucket{{{label_name}="{label_value}",le="{le}"}} {total}')
+                lines.append(f'{name}_sum{{{label_name}="{label_value}"}} {hist.sum:.9f}')
+                lines.append(f'{name}_count{{{label_name}="{label_value}"}} {hist.count}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self, family):
+        """[(etiket, adet, p50, p95, p99, max)] — süreler milisaniye"""
+        rows = []
+        for label, hist in sorted(self.histograms[family].items()):
+            rows.append((label, hist.count, hist.quantile(0.50) * 1000, hist.quantile(0.95) * 1000,
+                         hist.quantile(0.99) * 1000, hist.max * 1000))
+        return rows
+
+
+class MetricsServer:
+    """Yerel /metrics HTTP uç noktası (Prometheus scrape için)"""
+
+    def __init__(self, registry, host='127.0.0.1', port=9108):
+        self.registry = registry
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry_ref.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True, name='metrics-server')
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
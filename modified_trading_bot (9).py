@@ -1,11 +1,7 @@
-import pandas as pd
 import numpy as np
-import ccxt
-import talib
 import time
 import logging
 import json
-import sqlite3
 from datetime import datetime, timedelta
 import os
 import threading
@@ -13,19 +9,67 @@ import threading
 # Basit requests ile telegram
 import requests
 
+from exchange_pool import ExchangeClientPool
+from history_cache import HistoryCache
+from market_cache import MarketDataCache
+from market_stream import MarketStream
+from metrics import MetricsRegistry, MetricsServer
+from portfolio import PortfolioEngine
+from price_watcher import PriceWatcher
+from resample import MultiTimeframeStore, can_derive
+from rolling_stats import RollingWindowStats
+from scheduler import CandleScheduler, FixedIntervalScheduler
+from signals import BIT as SIGNAL_BIT, missing_for
+from strategies import StrategySet, config_strategies, load_strategy
+from state_snapshot import SnapshotWriter, load_snapshot
+from telegram_dispatcher import TelegramDispatcher
+from trade_journal import TradeJournal
+
 class SimpleTelegramBot:
     def __init__(self, config_file='config.json'):
         # Load configuration
         self.config = self.load_config(config_file)
         
-        # Initialize exchange
-        self.exchange = self.setup_exchange()
+        # Zaman kaynağı (replay modunda sanal saat ile değiştirilir)
+        self.clock = time.time
+        self.sleep = None
+        
+        # Aşama/komut gecikme histogramları (/metrics ve isteğe bağlı HTTP uç noktası)
+        self.metrics = MetricsRegistry()
+        self.metrics_server = None
+        if self.config.get('metrics_port'):
+            try:
+                self.metrics_server = MetricsServer(
+                    self.metrics,
+                    host=self.config.get('metrics_host', '127.0.0.1'),
+                    port=self.config['metrics_port'],
+                ).start()
+                print(f"📊 Metrikler: {self.metrics_server.url}")
+            except OSError as e:
+                print(f"❌ Metrik sunucusu başlatılamadı: {e}")
+        
+        # Initialize exchange (lazy_startup: bağlantı testi arka planda, Telegram beklemez)
+        self.exchange_ready = threading.Event()
+        self.exchange_pool = self.create_exchange_pool()
+        if self.config.get('lazy_startup', True):
+            self.exchange = None
+            threading.Thread(target=self.connect_exchange, daemon=True, name='exchange-connect').start()
+        else:
+            self.connect_exchange()
         
         # Strategy parameters (ORIGINAL SETTINGS)
         self.symbol = self.config.get('symbol', 'BTC/USDT')
         self.timeframe = self.config.get('timeframe', '15m')
         self.donchian_period = self.config.get('donchian_period', 20)
         self.ema_period = self.config.get('ema_period', 200)
+        self.stop_atr_mult = self.config.get('stop_atr_mult', 2.0)
+        self.target_atr_mult = self.config.get('target_atr_mult', 4.0)
+        self.macd_threshold = self.config.get('macd_threshold', 100)
+        
+        # Birlikte çalışan stratejiler (ilki birincil); indikatörleri ortak grafikte bir kez hesaplanır
+        self.strategies = StrategySet([load_strategy(spec) for spec in config_strategies(self.config)])
+        # Mum penceresi ısınmadan türetilir (ör. EMA(300) için 500 yetmez)
+        self.history_limit = self.strategies.history_limit()
         
         # Trading parameters (will be set by user)
         self.trading_capital = 10000
@@ -45,6 +89,40 @@ class SimpleTelegramBot:
         self.take_profit = 0
         self.trades = []
         self.current_market_trend = None
+        # Son değerlendirmenin mum başına koşul maskesi: (zaman damgaları, maske)
+        self.signal_history = None
+        
+        # (symbol, taban dilim) başına mum deposu; üst dilimler tabandan türetilir
+        self.base_timeframe = self.config.get('base_timeframe', '5m')
+        self.market_feeds = {}
+        # Saatlik rapor: son 24 saatlik mum istatistikleri mumlar geldikçe güncellenir
+        self.report_stats = RollingWindowStats(size=24, trend_bars=4)
+        self.indicator_engines = {}
+        self.history_dir = self.config.get('history_dir', 'history')
+        self.history_caches = {}
+        self.data_lock = threading.RLock()
+        
+        # Menü/rapor istekleri için TTL önbelleği (ticker, bakiye, mumlar)
+        self.market_cache = MarketDataCache(self.config.get('cache_ttl'), clock=lambda: self.clock())
+        
+        # Piyasa verisi: 'rest' (60 sn polling) veya 'stream' (WebSocket)
+        self.market_data_mode = self.config.get('market_data_mode', 'rest')
+        self.market_stream = None
+        
+        # Mum içi SL/TP takibi: her aggTrade fiyatında, indikatör hesabından bağımsız
+        self.position_lock = threading.RLock()
+        self.price_watcher = None
+        if self.config.get('intrabar_exits', True):
+            self.price_watcher = PriceWatcher(on_trigger=self.on_protective_trigger)
+        self.price_feeds = {}
+        
+        # Döngü zamanlaması: 'candle_close' (mum kapanışına hizalı) veya 'fixed' (60 sn)
+        self.loop_schedule = self.config.get('loop_schedule', 'candle_close')
+        self.loop_scheduler = None
+        
+        # Portföy modu: config'de birden fazla 'symbols' verilirse
+        self.symbols = self.config.get('symbols', [self.symbol])
+        self.portfolio = None
         
         # Bot state
         self.bot_running = False
@@ -62,6 +140,18 @@ class SimpleTelegramBot:
         # Telegram setup
         self.bot_token = self.config['telegram_bot_token']
         self.chat_id = self.config['telegram_chat_id']
+        self.telegram_poll_timeout = self.config.get('telegram_poll_timeout', 30)
+        self.telegram_request_timeout = self.config.get('telegram_request_timeout', 10)
+        self.telegram_session = self.create_http_session()
+        
+        # Giden mesajlar arka plan kuyruğundan gönderilir (trading thread'i beklemez)
+        self.telegram_dispatcher = None
+        if self.config.get('telegram_async', True):
+            self.telegram_dispatcher = TelegramDispatcher(
+                lambda payload: self.telegram_api('sendMessage', payload),
+                per_chat_interval=self.config.get('telegram_min_interval', 1.0),
+                on_sent=lambda latency: self.metrics.observe('stage', 'telegram_delivery', latency),
+            ).start()
         
         # Database setup
         self.db_path = 'trading_bot.db'
@@ -70,21 +160,57 @@ class SimpleTelegramBot:
         # Logging setup
         self.setup_logging()
         
+        # Çökme sonrası hızlı devam: pozisyon, ayarlar ve indikatör durumu
+        self.snapshot_writer = SnapshotWriter(
+            self.config.get('snapshot_path', 'engine_state.pkl'),
+            interval=self.config.get('snapshot_interval_seconds', 60),
+        )
+        self.restored_portfolio = None
+        self.restore_state()
+        
         self.logger.info("Simple Telegram Bot initialized")
 
+    def now(self):
+        return datetime.fromtimestamp(self.clock())
+
     def load_config(self, config_file):
         with open(config_file, 'r') as f:
             return json.load(f)
 
+    def create_exchange_pool(self):
+        # Spot/futures istemcileri tek havuzdan, ortak rate limit bütçesiyle (ccxt ilk get'te yüklenir)
+        return ExchangeClientPool(
+            self.config,
+            rate_limit=self.config.get('rate_limit_per_second', 20),
+            markets_ttl=self.config.get('markets_refresh_seconds', 3600),
+        )
+
+    @property
+    def exchange(self):
+        """Aktif borsa istemcisi; açılış bağlantısı sürüyorsa bitmesini bekler"""
+        if not self.exchange_ready.is_set():
+            self.exchange_ready.wait(self.config.get('exchange_connect_timeout', 30))
+        return self._exchange
+
+    @exchange.setter
+    def exchange(self, client):
+        self._exchange = client
+
+    def exchange_status(self):
+        """Menü için beklemeyen bağlantı durumu metni"""
+        if not self.exchange_ready.is_set():
+            return '⏳ Bağlanıyor'
+        return '✅ Bağlı' if self._exchange else '❌ Bağlantı Yok'
+
+    def connect_exchange(self):
+        try:
+            self.exchange = self.setup_exchange()
+        finally:
+            self.exchange_ready.set()
+
     def setup_exchange(self):
         try:
-            exchange = ccxt.binance({
-                'apiKey': self.config['api_key'],
-                'secret': self.config['secret'],
-                'sandbox': self.config.get('sandbox', True),
-                'enableRateLimit': True,
-                'options': {'defaultType': 'spot'}
-            })
+            exchange = self.exchange_pool.get('spot')
             
             # Test connection
             balance = exchange.fetch_balance()
@@ -96,29 +222,13 @@ class SimpleTelegramBot:
             return None
 
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS trades (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TEXT,
-                symbol TEXT,
-                side TEXT,
-                amount REAL,
-                price REAL,
-                stop_loss REAL,
-                take_profit REAL,
-                profit REAL,
-                status TEXT,
-                exit_reason TEXT,
-                balance_after REAL,
-                market_trend TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # İşlemler arka planda, toplu transaction'larla yazılır (WAL + indeksler)
+        self.journal = TradeJournal(self.db_path, batch_size=self.config.get('journal_batch_size', 100))
+        self.journal_key = None
+        try:
+            self.trades = self.journal.closed_trades(limit=self.config.get('journal_history_limit', 1000))
+        except Exception as e:
+            print(f"❌ İşlem geçmişi okunamadı: {e}")
 
     def setup_logging(self):
         logging.basicConfig(
@@ -131,8 +241,27 @@ class SimpleTelegramBot:
         )
         self.logger = logging.getLogger(__name__)
 
-    def send_telegram_message(self, message, reply_markup=None):
-        """Basit HTTP ile mesaj gönder"""
+    def create_http_session(self):
+        """Bot API çağrıları için keep-alive bağlantı havuzlu oturum"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=4)
+        session.mount('https://', adapter)
+        return session
+
+    def telegram_api(self, method, payload=None, timeout=None):
+        """Telegram Bot API çağrısı (ortak oturum üzerinden)"""
+        url = f"https://api.telegram.org/bot{self.bot_token}/{method}"
+        response = self.telegram_session.post(
+            url, json=payload or {}, timeout=timeout or self.telegram_request_timeout
+        )
+        return response.json()
+
+    def send_telegram_message(self, message, reply_markup=None, coalesce_key=None):
+        """Mesajı gönder (async modda kuyruğa ekle).
+        
+        Aynı coalesce_key ile kuyrukta bekleyen mesaj varsa yenisiyle değiştirilir.
+        """
+        started = time.perf_counter()
         try:
             # Chat ID kontrolü
             if not self.chat_id or str(self.chat_id).strip() == '':
@@ -140,8 +269,6 @@ class SimpleTelegramBot:
                 print("Config.json'da telegram_chat_id ayarlı mı kontrol edin")
                 return False
             
-            url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
-            
             data = {
                 'chat_id': str(self.chat_id).strip(),
                 'text': message,
@@ -151,8 +278,10 @@ class SimpleTelegramBot:
             if reply_markup:
                 data['reply_markup'] = json.dumps(reply_markup)
             
-            response = requests.post(url, json=data)
-            result = response.json()
+            if self.telegram_dispatcher is not None:
+                return self.telegram_dispatcher.enqueue(data['chat_id'], data, coalesce_key)
+            
+            result = self.telegram_api('sendMessage', data)
             
             if result['ok']:
                 print(f"✅ Mesaj gönderildi (Chat ID: {self.chat_id})")
@@ -164,23 +293,34 @@ class SimpleTelegramBot:
         except Exception as e:
             print(f"❌ Telegram gönderme hatası: {e}")
             return False
+        finally:
+            self.metrics.observe('stage', 'notify', time.perf_counter() - started)
 
     def get_telegram_updates(self):
-        """Telegram güncellemelerini al"""
+        """Telegram güncellemelerini long polling ile al"""
         try:
-            url = f"https://api.telegram.org/bot{self.bot_token}/getUpdates"
-            params = {'offset': self.last_update_id + 1}
+            params = {
+                'offset': self.last_update_id + 1,
+                'timeout': self.telegram_poll_timeout,
+                'allowed_updates': ['message', 'callback_query']
+            }
             
-            response = requests.get(url, params=params)
-            result = response.json()
+            # Sunucu en fazla poll_timeout kadar bekletir, üstüne ağ payı
+            result = self.telegram_api(
+                'getUpdates', params,
+                timeout=self.telegram_poll_timeout + self.telegram_request_timeout
+            )
             
             if result['ok']:
                 return result['result']
             else:
+                self.logger.error(f"Telegram güncelleme hatası: {result}")
+                time.sleep(1)
                 return []
                 
         except Exception as e:
             self.logger.error(f"Telegram güncelleme hatası: {e}")
+            time.sleep(1)
             return []
 
     def create_keyboard(self, buttons):
@@ -221,6 +361,10 @@ class SimpleTelegramBot:
             self.start_trading()
         elif text == '/trading stop' or text_lower == 'trading stop':
             self.stop_trading()
+        elif text == '/metrics' or text_lower == 'metrics':
+            self.send_metrics()
+        elif text == '/signals' or text_lower == 'signals':
+            self.send_signal_history()
         elif text.startswith('/'):
             self.send_help()
 
@@ -305,25 +449,22 @@ class SimpleTelegramBot:
             }
             self.trading_mode = mode_map[self.setup_data['trading_mode']]
             
-            # Exchange'i yeniden ayarla
+            # Exchange'i yeniden ayarla (havuzdaki hazır istemci)
             if self.exchange_type == 'futures':
                 try:
-                    self.exchange = ccxt.binance({
-                        'apiKey': self.config['api_key'],
-                        'secret': self.config['secret'],
-                        'sandbox': self.config.get('sandbox', True),
-                        'enableRateLimit': True,
-                        'options': {'defaultType': 'future'}
-                    })
+                    self.exchange = self.exchange_pool.get('futures')
                     print(f"✅ Futures exchange ayarlandı")
                 except Exception as e:
                     print(f"❌ Futures exchange ayarlanamadı: {e}")
                     self.send_telegram_message("❌ Futures exchange ayarlanamadı! Spot modunda devam edilecek.")
                     self.exchange_type = 'spot'
+            if self.exchange_type == 'spot':
+                self.exchange = self.exchange_pool.get('spot')
             
             # Trading'i başlat
             self.bot_running = True
             threading.Thread(target=self.trading_loop, daemon=True).start()
+            self.save_state(force=True)
             
             timeframe_display = {
                 '15m': '📊 15 Dakika',
@@ -409,9 +550,11 @@ class SimpleTelegramBot:
         elif data == 'setup_spot':
             self.setup_data['exchange_type'] = 'spot'
             self.setup_data['leverage'] = 1
+            self.start_prewarm()
             self.send_trading_setup_step4_capital('spot', 1)
         elif data == 'setup_futures':
             self.setup_data['exchange_type'] = 'futures'
+            self.start_prewarm()
             self.send_trading_setup_step3_leverage()
         
         # Sermaye seçimi
@@ -469,6 +612,19 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 self.setup_data['leverage']
             )
 
+    def get_ticker(self, symbol=None):
+        """Önbellekli ticker (Yenile butonları borsaya gitmeden cevaplanır)"""
+        symbol = symbol or self.symbol
+        exchange = self.exchange
+        return self.market_cache.get('ticker', (self.exchange_type, symbol),
+                                     lambda: exchange.fetch_ticker(symbol))
+
+    def get_balance(self, exchange_type=None):
+        """Önbellekli cüzdan bakiyesi"""
+        exchange_type = exchange_type or self.exchange_type
+        return self.market_cache.get('balance', exchange_type,
+                                     lambda: self.exchange_pool.fetch_balance(exchange_type))
+
     def send_start_menu(self):
         """Ana menüyü gönder"""
         keyboard = self.create_keyboard([
@@ -489,7 +645,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
 
 📊 <b>Durum:</b>
 • Bot: {'🟢 Çalışıyor' if self.bot_running else '🔴 Durdu'}
-• Exchange: {'✅ Bağlı' if self.exchange else '❌ Bağlantı Yok'}
+• Exchange: {self.exchange_status()}
 • Pozisyon: {self.position or '❌ Yok'}
 
 💰 <b>Sermaye:</b> ${self.balance:,.2f}
@@ -515,7 +671,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 self.send_telegram_message("❌ Exchange bağlantısı yok!")
                 return
             
-            ticker = self.exchange.fetch_ticker(self.symbol)
+            ticker = self.get_ticker()
             
             price_change = ticker['change']
             price_change_pct = ticker['percentage']
@@ -549,7 +705,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 ]
             ])
             
-            self.send_telegram_message(message, keyboard)
+            self.send_telegram_message(message, keyboard, coalesce_key='price')
             
         except Exception as e:
             self.send_telegram_message(f"❌ Fiyat alınamadı: {e}")
@@ -561,21 +717,31 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 self.send_telegram_message("❌ Exchange bağlantısı yok!")
                 return
             
-            ticker = self.exchange.fetch_ticker(self.symbol)
-            current_price = ticker['last']
-            
-            ohlcv_24h = self.exchange.fetch_ohlcv(self.symbol, '1h', limit=24)
-            df_24h = pd.DataFrame(ohlcv_24h, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            # İstatistikleri trading döngüsü/akış besler; döngü yoksa başka kaynak yok
+            if not self.bot_running and self.report_stats_stale():
+                self.refresh_report_stats()
             
-            last_hour = df_24h.iloc[-1]
-            prev_hour = df_24h.iloc[-2] if len(df_24h) > 1 else last_hour
-            
-            hourly_change = last_hour['close'] - prev_hour['close']
-            hourly_change_pct = (hourly_change / prev_hour['close']) * 100
+            with self.data_lock:
+                stats = self.report_stats.snapshot()
+            if not stats['count']:
+                self.send_telegram_message("❌ Rapor için henüz mum verisi yok")
+                return
             
-            if len(df_24h) >= 4:
-                recent_prices = df_24h.tail(4)['close'].tolist()
-                trend = self.analyze_trend(recent_prices)
+            # Fiyat 5 sn'lik ticker önbelleğinden canlı; mumlar sadece 24s penceresi için
+            current_price = self.get_ticker(self.symbol)['last']
+            closes = stats['recent_closes']
+            if stats['last_timestamp'] >= self.clock() // 3600 * 3600 * 1000:
+                # Son mum bu saatin mumu: referans önceki saatin kapanışı
+                prev_close, closes = stats['prev_close'], closes[:-1]
+            else:
+                prev_close = stats['last_close']
+            closes = closes[-(self.report_stats.trend_bars - 1):] + [current_price]
+            hourly_change = current_price - prev_close
+            hourly_change_pct = hourly_change / prev_close * 100
+            high, low = max(stats['high'], current_price), min(stats['low'], current_price)
+            
+            if len(closes) >= self.report_stats.trend_bars:
+                trend = self.analyze_trend(closes)
             else:
                 trend = "Yetersiz veri"
             
@@ -625,9 +791,9 @@ Not: Mesajınızı sadece sayı olarak yazın.
 {trend_emoji} ${hourly_change:+,.2f} ({hourly_change_pct:+.2f}%)
 
 📊 <b>24 Saat Özeti:</b>
-📈 En Yüksek: ${df_24h['high'].max():,.2f}
-📉 En Düşük: ${df_24h['low'].min():,.2f}
-📊 Ortalama: ${df_24h['close'].mean():,.2f}
+📈 En Yüksek: ${high:,.2f}
+📉 En Düşük: ${low:,.2f}
+📊 Ortalama: ${stats['mean']:,.2f}
 
 🎯 <b>Trend (4h):</b> {trend}{position_info}
 
@@ -636,7 +802,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
 • Strateji: Donchian+EMA+MACD
 • Bakiye: ${self.balance:,.2f}
 
-⏰ <b>Rapor Zamanı:</b> {datetime.now().strftime('%d.%m.%Y %H:%M')}
+⏰ <b>Rapor Zamanı:</b> {self.now().strftime('%d.%m.%Y %H:%M')}
             """
             
             keyboard = self.create_keyboard([
@@ -646,7 +812,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 ]
             ])
             
-            self.send_telegram_message(message, keyboard)
+            self.send_telegram_message(message, keyboard, coalesce_key='hourly_report')
             
         except Exception as e:
             self.send_telegram_message(f"❌ Saatlik rapor hatası: {e}")
@@ -655,10 +821,15 @@ Not: Mesajınızı sadece sayı olarak yazın.
         """Bot durumunu gönder"""
         try:
             if self.exchange:
-                balance = self.exchange.fetch_balance()
+                # Bakiye ve mum isteği birbirini beklemeden paralel gider
+                balance, df = self.exchange.gather(self.get_balance,
+                                                   lambda: self.fetch_recent_data(limit=10))
+                if isinstance(balance, Exception):
+                    raise balance
                 usdt_balance = balance['USDT']['free']
+                if isinstance(df, Exception):
+                    df = None
                 
-                df = self.fetch_recent_data(limit=10)
                 current_price = df.iloc[-1]['close'] if df is not None else "N/A"
             else:
                 current_price = "N/A"
@@ -679,6 +850,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
 {f'💰 Giriş: ${self.entry_price:.2f}' if self.position else ''}
 {f'🛑 SL: ${self.stop_loss:.2f}' if self.position else ''}
 {f'🎯 TP: ${self.take_profit:.2f}' if self.position else ''}
+{self.portfolio.describe() if self.portfolio else ''}
 
 📊 <b>İstatistikler:</b>
 🔢 Toplam İşlem: {total_trades}
@@ -702,7 +874,7 @@ Not: Mesajınızı sadece sayı olarak yazın.
                 ]
             ])
             
-            self.send_telegram_message(message, keyboard)
+            self.send_telegram_message(message, keyboard, coalesce_key='status')
             
         except Exception as e:
             self.send_telegram_message(f"❌ Durum alınamadı: {e}")
@@ -855,23 +1027,9 @@ Minimum: 1x, Maksimum: 125x
         """Step 4: Sermaye miktarı gir (Binance bakiyesinden kontrol)"""
         try:
             # Binance'dan bakiye bilgilerini al
-            if exchange_type == 'spot':
-                # Spot bakiyesi
-                balance_info = self.exchange.fetch_balance()
-                usdt_balance = balance_info['USDT']['free']
-                wallet_type = "Spot Cüzdan"
-            else:
-                # Futures bakiyesi için exchange'i geçici olarak futures'a çevir
-                temp_exchange = ccxt.binance({
-                    'apiKey': self.config['api_key'],
-                    'secret': self.config['secret'],
-                    'sandbox': self.config.get('sandbox', True),
-                    'enableRateLimit': True,
-                    'options': {'defaultType': 'future'}
-                })
-                balance_info = temp_exchange.fetch_balance()
-                usdt_balance = balance_info['USDT']['free']
-                wallet_type = "Futures Cüzdan"
+            balance_info = self.get_balance(exchange_type)
+            usdt_balance = balance_info['USDT']['free']
+            wallet_type = "Spot Cüzdan" if exchange_type == 'spot' else "Futures Cüzdan"
             
             # Bakiye yoksa uyarı ver
             if usdt_balance <= 0:
@@ -1064,6 +1222,9 @@ Not: Sadece sayı yazın, $ işareti koymayın
     def stop_trading(self):
         """Trading durdur"""
         self.bot_running = False
+        if self.loop_scheduler:
+            self.loop_scheduler.stop()
+        self.save_state(force=True)
         self.send_telegram_message("⏹️ Trading durduruldu!")
 
     def send_help(self):
@@ -1076,6 +1237,8 @@ Not: Sadece sayı yazın, $ işareti koymayın
 • /price - Anlık BTC fiyatı
 • /report - Saatlik detaylı rapor
 • /status - Bot durumu
+• /metrics - Gecikme istatistikleri (p50/p95/p99)
+• /signals - Son mumlarda giriş koşulları
 
 🎮 <b>Trading Komutları:</b>
 • /trading start - Trading başlat
@@ -1087,38 +1250,84 @@ Not: Sadece sayı yazın, $ işareti koymayın
         
         self.send_telegram_message(message)
 
+    # Metrik etiketi olarak kullanılan komutlar (serbest metin etiket sayısını şişirmesin)
+    HANDLER_COMMANDS = ('/start', '/status', '/price', '/report', '/trading', '/metrics', '/signals')
+
+    def handler_label(self, text):
+        command = text.strip().lower().split(' ')[0] if text.strip() else ''
+        if not command.startswith('/'):
+            command = '/' + command
+        if command in self.HANDLER_COMMANDS:
+            return command
+        return 'input' if self.waiting_for_input else 'other'
+
+    # Buton etiketleri: sabit butonlar kendi adıyla, değer taşıyanlar (sermaye, dilim...) önekleriyle
+    HANDLER_CALLBACKS = ('current_price', 'hourly_report', 'show_status', 'start_trading', 'stop_trading',
+                         'setup_spot', 'setup_futures', 'confirm_and_start', 'restart_setup', 'back_to_menu')
+    HANDLER_CALLBACK_PREFIXES = ('timeframe_', 'capital_', 'mode_', 'back_step')
+
+    def callback_label(self, data):
+        if data in self.HANDLER_CALLBACKS:
+            return data
+        for prefix in self.HANDLER_CALLBACK_PREFIXES:
+            if data.startswith(prefix):
+                return prefix.rstrip('_') + '*'
+        return 'callback'
+
+    def send_metrics(self):
+        """Aşama ve komut gecikmelerini p50/p95/p99 olarak gönder"""
+        sections = [('⚙️ <b>Trading aşamaları</b>', 'stage'), ('💬 <b>Telegram komutları</b>', 'handler')]
+        lines = ["📊 <b>Gecikme Metrikleri</b> (ms)", ""]
+        for title, family in sections:
+            rows = self.metrics.summary(family)
+            lines.append(title)
+            if not rows:
+                lines.append("• Henüz ölçüm yok")
+            for label, count, p50, p95, p99, _ in rows:
+                lines.append(f"• <code>{label}</code> n={count} | p50 {p50:.1f} | p95 {p95:.1f} | p99 {p99:.1f}")
+            lines.append("")
+        if self.metrics_server is not None:
+            lines.append(f"🔗 {self.metrics_server.url}")
+        
+        self.send_telegram_message('\n'.join(lines), coalesce_key='metrics')
+
+    def send_signal_history(self, limit=None):
+        """Son mumlarda giriş olup olmadığını ve eksik kalan koşulları gönder"""
+        limit = limit or self.config.get('signal_history_limit', 8)
+        states = list(self.portfolio.states.values()) if self.portfolio is not None else [self]
+        lines = ["🔎 <b>Giriş Koşulları</b>", ""]
+        for state in states:
+            lines.append(f"🪙 <b>{state.symbol}</b>")
+            if state.signal_history is None:
+                lines.append("• Henüz değerlendirme yok")
+            else:
+                timestamps, mask = state.signal_history
+                for ts, value in zip(timestamps[-limit:], mask[-limit:]):
+                    value = int(value)
+                    if value & SIGNAL_BIT['long'] or value & SIGNAL_BIT['short']:
+                        side = 'LONG' if value & SIGNAL_BIT['long'] else 'SHORT'
+                        lines.append(f"• {ts.strftime('%d.%m %H:%M')} ✅ {side}")
+                    else:
+                        side = self.trading_mode if self.trading_mode != 'both' else (
+                            'long' if value & SIGNAL_BIT['above_ema'] else 'short')
+                        missing = ', '.join(missing_for(value, side))
+                        lines.append(f"• {ts.strftime('%d.%m %H:%M')} ❌ {side}: {missing}")
+            lines.append("")
+        
+        self.send_telegram_message('\n'.join(lines), coalesce_key='signals')
+
     def get_wallet_balance(self, exchange_type='spot'):
         """Belirtilen cüzdan tipinden USDT bakiyesini al"""
         try:
-            if exchange_type == 'spot':
-                # Mevcut exchange spot olmalı
-                if self.exchange.options.get('defaultType') != 'spot':
-                    temp_exchange = ccxt.binance({
-                        'apiKey': self.config['api_key'],
-                        'secret': self.config['secret'],
-                        'sandbox': self.config.get('sandbox', True),
-                        'enableRateLimit': True,
-                        'options': {'defaultType': 'spot'}
-                    })
-                    balance_info = temp_exchange.fetch_balance()
-                else:
-                    balance_info = self.exchange.fetch_balance()
-            else:
-                # Futures için geçici exchange oluştur
-                temp_exchange = ccxt.binance({
-                    'apiKey': self.config['api_key'],
-                    'secret': self.config['secret'],
-                    'sandbox': self.config.get('sandbox', True),
-                    'enableRateLimit': True,
-                    'options': {'defaultType': 'future'}
-                })
-                balance_info = temp_exchange.fetch_balance()
+            balance_info = self.get_balance(exchange_type)
             
             return balance_info['USDT']['free']
             
         except Exception as e:
             self.logger.error(f"Bakiye alınamadı ({exchange_type}): {e}")
             return 0
+
+    def analyze_trend(self, prices):
         """Trend analizi"""
         if len(prices) < 3:
             return "Yetersiz veri"
@@ -1136,99 +1345,259 @@ Not: Sadece sayı yazın, $ işareti koymayın
             return "➡️ Yatay Seyir"
 
     # ORIGINAL STRATEGY METHODS (aynı)
-    def fetch_recent_data(self, limit=500):
+    def feed_base_timeframe(self, timeframe):
+        """Zaman diliminin türetileceği taban dilim (türetilemiyorsa kendisi)"""
+        if can_derive(self.base_timeframe, timeframe):
+            return self.base_timeframe
+        return timeframe
+
+    def market_type(self, exchange_type=None):
+        """Havuz/önbellek piyasa anahtarı: 'spot' veya 'futures'"""
+        return 'futures' if (exchange_type or self.exchange_type) == 'futures' else 'spot'
+
+    def get_market_feed(self, symbol, timeframe, market=None):
+        """`timeframe` mumlarını sağlayan (piyasa, symbol, taban dilim) deposu"""
+        key = (market or self.market_type(), symbol, self.feed_base_timeframe(timeframe))
+        with self.data_lock:
+            feed = self.market_feeds.get(key)
+            if feed is None:
+                feed = MultiTimeframeStore(symbol, key[2], capacity=self.history_limit, market=key[0])
+                if symbol == self.symbol and can_derive(key[2], '1h'):
+                    feed.store('1h')  # saatlik rapor istatistikleri
+                self.market_feeds[key] = feed
+        return feed
+
+    def update_report_stats(self, feed):
+        """Rapor paritesinin yeni 1h mumlarını kayan istatistiklere işle (mum başına O(1))"""
+        if feed.symbol != self.symbol or feed.market != self.market_type() or '1h' not in feed.timeframes():
+            return
+        store = feed.store('1h')
+        if not len(store):
+            return
+        stats = self.report_stats
+        rows = store.view(limit=2)
+        last_ts = stats.last_timestamp()
+        if last_ts is None or rows[0, 0] > last_ts:
+            # İlk doldurma veya kaçırılan mumlar: pencereyi depodan yeniden kur
+            stats.reset()
+            rows = store.view(limit=stats.size)
+        stats.update_many(rows)
+
+    def report_stats_stale(self):
+        """Rapor istatistikleri içinde bulunulan saatin mumunu henüz görmedi mi"""
+        with self.data_lock:
+            last_ts = self.report_stats.last_timestamp()
+        hour_start_ms = self.clock() // 3600 * 3600 * 1000
+        return last_ts is None or last_ts < hour_start_ms
+
+    def refresh_report_stats(self):
+        """Rapor paritesinin taban serisini gerekirse tek artımlı istekle güncelle"""
+        if not self.report_stats_stale():
+            return
         try:
-            ohlcv = self.exchange.fetch_ohlcv(self.symbol, self.timeframe, limit=limit)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
-            return df
+            self.sync_market_feed(self.get_market_feed(self.symbol, '1h'), '1h', self.report_stats.size)
+        except Exception as e:
+            self.logger.error(f"Rapor istatistikleri güncellenemedi: {e}")
+
+    def get_candle_store(self, symbol, timeframe, capacity=500):
+        """(symbol, timeframe) için mum deposunu al (taban akıştan türetilmiş)"""
+        with self.data_lock:
+            return self.get_market_feed(symbol, timeframe).store(timeframe, capacity=capacity)
+
+    def get_history_cache(self, symbol, timeframe, market='spot'):
+        """(symbol, timeframe, piyasa) için diskteki geçmiş mum önbelleği"""
+        key = (market, symbol, timeframe)
+        if key not in self.history_caches:
+            self.history_caches[key] = HistoryCache(symbol, timeframe, self.history_dir, market=market)
+        return self.history_caches[key]
+
+    def sync_market_feed(self, feed, timeframe, limit=None):
+        """Taban seriyi tek istekle güncelle; `timeframe` deposunu döndür.
+        
+        Türetilmiş dilimde taban penceresinden eski geçmiş eksikse (ör. 1d
+        EMA200 ısınması) bir kez diskten/borsadan eklenir.
+        """
+        # Depo hangi piyasanınsa o piyasanın istemcisi (aktif istemci değişmiş olabilir)
+        exchange = self.exchange_pool.get(feed.market)
+        limit = limit or self.history_limit
+        with self.data_lock:
+            store = feed.store(timeframe, capacity=limit)
+            cache = self.get_history_cache(feed.symbol, feed.base_timeframe, feed.market) if self.history_dir else None
+            warmup = feed.base.capacity if cache is not None and len(feed) == 0 else 0
+        
+        if warmup:
+            # Isınma verisi önce diskten, sadece eksik mumlar borsadan; indirme kilit dışında
+            try:
+                cache.ensure(exchange, warmup)
+            except Exception as e:
+                self.logger.error(f"Geçmiş önbelleği güncellenemedi: {e}")
+            history = cache.load(limit=warmup)
+            with self.data_lock:
+                if len(feed) == 0:
+                    feed.update(history)
+        
+        with self.data_lock:
+            request = feed.next_request(now_ms=int(self.clock() * 1000))
+        
+        # Ağ isteği kilit dışında: aynı anda gelen özdeş istekler gateway'de birleşir
+        ohlcv = exchange.fetch_ohlcv(feed.symbol, feed.base_timeframe, **request)
+        
+        with self.data_lock:
+            changed = feed.apply(request, ohlcv)
+            if cache is not None and changed:
+                cache.append(feed.base.view(limit=changed + 1))
+            self.update_report_stats(feed)
+            backfill = feed.needs_backfill(timeframe, limit)
+        
+        if backfill:
+            history = self.load_history(feed.symbol, timeframe, limit, feed.market)
+            with self.data_lock:
+                added = feed.backfill(timeframe, history)
+            self.logger.info(f"{feed.symbol} {timeframe}: {added} eski mum eklendi")
+        return store
+
+    def load_history(self, symbol, timeframe, limit, market='spot'):
+        """Taban penceresinden eski mumlar: önce disk önbelleği, yoksa tek REST isteği"""
+        exchange = self.exchange_pool.get(market)
+        if self.history_dir:
+            cache = self.get_history_cache(symbol, timeframe, market)
+            try:
+                cache.ensure(exchange, limit)
+            except Exception as e:
+                self.logger.error(f"Geçmiş önbelleği güncellenemedi: {e}")
+            return cache.load(limit=limit)
+        return exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+
+    def fetch_recent_data(self, limit=None):
+        limit = limit or self.history_limit
+        try:
+            feed = self.get_market_feed(self.symbol, self.timeframe)
+            store = self.sync_market_feed(feed, self.timeframe, limit)
+            with self.data_lock:
+                return store.to_dataframe(limit=limit)
         except Exception as e:
             self.logger.error(f"Error fetching data: {e}")
             return None
 
-    def calculate_indicators(self, df):
+    def get_candles(self, symbol, timeframe, limit):
+        """Taban akıştan türetilmiş son `limit` mum, (n, 6) dizi"""
+        feed = self.get_market_feed(symbol, timeframe)
+        store = self.sync_market_feed(feed, timeframe, limit)
+        with self.data_lock:
+            return store.view(limit).copy()
+
+    def prewarm_timeframe(self, timeframe, market):
+        """Kurulumda seçilen dilim ve piyasayı arka planda hazırla (başlatınca soğuk yükleme olmasın)"""
         try:
-            df['ema200'] = talib.EMA(df['close'], timeperiod=self.ema_period)
-            df['atr'] = talib.ATR(df['high'], df['low'], df['close'], timeperiod=14)
-            df['upper_band'] = df['high'].rolling(window=self.donchian_period).max()
-            df['lower_band'] = df['low'].rolling(window=self.donchian_period).min()
-            df['middle_band'] = (df['upper_band'] + df['lower_band']) / 2
-            df['band_distance'] = df['upper_band'] - df['lower_band']
-            df['band_distance_vs_atr'] = df['band_distance'] / (df['atr'] * 4)
-            df['macd'], df['macd_signal'], df['macd_hist'] = talib.MACD(
-                df['close'], fastperiod=12, slowperiod=26, signalperiod=9
-            )
-            df.dropna(inplace=True)
+            self.sync_market_feed(self.get_market_feed(self.symbol, timeframe, market), timeframe)
+        except Exception as e:
+            self.logger.error(f"{timeframe} verisi hazırlanamadı: {e}")
+
+    def start_prewarm(self):
+        """Dilim ve piyasa seçildikten sonra ısınma verisini arka planda çek"""
+        if not self.exchange_ready.is_set() or self.exchange is None:
+            return
+        timeframe = self.setup_data.get('timeframe')
+        if timeframe:
+            market = self.market_type(self.setup_data['exchange_type'])
+            threading.Thread(target=self.prewarm_timeframe, args=(timeframe, market), daemon=True).start()
+
+    def get_indicator_engine(self, symbol, timeframe, capacity=500):
+        """(symbol, timeframe) için tüm stratejilerin ortak artımlı indikatör grafiği"""
+        key = (symbol, timeframe, self.strategies.signature)
+        engine = self.indicator_engines.get(key)
+        if engine is None or engine.capacity < capacity:
+            engine = self.strategies.graph(capacity=capacity)
+            self.indicator_engines[key] = engine
+        return engine
+
+    def calculate_indicators(self, df, symbol=None):
+        try:
+            timestamps = df.index.as_unit('ms').asi8
+            ohlcv = np.column_stack([timestamps, df[['open', 'high', 'low', 'close', 'volume']].to_numpy()])
+            
+            # Motor anlık görüntüye girer: güncelleme save_state ile aynı kilit altında
+            with self.data_lock:
+                engine = self.get_indicator_engine(symbol or self.symbol, self.timeframe, capacity=max(len(df), self.history_limit))
+                last_ts = engine.last_timestamp()
+                if last_ts is not None and last_ts > timestamps[-1]:
+                    # Çıkış kontrolü oluşan mumu zaten işledi; giriş turunun kapanmış
+                    # mumları kesinleşmiş satırlardır, bekleyen mum geri sarılmaz
+                    values = engine.view_until(timestamps[-1], len(df))
+                else:
+                    # Sadece bekleyen mum ve sonrası işlenir (mum başına O(1))
+                    engine.update_many(ohlcv)
+                    values = engine.view(len(df))
+                if len(values) == 0 or values[-1, 0] != timestamps[-1]:
+                    engine.reset()
+                    engine.update_many(ohlcv)
+                    values = engine.view(len(df))
+                
+                names = self.strategies.frame_columns(engine)
+                columns = np.full((len(df), len(names)), np.nan)
+                columns[len(df) - len(values):] = values[:, 1:]
+            # Isınma satırları atılmaz: her strateji kendi kolonlarına göre susturulur
+            for i, name in enumerate(names):
+                df[name] = columns[:, i]
             return df
         except Exception as e:
             self.logger.error(f"Error calculating indicators: {e}")
             return None
 
     def check_entry_conditions(self, df):
-        if len(df) < 2:
-            return {'long': False, 'short': False, 'market_trend': 'unknown'}
-        
-        current = df.iloc[-1]
-        prev = df.iloc[-2]
-        
-        above_ema = (current['close'] > current['ema200'] and current['open'] > current['ema200'])
-        below_ema = (current['close'] < current['ema200'] and current['open'] < current['ema200'])
-        
-        donchian_long = current['high'] >= current['upper_band']
-        donchian_short = current['low'] <= current['lower_band']
-        
-        long_candle_condition = ((prev['high'] - prev['close']) < ((prev['close'] - prev['open']) / 2) or 
-                                (prev['high'] - prev['close']) < 3)
-        short_candle_condition = ((prev['close'] - prev['low']) < ((prev['open'] - prev['close']) / 2) or 
-                                 (prev['close'] - prev['low']) < 3)
-        
-        macd_long = current['macd'] > 100 and current['macd_hist'] > 0
-        macd_short = current['macd'] < -100 and current['macd_hist'] < 0
-        
-        donchian_band_placement = True
-        if above_ema and current['upper_band'] < current['ema200']:
-            donchian_band_placement = False
-        if below_ema and current['lower_band'] > current['ema200']:
-            donchian_band_placement = False
-        
-        sufficient_band_distance = current['band_distance_vs_atr'] > 1.0
-        
-        long_signal = (above_ema and donchian_long and long_candle_condition and 
-                      macd_long and donchian_band_placement and sufficient_band_distance)
-        
-        short_signal = (below_ema and donchian_short and short_candle_condition and 
-                       macd_short and donchian_band_placement and sufficient_band_distance)
-        
-        if self.trading_mode == 'long':
-            short_signal = False
-        elif self.trading_mode == 'short':
-            long_signal = False
-        
-        market_trend = 'up' if above_ema else 'down'
-        
-        return {'long': long_signal, 'short': short_signal, 'market_trend': market_trend}
+        """Tüm stratejilerin giriş koşullarını pencere boyunca değerlendir; karar son mumdan.
 
-    def check_exit_conditions(self, df):
-        if not self.position or len(df) < 2:
+        'mask' birincil stratejinin mum başına koşul maskesidir (bkz. signals.CONDITIONS).
+        Birden çok strateji sinyal verirse config sırasında ilki ('strategy') seçilir.
+        """
+        if len(df) < 2:
+            return {'long': False, 'short': False, 'market_trend': 'unknown', 'mask': None, 'strategy': None}
+        
+        # Tek to_numpy() sütun seçiminden (df[[...]]) çok daha ucuz
+        values = df.to_numpy(dtype=np.float64)
+        col = {name: values[:, i] for i, name in enumerate(df.columns)}
+        results = self.strategies.evaluate(col, trading_mode=self.trading_mode)
+        
+        # Isınması bitmemiş mumlarda StrategySet.evaluate maskeyi sıfırlar
+        mask = results[0][1]
+        current = int(mask[-1])
+        signal = {
+            'long': False,
+            'short': False,
+            'market_trend': 'up' if current & SIGNAL_BIT['above_ema'] else 'down',
+            'mask': mask,
+            'strategy': None,
+        }
+        for strategy, strategy_mask in results:
+            last = int(strategy_mask[-1])
+            if last & (SIGNAL_BIT['long'] | SIGNAL_BIT['short']):
+                signal['long'] = bool(last & SIGNAL_BIT['long'])
+                signal['short'] = bool(last & SIGNAL_BIT['short'])
+                signal['strategy'] = strategy.name
+                break
+        return signal
+
+    def check_exit_conditions(self, df, state=None):
+        state = state or self
+        if not state.position or len(df) < 2:
             return None, None
         
         current = df.iloc[-1]
         prev = df.iloc[-2]
         
-        if self.position == 'long':
-            if current['low'] <= self.stop_loss:
-                return 'stop_loss', self.stop_loss
-            elif current['high'] >= self.take_profit:
-                return 'take_profit', self.take_profit
+        if state.position == 'long':
+            if current['low'] <= state.stop_loss:
+                return 'stop_loss', state.stop_loss
+            elif current['high'] >= state.take_profit:
+                return 'take_profit', state.take_profit
             elif current['atr'] > prev['atr'] * 1.5 and current['close'] < prev['close']:
                 return 'cvd_exit', current['close']
         
-        elif self.position == 'short':
-            if current['high'] >= self.stop_loss:
-                return 'stop_loss', self.stop_loss
-            elif current['low'] <= self.take_profit:
-                return 'take_profit', self.take_profit
+        elif state.position == 'short':
+            if current['high'] >= state.stop_loss:
+                return 'stop_loss', state.stop_loss
+            elif current['low'] <= state.take_profit:
+                return 'take_profit', state.take_profit
             elif current['atr'] > prev['atr'] * 1.5 and current['close'] > prev['close']:
                 return 'cvd_exit', current['close']
         
@@ -1244,18 +1613,19 @@ Not: Sadece sayı yazın, $ işareti koymayın
             self.logger.error(f"Error calculating position size: {e}")
             return 0
 
-    def enter_position(self, side, df):
+    def enter_position(self, side, df, state=None):
+        state = state or self
         try:
             current = df.iloc[-1]
             
             atr_value = current['atr']
             if side == 'buy':
-                stop_loss = current['close'] - (atr_value * 2)
-                take_profit = current['close'] + (atr_value * 4)
+                stop_loss = current['close'] - (atr_value * self.stop_atr_mult)
+                take_profit = current['close'] + (atr_value * self.target_atr_mult)
                 position_type = 'long'
             else:
-                stop_loss = current['close'] + (atr_value * 2)
-                take_profit = current['close'] - (atr_value * 4)
+                stop_loss = current['close'] + (atr_value * self.stop_atr_mult)
+                take_profit = current['close'] - (atr_value * self.target_atr_mult)
                 position_type = 'short'
             
             position_size = self.calculate_position_size(current['close'], stop_loss)
@@ -1263,27 +1633,35 @@ Not: Sadece sayı yazın, $ işareti koymayın
             if position_size <= 0:
                 return False
             
-            self.position = position_type
-            self.position_size = position_size
-            self.entry_price = current['close']
-            self.stop_loss = stop_loss
-            self.take_profit = take_profit
+            # Pozisyon alanları birlikte değişir: anlık görüntü yarım pozisyon görmesin
+            with self.position_lock:
+                state.position = position_type
+                state.position_size = position_size
+                state.entry_price = current['close']
+                state.stop_loss = stop_loss
+                state.take_profit = take_profit
+                state.journal_key = self.journal.record_entry(
+                    state.symbol, position_type, position_size, state.entry_price,
+                    stop_loss, take_profit, market_trend=state.current_market_trend, timestamp=self.now())
+                self.watch_position(state)
+                self.save_state(force=True)
             
             message = f"""
 🚀 <b>POZİSYON AÇILDI!</b>
 
+🪙 <b>Parite:</b> {state.symbol}
 📈 <b>Yön:</b> {position_type.upper()}
-💰 <b>Fiyat:</b> ${self.entry_price:,.2f}
-📊 <b>Miktar:</b> {position_size:.6f} BTC
+💰 <b>Fiyat:</b> ${state.entry_price:,.2f}
+📊 <b>Miktar:</b> {position_size:.6f} {state.symbol.split('/')[0]}
 
 🎯 <b>Seviyeler:</b>
-🛑 Stop Loss: ${self.stop_loss:,.2f}
-🏆 Take Profit: ${self.take_profit:,.2f}
+🛑 Stop Loss: ${state.stop_loss:,.2f}
+🏆 Take Profit: ${state.take_profit:,.2f}
 
 📊 <b>Risk:</b> ${self.balance * self.risk_per_trade:.2f} (%2)
-📈 <b>Trend:</b> {self.current_market_trend}
+📈 <b>Trend:</b> {state.current_market_trend}
 
-⏰ {datetime.now().strftime('%H:%M:%S')}
+⏰ {self.now().strftime('%H:%M:%S')}
             """
             
             self.send_telegram_message(message)
@@ -1293,33 +1671,55 @@ Not: Sadece sayı yazın, $ işareti koymayın
             self.logger.error(f"Error entering position: {e}")
             return False
 
-    def exit_position(self, exit_reason, exit_price=None):
-        try:
-            if not self.position:
-                return False
-            
-            actual_exit_price = exit_price or self.entry_price
-            
-            if self.position == 'long':
-                profit = (actual_exit_price - self.entry_price) * self.position_size
-            else:
-                profit = (self.entry_price - actual_exit_price) * self.position_size
-            
-            self.balance += profit
-            
-            trade_record = {
-                'exit_date': datetime.now(),
-                'exit_price': actual_exit_price,
-                'profit': profit,
-                'exit_reason': exit_reason,
-                'balance_after': self.balance
-            }
-            self.trades.append(trade_record)
-            
-            message = f"""
+    def exit_position(self, exit_reason, exit_price=None, state=None):
+        state = state or self
+        # Trading döngüsü ve fiyat izleyici aynı pozisyonu iki kez kapatmasın
+        with self.position_lock:
+            try:
+                if not state.position:
+                    return False
+                
+                actual_exit_price = exit_price or state.entry_price
+                side = state.position
+                
+                if side == 'long':
+                    profit = (actual_exit_price - state.entry_price) * state.position_size
+                else:
+                    profit = (state.entry_price - actual_exit_price) * state.position_size
+                
+                self.balance += profit
+                
+                trade_record = {
+                    'symbol': state.symbol,
+                    'side': side,
+                    'entry_price': state.entry_price,
+                    'exit_date': self.now(),
+                    'exit_price': actual_exit_price,
+                    'profit': profit,
+                    'exit_reason': exit_reason,
+                    'balance_after': self.balance
+                }
+                self.trades.append(trade_record)
+                if state is not self:
+                    state.trades.append(trade_record)
+                self.journal.record_exit(state.journal_key, state.symbol, actual_exit_price, profit,
+                                         exit_reason, self.balance, timestamp=trade_record['exit_date'])
+                
+                # Reset position
+                state.journal_key = None
+                state.position = None
+                state.position_size = 0
+                state.entry_price = 0
+                state.stop_loss = 0
+                state.take_profit = 0
+                self.unwatch_position(state)
+                self.save_state(force=True)
+                
+                message = f"""
 🔒 <b>POZİSYON KAPANDI!</b>
 
-📉 <b>Yön:</b> {self.position.upper()}
+🪙 <b>Parite:</b> {state.symbol}
+📉 <b>Yön:</b> {side.upper()}
 💰 <b>Çıkış:</b> ${actual_exit_price:,.2f}
 💵 <b>Kar/Zarar:</b> ${profit:+,.2f}
 📋 <b>Sebep:</b> {exit_reason}
@@ -1327,33 +1727,300 @@ Not: Sadece sayı yazın, $ işareti koymayın
 💰 <b>Yeni Bakiye:</b> ${self.balance:,.2f}
 📊 <b>Toplam P&L:</b> ${self.balance - self.trading_capital:+,.2f}
 
-⏰ {datetime.now().strftime('%H:%M:%S')}
-            """
-            
-            self.send_telegram_message(message)
+⏰ {self.now().strftime('%H:%M:%S')}
+                """
+                
+                self.send_telegram_message(message)
+                return True
             
-            # Reset position
-            self.position = None
-            self.position_size = 0
-            self.entry_price = 0
-            self.stop_loss = 0
-            self.take_profit = 0
+            except Exception as e:
+                self.logger.error(f"Error exiting position: {e}")
+                return False
+
+    def watch_position(self, state):
+        """Açık pozisyonun SL/TP seviyelerini fiyat akışında izlemeye başla"""
+        if self.price_watcher is None or not state.position:
+            return
+        # Tetik anında pozisyonun hâlâ bu seviyelerle açık olduğu kontrol edilir
+        levels = (state.position, state.entry_price, state.stop_loss, state.take_profit)
+        self.price_watcher.arm(state.symbol, state.position, state.stop_loss, state.take_profit,
+                               context=(state, levels))
+        
+        # Ana akış zaten aggTrade taşıyorsa ayrı bağlantı gerekmez
+        if self.market_stream is not None and state.symbol == self.symbol:
+            return
+        if state.symbol in self.price_feeds:
+            return
+        try:
+            feed = MarketStream(
+                state.symbol,
+                self.timeframe,
+                on_trade=lambda price, qty, ts, symbol=state.symbol: self.price_watcher.on_price(symbol, price, ts),
+                market=self.market_type(),
+                url=self.config.get('price_feed_url'),
+                klines=False,
+            )
+            feed.start()
+            self.price_feeds[state.symbol] = feed
+        except Exception as e:
+            self.logger.error(f"{state.symbol} fiyat akışı başlatılamadı: {e}")
+
+    def unwatch_position(self, state):
+        if self.price_watcher is None:
+            return
+        self.price_watcher.disarm(state.symbol)
+        feed = self.price_feeds.pop(state.symbol, None)
+        if feed is not None:
+            # Akış thread'inden çağrılmış olabilir: kapatmayı beklemeden yap
+            threading.Thread(target=feed.stop, daemon=True).start()
+
+    def on_protective_trigger(self, context, reason, price):
+        """Fiyat izleyici SL/TP'yi yakaladı: mum beklemeden çık (gerçekleşen fiyatla)"""
+        state, levels = context
+        started = time.perf_counter()
+        with self.position_lock:
+            # Tetik kilidi beklerken pozisyon kapanıp yenisi açıldıysa eski seviyeyle kapatma
+            if (state.position, state.entry_price, state.stop_loss, state.take_profit) != levels:
+                self.logger.info(f"{state.symbol} {reason} tetiği eski pozisyona ait, atlandı")
+                return
+            if self.exit_position(reason, price, state):
+                self.metrics.observe('stage', 'intrabar_exit', time.perf_counter() - started)
+
+    def run_strategy_step(self, df, state=None):
+        """Tek piyasa değerlendirmesi: indikatörler + giriş/çıkış kontrolü"""
+        state = state or self
+        if df is None or len(df) < self.strategies.min_history:
+            return False
+        
+        # Calculate indicators
+        with self.metrics.time('stage', 'indicators'):
+            df = self.calculate_indicators(df, symbol=state.symbol)
+        if df is None:
+            return False
+        
+        # Check positions
+        if state.position:
+            with self.metrics.time('stage', 'signals'):
+                exit_reason, exit_price = self.check_exit_conditions(df, state)
+            if exit_reason:
+                with self.metrics.time('stage', 'position'):
+                    self.exit_position(exit_reason, exit_price, state)
+        else:
+            with self.metrics.time('stage', 'signals'):
+                entry_signals = self.check_entry_conditions(df)
+            state.current_market_trend = entry_signals['market_trend']
+            if entry_signals['mask'] is not None:
+                state.signal_history = (df.index, entry_signals['mask'])
             
-            return True
+            if state is not self and not self.portfolio.can_open_position():
+                return True
             
+            if entry_signals['long'] or entry_signals['short']:
+                self.logger.info(f"{state.symbol} giriş sinyali: {entry_signals['strategy']}")
+                with self.metrics.time('stage', 'position'):
+                    self.enter_position('buy' if entry_signals['long'] else 'sell', df, state)
+        return True
+
+    def start_market_stream(self):
+        """WebSocket kline/aggTrade akışını başlat (ısınma verisi REST/önbellekten)"""
+        if self.market_stream is not None:
+            return
+        self.fetch_recent_data()
+        # Taban dilim akışı tüm üst dilimleri besler
+        self.market_stream = MarketStream(
+            self.symbol,
+            self.feed_base_timeframe(self.timeframe),
+            on_kline=self.on_stream_kline,
+            on_trade=self.on_stream_trade,
+            on_reconnect=self.on_stream_reconnect,
+            market=self.market_type(),
+            url=self.config.get('stream_url'),
+        )
+        self.market_stream.start()
+        self.logger.info(f"Market stream started: {self.market_stream.url}")
+
+    def stop_market_stream(self):
+        if self.market_stream is not None:
+            self.market_stream.stop()
+            self.market_stream = None
+
+    def on_stream_kline(self, candle, closed):
+        """Akıştan gelen kapanmış/güncellenen mumu stratejiye ilet"""
+        if not self.bot_running:
+            return
+        try:
+            with self.data_lock:
+                feed = self.get_market_feed(self.symbol, self.timeframe)
+                if len(feed) == 0 or not feed.update([candle]):
+                    return
+                if closed and self.history_dir:
+                    # Kapanan taban mumu (ve yeniden bağlanmada tamamlananlar) diske eklenir
+                    cache = self.get_history_cache(feed.symbol, feed.base_timeframe, feed.market)
+                    cache.append(feed.base.view(), now_ms=int(candle[0]) + feed.base_ms)
+                self.update_report_stats(feed)
+                df = feed.to_dataframe(self.timeframe)
+            self.run_strategy_step(df)
         except Exception as e:
-            self.logger.error(f"Error exiting position: {e}")
+            self.logger.error(f"Error handling stream candle: {e}")
+
+    def on_stream_trade(self, price, qty, ts):
+        if self.price_watcher is not None:
+            self.price_watcher.on_price(self.symbol, price, ts)
+
+    def on_stream_reconnect(self):
+        """Bağlantı koparken kaçan mumları tek REST isteğiyle tamamla"""
+        self.fetch_recent_data()
+
+    # Anlık görüntüye giren bot alanları (pozisyon, sermaye, kurulum sihirbazı)
+    SNAPSHOT_FIELDS = (
+        'position', 'position_size', 'entry_price', 'stop_loss', 'take_profit',
+        'current_market_trend', 'balance', 'trading_capital', 'leverage', 'trading_mode',
+        'exchange_type', 'timeframe', 'setup_data', 'waiting_for_input',
+        'last_hourly_report', 'bot_running',
+    )
+
+    def engine_state(self):
+        """Anlık görüntü için durum sözlüğü (position_lock ve data_lock altında çağrılmalı)"""
+        state = {name: getattr(self, name) for name in self.SNAPSHOT_FIELDS}
+        state['market_feeds'] = self.market_feeds
+        state['indicator_engines'] = self.indicator_engines
+        if self.portfolio is not None:
+            state['portfolio'] = self.portfolio.states
+        return state
+
+    def save_state(self, force=False):
+        """Periyodik (veya force ile hemen) atomik durum kaydı"""
+        if not force and not self.snapshot_writer.due():
+            return
+        try:
+            # Kilit sırası position_lock -> data_lock (exit_position ile aynı). Pozisyon
+            # alanları, mum depoları ve indikatör motorları yalnızca bu kilitler
+            # altında değiştiği için hangi thread'den çağrılırsa çağrılsın tutarlı kopya
+            with self.position_lock, self.data_lock:
+                self.snapshot_writer.save(self.engine_state())
+        except Exception as e:
+            self.logger.error(f"Durum kaydedilemedi: {e}")
+
+    def restore_state(self):
+        """Son anlık görüntüden devam et; trading açıksa döngüyü yeniden başlat.
+        
+        Mum ve indikatör durumu geri geldiği için ilk turda sadece kapalıyken
+        kaçırılan mumlar çekilir (tam ısınma yok).
+        """
+        started = time.perf_counter()
+        snapshot = load_snapshot(self.snapshot_writer.path)
+        if snapshot is None:
             return False
+        
+        state = snapshot['state']
+        for name in self.SNAPSHOT_FIELDS:
+            if name in state:
+                setattr(self, name, state[name])
+        self.market_feeds.update(state.get('market_feeds', {}))
+        self.indicator_engines.update(state.get('indicator_engines', {}))
+        self.restored_portfolio = state.get('portfolio')
+        # Günlük anahtarları süreç içi; açık kayıt çıkışta paritesinden bulunur
+        self.journal_key = None
+        for symbol_state in (self.restored_portfolio or {}).values():
+            symbol_state.journal_key = None
+        
+        elapsed = time.perf_counter() - started
+        age = time.time() - snapshot['saved_at']
+        self.logger.info(f"State restored in {elapsed * 1000:.1f} ms (snapshot age {age:.0f} s)")
+        
+        if self.bot_running:
+            # Borsa bağlantısı açılışı bekletmesin: döngü arka planda başlar
+            threading.Thread(target=self.resume_trading, args=(elapsed,), daemon=True).start()
+        return True
+
+    def resume_trading(self, restore_seconds=0.0):
+        if self.exchange is None:
+            self.bot_running = False
+            self.send_telegram_message("❌ Exchange bağlantısı yok, trading devam ettirilemedi!")
+            return
+        self.exchange = self.exchange_pool.get('futures' if self.exchange_type == 'futures' else 'spot')
+        threading.Thread(target=self.trading_loop, daemon=True).start()
+        self.send_telegram_message(
+            f"♻️ <b>Trading kaldığı yerden devam ediyor</b>\n"
+            f"📈 Pozisyon: {self.position or 'Yok'}\n"
+            f"💰 Bakiye: ${self.balance:,.2f}\n"
+            f"⏱️ Geri yükleme: {restore_seconds * 1000:.0f} ms")
+
+    def create_loop_scheduler(self):
+        """Config'e göre trading döngüsü zamanlayıcısını oluştur"""
+        if self.loop_schedule == 'fixed':
+            return FixedIntervalScheduler(self.config.get('loop_interval_seconds', 60),
+                                          clock=self.clock, sleep=self.sleep)
+        return CandleScheduler(
+            self.timeframe,
+            grace_seconds=self.config.get('candle_grace_seconds', 2),
+            exit_interval=self.config.get('exit_check_seconds', 60),
+            clock=self.clock,
+            sleep=self.sleep,
+        )
+
+    def run_scheduled_step(self, event):
+        """Zamanlayıcı olayına göre değerlendirme yap.
+        
+        'entry': mum kapanışı, sadece kapanmış mumlar değerlendirilir
+        'exit': ara kontrol, sadece açık pozisyon varsa çıkış bakılır
+        'tick': sabit aralık modu, oluşmakta olan mum dahil tam değerlendirme
+        """
+        if self.portfolio is not None:
+            self.portfolio.step(event, self.loop_scheduler.current_candle_start())
+        elif event != 'exit' or self.position:
+            with self.metrics.time('stage', 'fetch'):
+                df = self.fetch_recent_data()
+            if event == 'entry' and df is not None:
+                import pandas as pd
+                
+                candle_start = pd.Timestamp(self.loop_scheduler.current_candle_start(), unit='s')
+                df = df[df.index < candle_start]
+            self.run_strategy_step(df)
+        
+        # 4h/1d'de giriş turu seyrek: rapor istatistikleri saatte bir ara kontrolde tazelenir
+        self.refresh_report_stats()
 
     def trading_loop(self):
         """Main trading loop"""
         self.logger.info("Trading loop started")
+        self.loop_scheduler = self.create_loop_scheduler()
+        
+        if len(self.symbols) > 1:
+            self.portfolio = PortfolioEngine(
+                self,
+                self.symbols,
+                max_workers=self.config.get('portfolio_workers', 8),
+                max_open_positions=self.config.get('portfolio_max_positions', 5),
+                max_open_risk=self.config.get('portfolio_max_risk', 0.10),
+            )
+            if self.restored_portfolio:
+                self.portfolio.restore(self.restored_portfolio)
+                self.restored_portfolio = None
+            self.logger.info(f"Portfolio mode: {len(self.symbols)} symbols")
+        elif self.market_data_mode == 'stream' and self.exchange:
+            try:
+                self.start_market_stream()
+            except Exception as e:
+                self.logger.error(f"Market stream başlatılamadı, REST moduna dönülüyor: {e}")
+                self.market_stream = None
+        
+        # Geri yüklenen açık pozisyonlar için koruma takibi
+        for state in [self] + (list(self.portfolio.states.values()) if self.portfolio else []):
+            self.watch_position(state)
         
+        # İlk tur hemen yapılır; mum kapanışı modunda oluşmakta olan mumla giriş yapılmaz
+        event = 'tick' if isinstance(self.loop_scheduler, FixedIntervalScheduler) else 'entry'
         while self.bot_running:
             try:
-                current_time = datetime.now()
+                current_time = self.now()
+                
+                # Akış modunda kararlar on_stream_kline ile anında verilir
+                if self.exchange and self.market_stream is None:
+                    with self.metrics.time('stage', 'tick'):
+                        self.run_scheduled_step(event)
                 
-                # Saatlik rapor kontrolü
+                # Saatlik rapor kontrolü (istatistikler bu turun isteğiyle güncel)
                 if (self.price_alerts_enabled and 
                     (self.last_hourly_report is None or 
                      current_time.hour != self.last_hourly_report.hour)):
@@ -1361,41 +2028,20 @@ Not: Sadece sayı yazın, $ işareti koymayın
                     self.send_hourly_report()
                     self.last_hourly_report = current_time
                 
-                if not self.exchange:
-                    time.sleep(60)
-                    continue
-                
-                # Fetch data
-                df = self.fetch_recent_data()
-                if df is None or len(df) < self.ema_period:
-                    time.sleep(60)
-                    continue
-                
-                # Calculate indicators
-                df = self.calculate_indicators(df)
-                if df is None:
-                    time.sleep(60)
-                    continue
-                
-                # Check positions
-                if self.position:
-                    exit_reason, exit_price = self.check_exit_conditions(df)
-                    if exit_reason:
-                        self.exit_position(exit_reason, exit_price)
-                else:
-                    entry_signals = self.check_entry_conditions(df)
-                    self.current_market_trend = entry_signals['market_trend']
-                    
-                    if entry_signals['long']:
-                        self.enter_position('buy', df)
-                    elif entry_signals['short']:
-                        self.enter_position('sell', df)
-                
-                time.sleep(60)  # Check every minute
+                self.save_state()
                 
             except Exception as e:
                 self.logger.error(f"Error in trading loop: {e}")
-                time.sleep(60)
+            
+            woke = self.loop_scheduler.wait()
+            if woke is None:
+                break
+            event = woke[0]
+        
+        self.stop_market_stream()
+        if self.portfolio is not None:
+            self.portfolio.close()
+            self.portfolio = None
 
     def run(self):
         """Ana döngü - Telegram mesajlarını dinle"""
@@ -1416,21 +2062,30 @@ Not: Sadece sayı yazın, $ işareti koymayın
                     
                     # Text mesaj
                     if 'message' in update:
-                        self.process_telegram_command(update['message'])
+                        with self.metrics.time('handler', self.handler_label(update['message'].get('text', ''))):
+                            self.process_telegram_command(update['message'])
                     
                     # Callback query (buton)
                     elif 'callback_query' in update:
-                        self.process_telegram_callback(update['callback_query'])
-                
-                time.sleep(1)  # 1 saniye bekle
+                        with self.metrics.time('handler', self.callback_label(update['callback_query'].get('data', ''))):
+                            self.process_telegram_callback(update['callback_query'])
                 
         except KeyboardInterrupt:
             print("\n⏹️ Bot durduruldu")
-            self.bot_running = False
             self.send_telegram_message("⏹️ Bot durduruldu!")
         except Exception as e:
             print(f"❌ Bot hatası: {e}")
             self.send_telegram_message(f"❌ Bot hatası: {e}")
+        finally:
+            # Her çıkışta sınırlı süreli boşaltma (kuyruktaki kayıtlar kaybolmasın);
+            # trading açıksa yeniden başlatmada kaldığı yerden devam etsin
+            self.save_state(force=True)
+            self.snapshot_writer.close(timeout=self.config.get('snapshot_flush_timeout', 5))
+            self.bot_running = False
+            if self.telegram_dispatcher is not None:
+                self.telegram_dispatcher.stop(timeout=5)
+            self.journal.close(timeout=self.config.get('journal_flush_timeout', 5))
+            self.exchange_pool.close()
 
 if __name__ == "__main__":
     bot = SimpleTelegramBot()
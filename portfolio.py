@@ -0,0 +1,122 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from resample import MultiTimeframeStore
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolState:
+    """Tek paritenin pozisyon durumu (SimpleTelegramBot alanlarıyla aynı isimler)"""
+
+    def __init__(self, symbol, base_timeframe, capacity=500, market='spot'):
+        self.symbol = symbol
+        self.position = None
+        self.position_size = 0
+        self.entry_price = 0
+        self.stop_loss = 0
+        self.take_profit = 0
+        self.current_market_trend = None
+        self.trades = []
+        self.journal_key = None
+        self.signal_history = None
+        self.feed = MultiTimeframeStore(symbol, base_timeframe, capacity=capacity, market=market)
+        self.last_error = None
+
+    def open_risk(self):
+        if not self.position:
+            return 0.0
+        return abs(self.entry_price - self.stop_loss) * self.position_size
+
+
+class PortfolioEngine:
+    """Birden çok paritede stratejiyi ortak sermaye ve risk bütçesiyle çalıştır.
+
+    Mum verisi sınırlı bir thread havuzunda eşzamanlı çekilir. İstek bütçesi
+    `rate_limiter` ile ya da istemcilerin ortak throttle'ı ile (bkz.
+    ExchangeClientPool) paylaşılır. Değerlendirme ve pozisyon açma/kapama
+    sermaye tutarlılığı için sırayla yapılır.
+    """
+
+    def __init__(self, bot, symbols, max_workers=8, rate_limiter=None,
+                 max_open_positions=5, max_open_risk=0.10):
+        self.bot = bot
+        base_timeframe = bot.feed_base_timeframe(bot.timeframe)
+        market = bot.market_type()
+        self.states = {symbol: SymbolState(symbol, base_timeframe, capacity=bot.history_limit, market=market)
+                       for symbol in symbols}
+        self.limiter = rate_limiter
+        self.max_open_positions = max_open_positions
+        self.max_open_risk = max_open_risk
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='portfolio')
+
+    def close(self):
+        self.pool.shutdown(wait=False)
+
+    def _fetch(self, state):
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            store = self.bot.sync_market_feed(state.feed, self.bot.timeframe)
+            state.last_error = None
+            with self.bot.data_lock:
+                return store.to_dataframe()
+        except Exception as e:
+            state.last_error = str(e)
+            logger.error(f"{state.symbol} verisi alınamadı: {e}")
+            return None
+
+    def fetch_all(self, states):
+        """Verilen paritelerin mumlarını eşzamanlı güncelle"""
+        return list(self.pool.map(self._fetch, states))
+
+    def restore(self, states):
+        """Anlık görüntüden gelen parite durumlarını (pozisyon, mumlar) geri yükle"""
+        for symbol, state in states.items():
+            if symbol in self.states:
+                current = self.states[symbol].feed
+                if (state.feed.base_timeframe, state.feed.market) != (current.base_timeframe, current.market):
+                    state.feed = current  # taban dilim/piyasa değişti: mumlar yeniden yüklenir
+                self.states[symbol] = state
+
+    def open_positions(self):
+        return [s for s in self.states.values() if s.position]
+
+    def can_open_position(self):
+        """Ortak pozisyon sayısı ve toplam açık risk bütçesi kontrolü"""
+        open_states = self.open_positions()
+        if len(open_states) >= self.max_open_positions:
+            return False
+        new_risk = self.bot.balance * self.bot.risk_per_trade
+        open_risk = sum(s.open_risk() for s in open_states)
+        return open_risk + new_risk <= self.bot.balance * self.max_open_risk
+
+    def step(self, event, candle_start=None):
+        """Zamanlayıcı olayı için tüm paritelerde bir tur değerlendirme"""
+        if event == 'exit':
+            states = self.open_positions()
+        else:
+            states = list(self.states.values())
+        if not states:
+            return
+
+        import pandas as pd
+
+        with self.bot.metrics.time('stage', 'fetch'):
+            frames = self.fetch_all(states)
+        cutoff = pd.Timestamp(candle_start, unit='s') if event == 'entry' and candle_start else None
+        for state, df in zip(states, frames):
+            if df is not None and cutoff is not None:
+                df = df[df.index < cutoff]
+            try:
+                self.bot.run_strategy_step(df, state)
+            except Exception as e:
+                logger.error(f"{state.symbol} değerlendirme hatası: {e}")
+
+    def describe(self):
+        """Telegram durum mesajı için kısa özet"""
+        lines = [f"🧺 <b>Portföy:</b> {len(self.states)} parite, "
+                 f"{len(self.open_positions())}/{self.max_open_positions} açık pozisyon"]
+        for state in self.open_positions():
+            lines.append(f"• {state.symbol}: {state.position.upper()} @ ${state.entry_price:,.4f}")
+        return '\n'.join(lines)
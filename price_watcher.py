@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Levels:
+    __slots__ = ('side', 'stop_loss', 'take_profit', 'context', 'armed_at')
+
+    def __init__(self, side, stop_loss, take_profit, context):
+        self.side = side
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.context = context
+        self.armed_at = time.monotonic()
+
+
+class PriceWatcher:
+    """Açık pozisyonların SL/TP seviyelerini her fiyat güncellemesinde kontrol eder.
+
+    İndikatör hesabından bağımsızdır: on_price() sadece iki karşılaştırma
+    yapar. Seviye aşılınca pozisyon bir kez (atomik olarak) devreden çıkarılır
+    ve on_trigger(context, reason, price) çağrılır.
+    """
+
+    def __init__(self, on_trigger):
+        self.on_trigger = on_trigger
+        self._levels = {}
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.triggers = 0
+        self.last_price = {}
+        self.last_trigger_latency = None
+
+    def arm(self, symbol, side, stop_loss, take_profit, context=None):
+        with self._lock:
+            self._levels[symbol] = _Levels(side, stop_loss, take_profit, context)
+
+    def disarm(self, symbol):
+        with self._lock:
+            return self._levels.pop(symbol, None) is not None
+
+    def armed(self, symbol):
+        return symbol in self._levels
+
+    def symbols(self):
+        return list(self._levels)
+
+    def on_price(self, symbol, price, ts=None):
+        """Her işlem/ticker fiyatında çağrılır; tetiklenirse True"""
+        self.updates += 1
+        self.last_price[symbol] = price
+        levels = self._levels.get(symbol)
+        if levels is None:
+            return False
+
+        if levels.side == 'long':
+            reason = 'stop_loss' if price <= levels.stop_loss else 'take_profit' if price >= levels.take_profit else None
+        else:
+            reason = 'stop_loss' if price >= levels.stop_loss else 'take_profit' if price <= levels.take_profit else None
+        if reason is None:
+            return False
+
+        with self._lock:
+            # Aynı anda gelen ikinci fiyat pozisyonu tekrar kapatmasın
+            if self._levels.get(symbol) is not levels:
+                return False
+            del self._levels[symbol]
+        self.triggers += 1
+
+        started = time.perf_counter()
+        try:
+            self.on_trigger(levels.context, reason, price)
+        except Exception as e:
+            logger.error(f"{symbol} koruma emri işlenemedi: {e}")
+        self.last_trigger_latency = time.perf_counter() - started
+        return True
@@ -0,0 +1,195 @@
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from backtest import add_data_arguments, load_ohlcv_from_args, summarize
+from bench import load_bot_module, make_bot
+from candle_store import timeframe_to_ms
+from history_cache import HistoryCache
+
+
+class VirtualClock:
+    """Sanal saat: sleep() beklemeden zamanı ilerletir.
+
+    `end` geçildiğinde on_end() bir kez çağrılır (ör. döngüyü durdurmak için).
+    """
+
+    def __init__(self, start, end=None, on_end=None):
+        self.now = float(start)
+        self.end = end
+        self.on_end = on_end
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+        if self.end is not None and self.now >= self.end and self.on_end is not None:
+            on_end, self.on_end = self.on_end, None
+            on_end()
+
+
+class ReplayExchange:
+    """Kayıtlı mumları sanal saate göre sunan ccxt yerine geçen nesne.
+
+    Sadece açılış zamanı saatten önce olan mumlar görünür. Oluşmakta olan
+    mumun tick verisi olmadığı için kısmi mum açılıştan kapanışa doğrusal
+    ilerletilir; high/low uçları ancak mum kapanınca ortaya çıkar (ileriye
+    bakma yok).
+    """
+
+    rateLimit = 0
+
+    def __init__(self, data, timeframe, clock, balance=10000.0):
+        self.data = {symbol: np.asarray(ohlcv, dtype=np.float64) for symbol, ohlcv in data.items()}
+        self.timeframe = timeframe
+        self.timeframe_ms = timeframe_to_ms(timeframe)
+        self.clock = clock
+        self.balance = balance
+        self.options = {'defaultType': 'spot'}
+        self.calls = 0
+
+    def _visible(self, symbol):
+        """(kapanmış mumlar, kısmi mum veya None)"""
+        data = self.data[symbol]
+        now_ms = self.clock.time() * 1000
+        ts = data[:, 0]
+        closed_end = int(np.searchsorted(ts, now_ms - self.timeframe_ms, side='right'))
+        opened_end = int(np.searchsorted(ts, now_ms, side='right'))
+        partial = None
+        if opened_end > closed_end:
+            ts0, open_, high, low, close, volume = data[closed_end]
+            progress = (now_ms - ts0) / self.timeframe_ms
+            price = open_ + (close - open_) * progress
+            partial = [ts0, open_, max(open_, price), min(open_, price), price, volume * progress]
+        return data[:closed_end], partial
+
+    def fetch_ohlcv(self, symbol, timeframe=None, since=None, limit=None):
+        self.calls += 1
+        closed, partial = self._visible(symbol)
+        limit = limit or 500
+        if since is not None:
+            closed = closed[np.searchsorted(closed[:, 0], since):][:limit]
+        else:
+            count = limit - (partial is not None)
+            closed = closed[max(len(closed) - count, 0):]
+        rows = closed.tolist()
+        if partial is not None and len(rows) < limit:
+            rows.append(partial)
+        return rows
+
+    def fetch_ticker(self, symbol):
+        self.calls += 1
+        closed, partial = self._visible(symbol)
+        last = partial or closed[-1].tolist()
+        day = closed[-(86_400_000 // self.timeframe_ms):]
+        first_open = day[0, 1] if len(day) else last[1]
+        return {
+            'symbol': symbol, 'last': last[4],
+            'high': max(day[:, 2].max() if len(day) else last[2], last[2]),
+            'low': min(day[:, 3].min() if len(day) else last[3], last[3]),
+            'change': last[4] - first_open, 'percentage': (last[4] / first_open - 1) * 100,
+            'quoteVolume': float((day[:, 5] * day[:, 4]).sum()) if len(day) else 0.0,
+        }
+
+    def fetch_balance(self, params=None):
+        self.calls += 1
+        return {'USDT': {'free': self.balance, 'used': 0.0, 'total': self.balance}}
+
+    def load_markets(self, reload=False):
+        return {}
+
+    def market(self, symbol):
+        return {'symbol': symbol, 'precision': {'amount': 6}, 'limits': {}}
+
+
+def run_replay(data, timeframe='15m', capital=10000.0, trading_mode='both', warmup=500,
+               reports=False, config=None):
+    """Gerçek trading_loop'u sanal saatle kayıtlı veri üzerinde baştan sona çalıştır"""
+    module = load_bot_module()
+    symbols = list(data)
+    tf_ms = timeframe_to_ms(timeframe)
+    first = min(len(ohlcv) for ohlcv in data.values())
+    if first <= warmup:
+        raise ValueError(f"Replay için en az {warmup + 1} mum gerekli (mevcut: {first})")
+
+    start = max(float(ohlcv[warmup][0]) for ohlcv in data.values()) / 1000
+    end = min(float(ohlcv[-1][0]) for ohlcv in data.values()) / 1000 + tf_ms / 1000
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clock = VirtualClock(start, end)
+        exchange = ReplayExchange(data, timeframe, clock, balance=capital)
+        overrides = {'timeframe': timeframe, 'cache_ttl': {}, **(config or {})}
+        bot = make_bot(module, exchange, workdir, symbols, overrides)
+
+        def finish():
+            bot.bot_running = False
+            if bot.loop_scheduler is not None:
+                bot.loop_scheduler.stop()
+
+        clock.on_end = finish
+        bot.clock, bot.sleep = clock.time, clock.sleep
+        bot.balance = bot.trading_capital = capital
+        bot.trading_mode = trading_mode
+        bot.price_alerts_enabled = reports
+        bot.bot_running = True
+
+        started = time.perf_counter()
+        bot.trading_loop()
+        wall = time.perf_counter() - started
+
+        bot.journal.close()
+        bot.snapshot_writer.close()
+
+    trades = bot.trades
+    equity = np.array([capital] + [t['balance_after'] for t in trades])
+    result = summarize(trades, equity, capital)
+    result.update({
+        'trades': trades,
+        'messages': len(bot.sent),
+        'open_position': bot.position,
+        'virtual_seconds': clock.now - start,
+        'wall_seconds': wall,
+        'speedup': (clock.now - start) / wall if wall else float('inf'),
+        'candles': int((clock.now - start) * 1000 // tf_ms),
+        'stage_summary': bot.metrics.summary('stage'),
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Kayıtlı veriyle hızlandırılmış canlı döngü (replay)')
+    add_data_arguments(parser)
+    parser.add_argument('--symbols', help='virgülle birden çok parite (geçmiş önbelleğinden, portföy modu)')
+    parser.add_argument('--capital', type=float, default=10000.0)
+    parser.add_argument('--mode', choices=['long', 'short', 'both'], default='both')
+    parser.add_argument('--warmup', type=int, default=500, help='başlangıçta görünür mum sayısı')
+    parser.add_argument('--reports', action='store_true', help='saatlik raporları da üret')
+    args = parser.parse_args()
+
+    if args.symbols:
+        data = {symbol: HistoryCache(symbol, args.timeframe, args.history_dir, market=args.market).load()
+                for symbol in args.symbols.split(',')}
+    else:
+        data = {args.symbol: load_ohlcv_from_args(args)}
+
+    result = run_replay(data, args.timeframe, args.capital, args.mode, args.warmup, args.reports)
+
+    days = result['virtual_seconds'] / 86400
+    print(f"⏩ {days:.1f} gün ({result['candles']} mum) {result['wall_seconds']:.1f} sn'de oynatıldı "
+          f"(x{result['speedup']:,.0f})")
+    print(f"📊 İşlem: {result['trade_count']} | Başarı: %{result['win_rate'] * 100:.1f} | "
+          f"Getiri: %{result['total_return'] * 100:+.2f} | Maks. düşüş: %{result['max_drawdown'] * 100:.2f}")
+    print(f"💰 Son bakiye: ${result['final_balance']:,.2f} | Açık pozisyon: {result['open_position'] or 'Yok'} | "
+          f"Telegram mesajı: {result['messages']}")
+    for label, count, p50, p95, p99, _ in result['stage_summary']:
+        print(f"   {label:<12} n={count:<7} p50 {p50:.2f} ms | p95 {p95:.2f} ms | p99 {p99:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import numpy as np
+
+from candle_store import OHLCV_COLUMNS, CandleStore, timeframe_to_ms
+
+
+def resample_ohlcv(ohlcv, timeframe_ms):
+    """Zaman sıralı taban mumlarını üst zaman dilimine topla.
+
+    open = kovanın ilk açılışı, high/low = uç değerler, close = son kapanış,
+    volume = toplam. Kovalar epoch'a hizalıdır (Binance dakika/saat/gün
+    mumlarıyla aynı). Son kova eksik (oluşmakta) olabilir.
+    """
+    data = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+    if len(data) == 0:
+        return data
+    buckets = data[:, 0] // timeframe_ms * timeframe_ms
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(data)] - 1
+
+    out = np.empty((len(starts), len(OHLCV_COLUMNS)), dtype=np.float64)
+    out[:, 0] = buckets[starts]
+    out[:, 1] = data[starts, 1]
+    out[:, 2] = np.maximum.reduceat(data[:, 2], starts)
+    out[:, 3] = np.minimum.reduceat(data[:, 3], starts)
+    out[:, 4] = data[ends, 4]
+    out[:, 5] = np.add.reduceat(data[:, 5], starts)
+    return out
+
+
+def can_derive(base_timeframe, timeframe):
+    """`timeframe` mumları `base_timeframe` mumlarından toplanabilir mi"""
+    if timeframe.endswith('w'):
+        return False  # Haftalık mumlar pazartesiye hizalı, epoch'a değil
+    return timeframe_to_ms(timeframe) % timeframe_to_ms(base_timeframe) == 0
+
+
+class MultiTimeframeStore:
+    """Tek taban seriden (ör. 5m) üst zaman dilimlerini artımlı türeten mum deposu.
+
+    Borsadan sadece taban seri çekilir; her taban güncellemesinde türetilmiş
+    depolarda yalnızca etkilenen kovalar yeniden toplanır. Oluşmakta olan
+    taban mumu, içinde bulunduğu üst mumu da kısmi bırakır (borsadaki gibi).
+    Taban penceresinden eski geçmiş gerekirse backfill() ile bir kez eklenir.
+    `market` ('spot'/'futures') mumların hangi piyasadan çekileceğini belirtir.
+    """
+
+    def __init__(self, symbol, base_timeframe, capacity=500, market='spot'):
+        self.symbol = symbol
+        self.market = market
+        self.base_timeframe = base_timeframe
+        self.base_ms = timeframe_to_ms(base_timeframe)
+        self.capacity = capacity
+        self.base = CandleStore(symbol, base_timeframe, capacity=capacity)
+        self.derived = {}
+        self.backfilled = set()
+
+    def __len__(self):
+        return len(self.base)
+
+    def timeframes(self):
+        return [self.base_timeframe] + list(self.derived)
+
+    def store(self, timeframe, capacity=None):
+        """Zaman diliminin deposu (taban dilim için taban deponun kendisi)"""
+        capacity = max(capacity or 0, self.capacity)
+        if timeframe == self.base_timeframe:
+            if self.base.capacity < capacity:
+                self._grow_base(capacity)
+            return self.base
+
+        store = self.derived.get(timeframe)
+        if store is None or store.capacity < capacity:
+            if not can_derive(self.base_timeframe, timeframe):
+                raise ValueError(f"{timeframe} mumları {self.base_timeframe} tabanından türetilemez")
+            # Açık üst mum ve bir öncekinin tamamı taban penceresinde olmalı
+            ratio = timeframe_to_ms(timeframe) // self.base_ms
+            if self.base.capacity < 2 * ratio:
+                self._grow_base(2 * ratio)
+            grown = CandleStore(self.symbol, timeframe, capacity=capacity)
+            if store is not None:
+                grown.update(store.view())
+            self.derived[timeframe] = grown
+            self._derive(0, {timeframe: grown})
+            store = grown
+        return store
+
+    def _grow_base(self, capacity):
+        # Eski pencere daha kısa: bir sonraki istek tam pencereyi yükler
+        self.base = CandleStore(self.symbol, self.base_timeframe, capacity=capacity)
+
+    def _derive(self, since_ts, stores=None):
+        """`since_ts` içeren kovadan itibaren türetilmiş mumları tabandan yeniden topla"""
+        base = self.base.view()
+        if len(base) == 0:
+            return
+        for timeframe, store in (self.derived if stores is None else stores).items():
+            tf_ms = store.timeframe_ms
+            # Taban penceresinin başındaki yarım kova türetilemez
+            first_full = -(-int(base[0, 0]) // tf_ms) * tf_ms
+            last_ts = store.last_timestamp()
+            if last_ts is None:
+                start = first_full
+            elif last_ts + tf_ms < first_full:
+                # Uzun kesinti: aradaki mumlar tabandan türetilemez, depo yeniden kurulur
+                store.clear()
+                self.backfilled.discard(timeframe)
+                start = first_full
+            else:
+                start = max(min(since_ts // tf_ms * tf_ms, last_ts), first_full)
+            store.update(resample_ohlcv(base[np.searchsorted(base[:, 0], start):], tf_ms))
+
+    def update(self, ohlcv):
+        """Taban mumlarını işle, türetilmiş dilimleri güncelle; değişen taban satır sayısı"""
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+        changed = self.base.update(rows)
+        if changed:
+            self._derive(int(rows[:, 0].min()))
+        return changed
+
+    def next_request(self, now_ms=None):
+        return self.base.next_request(now_ms)
+
+    def apply(self, request, ohlcv):
+        """Taban için next_request() ile çekilen mumları işle (bkz. CandleStore.apply)"""
+        changed = self.base.apply(request, ohlcv)
+        if changed:
+            self._derive(int(min(row[0] for row in ohlcv)))
+        return changed
+
+    def sync(self, exchange, now_ms=None):
+        """Taban seriyi son kayıtlı mumdan itibaren güncelle (tek istek)"""
+        request = self.next_request(now_ms)
+        ohlcv = exchange.fetch_ohlcv(self.symbol, self.base_timeframe, **request)
+        return self.apply(request, ohlcv)
+
+    def needs_backfill(self, timeframe, rows):
+        """Türetilmiş dilimde `rows` mumdan az var ve eski geçmiş henüz eklenmedi mi"""
+        if timeframe == self.base_timeframe or timeframe in self.backfilled:
+            return False
+        return len(self.store(timeframe)) < rows
+
+    def backfill(self, timeframe, ohlcv):
+        """Taban penceresinden eski mumları (borsa/disk) türetilmiş deponun başına ekle"""
+        store = self.store(timeframe)
+        self.backfilled.add(timeframe)
+        rows = np.asarray(ohlcv, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+        if len(store):
+            rows = rows[rows[:, 0] < store.view()[0, 0]]
+        if len(rows) == 0:
+            return 0
+        merged = np.concatenate([rows, store.view()])
+        store.clear()
+        store.update(merged[-store.capacity:])
+        # Taban penceresindeki kovalar her zaman tabandan gelir
+        self._derive(0, {timeframe: store})
+        return len(rows)
+
+    def to_dataframe(self, timeframe, limit=None, copy=True):
+        return self.store(timeframe).to_dataframe(limit=limit, copy=copy)
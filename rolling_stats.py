@@ -0,0 +1,111 @@
+from collections import deque
+
+
+class RollingWindowStats:
+    """Son `size` mumun en yüksek/en düşük/ortalama değerleri, mum başına amortize O(1).
+
+    Kapanmış mumlar monoton deque'lerde (max/min) ve kapanış toplamında
+    tutulur; oluşmakta olan son mum ayrı saklanır ve sorgularda pencereye
+    katılır. Sorgular sabit zamanlıdır, borsa çağrısı gerektirmez.
+    """
+
+    def __init__(self, size=24, trend_bars=4):
+        self.size = size
+        self.trend_bars = trend_bars
+        self.reset()
+
+    def reset(self):
+        self._closed = deque()  # (ts, close)
+        self._highs = deque()   # (ts, high), azalan
+        self._lows = deque()    # (ts, low), artan
+        self._close_sum = 0.0
+        self.forming = None
+
+    def __len__(self):
+        return len(self._closed) + (self.forming is not None)
+
+    def last_timestamp(self):
+        return None if self.forming is None else self.forming[0]
+
+    def _close(self, candle):
+        ts, _, high, low, close = candle[:5]
+        self._closed.append((ts, close))
+        self._close_sum += close
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((ts, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((ts, low))
+
+        # Pencere: size - 1 kapanmış mum + oluşan mum
+        while len(self._closed) > self.size - 1:
+            old_ts, old_close = self._closed.popleft()
+            self._close_sum -= old_close
+            if self._highs[0][0] <= old_ts:
+                self._highs.popleft()
+            if self._lows[0][0] <= old_ts:
+                self._lows.popleft()
+
+    def update(self, candle):
+        """Yeni veya güncellenen son mumu işle (zaman sırasıyla)"""
+        candle = tuple(float(v) for v in candle[:6])
+        if self.forming is not None:
+            if candle[0] < self.forming[0]:
+                return
+            if candle[0] > self.forming[0]:
+                self._close(self.forming)
+        self.forming = candle
+
+    def update_many(self, rows):
+        for row in rows:
+            self.update(row)
+
+    def high(self):
+        forming = self.forming[2] if self.forming else float('-inf')
+        return max(self._highs[0][1], forming) if self._highs else forming
+
+    def low(self):
+        forming = self.forming[3] if self.forming else float('inf')
+        return min(self._lows[0][1], forming) if self._lows else forming
+
+    def mean(self):
+        if not len(self):
+            return float('nan')
+        forming = self.forming[4] if self.forming else 0.0
+        return (self._close_sum + forming) / len(self)
+
+    def last_close(self):
+        return self.forming[4] if self.forming else float('nan')
+
+    def last_change(self):
+        """(son mum kapanışı - önceki kapanış, yüzde)"""
+        if self.forming is None:
+            return 0.0, 0.0
+        prev = self._closed[-1][1] if self._closed else self.forming[4]
+        change = self.forming[4] - prev
+        return change, change / prev * 100
+
+    def recent_closes(self):
+        """Trend için son `trend_bars` kapanış (eskiden yeniye)"""
+        count = min(self.trend_bars - 1, len(self._closed))
+        closes = [self._closed[-i][1] for i in range(count, 0, -1)]
+        if self.forming is not None:
+            closes.append(self.forming[4])
+        return closes
+
+    def snapshot(self):
+        """Rapor için tüm değerlerin tutarlı kopyası (kilit altında alınmalı)"""
+        change, change_pct = self.last_change()
+        return {
+            'count': len(self),
+            'last_timestamp': self.last_timestamp(),
+            'last_close': self.last_close(),
+            'prev_close': self._closed[-1][1] if self._closed else self.last_close(),
+            'change': change,
+            'change_pct': change_pct,
+            'high': self.high(),
+            'low': self.low(),
+            'mean': self.mean(),
+            'recent_closes': self.recent_closes(),
+        }
@@ -0,0 +1,99 @@
+import logging
+import threading
+import time
+
+from candle_store import timeframe_to_ms
+
+logger = logging.getLogger(__name__)
+
+
+class CandleScheduler:
+    """Trading döngüsünü mum kapanışlarına hizalı uyandıran zamanlayıcı.
+
+    Giriş değerlendirmesi her zaman dilimi sınırından `grace_seconds` sonra,
+    çıkış takibi (verilmişse) her `exit_interval` saniyede bir tetiklenir.
+    Bekleme süreleri her seferinde mutlak zaman ızgarasından hesaplandığı
+    için işin süresi kaymaya yol açmaz; `tolerance` saniyeden geç kalınan
+    uyanışlar kaçırılmış sayılır ve biriken eski sınırlar atlanır.
+    """
+
+    def __init__(self, timeframe, grace_seconds=2.0, exit_interval=None, tolerance=5.0,
+                 clock=time.time, sleep=None):
+        self.timeframe = timeframe
+        self.period = timeframe_to_ms(timeframe) / 1000
+        self.grace_seconds = grace_seconds
+        self.exit_interval = exit_interval
+        self.tolerance = tolerance
+        self.clock = clock
+        self._stop = threading.Event()
+        self.sleep = sleep or self._stop.wait
+
+        now = self.clock()
+        self.next_entry = self._next_on_grid(now, self.period, self.grace_seconds)
+        self.next_exit = self._next_on_grid(now, exit_interval) if exit_interval else None
+
+        self.missed_deadlines = 0
+        self.max_lateness = 0.0
+
+    @staticmethod
+    def _next_on_grid(now, interval, offset=0.0):
+        """now'dan sonraki ilk (k * interval + offset) anı"""
+        k = (now - offset) // interval + 1
+        return k * interval + offset
+
+    def current_candle_start(self, now=None):
+        """Şu an oluşmakta olan mumun açılış zamanı (saniye)"""
+        now = self.clock() if now is None else now
+        return (now // self.period) * self.period
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def wait(self):
+        """Sıradaki olaya kadar uyu; ('entry' | 'exit', planlanan zaman) döndür.
+
+        Durdurulduysa None döner.
+        """
+        if self.next_exit is not None and self.next_exit < self.next_entry:
+            kind, deadline = 'exit', self.next_exit
+        else:
+            kind, deadline = 'entry', self.next_entry
+
+        remaining = deadline - self.clock()
+        while remaining > 0 and not self.stopped:
+            self.sleep(remaining)
+            remaining = deadline - self.clock()
+        if self.stopped:
+            return None
+
+        now = self.clock()
+        lateness = now - deadline
+        self.max_lateness = max(self.max_lateness, lateness)
+        if lateness > self.tolerance:
+            self.missed_deadlines += 1
+            logger.warning(f"{kind} zamanlaması {lateness:.1f} sn gecikti "
+                           f"(toplam kaçırılan: {self.missed_deadlines})")
+
+        # Sonraki hedefleri mutlak ızgaradan hesapla (kayma yok, birikme yok)
+        if kind == 'entry':
+            self.next_entry = self._next_on_grid(now, self.period, self.grace_seconds)
+        else:
+            self.next_exit = self._next_on_grid(now, self.exit_interval)
+        return kind, deadline
+
+
+class FixedIntervalScheduler(CandleScheduler):
+    """Eski davranış: her `interval` saniyede bir tam değerlendirme ('tick')"""
+
+    def __init__(self, interval=60, clock=time.time, sleep=None):
+        super().__init__('1m', grace_seconds=0.0, tolerance=interval, clock=clock, sleep=sleep)
+        self.period = interval
+        self.next_entry = self._next_on_grid(self.clock(), interval)
+
+    def wait(self):
+        woke = super().wait()
+        return None if woke is None else ('tick', woke[1])
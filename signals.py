@@ -0,0 +1,103 @@
+import numpy as np
+
+# Mum başına bit maskesindeki koşullar (sıra = bit numarası)
+CONDITIONS = (
+    'valid',            # indikatörler bu ve önceki mumda tanımlı
+    'above_ema',        # açılış ve kapanış EMA üstünde
+    'below_ema',        # açılış ve kapanış EMA altında
+    'donchian_long',    # high >= üst bant
+    'donchian_short',   # low <= alt bant
+    'long_candle',      # önceki mumun üst fitili küçük
+    'short_candle',     # önceki mumun alt fitili küçük
+    'macd_long',        # MACD > eşik ve histogram > 0
+    'macd_short',       # MACD < -eşik ve histogram < 0
+    'band_placement',   # bant EMA'nın doğru tarafında
+    'band_distance',    # bant genişliği / (4 * ATR) > oran
+    'long',             # tüm long koşulları (+ işlem modu)
+    'short',            # tüm short koşulları (+ işlem modu)
+)
+BIT = {name: 1 << i for i, name in enumerate(CONDITIONS)}
+
+LONG_REQUIRED = (BIT['valid'] | BIT['band_placement'] | BIT['band_distance'] |
+                 BIT['above_ema'] | BIT['donchian_long'] | BIT['long_candle'] | BIT['macd_long'])
+SHORT_REQUIRED = (BIT['valid'] | BIT['band_placement'] | BIT['band_distance'] |
+                  BIT['below_ema'] | BIT['donchian_short'] | BIT['short_candle'] | BIT['macd_short'])
+
+MASK_DTYPE = np.uint16
+
+
+def condition_mask(open_, high, low, close, ind, macd_threshold=100.0, band_atr_ratio=1.0,
+                   wick_points=3.0, trading_mode='both'):
+    """check_entry_conditions kurallarını tüm pencere için tek geçişte değerlendir.
+
+    `ind` indikatör adı -> dizi eşlemesidir (StrategySet.compute_arrays çıktısı
+    veya DataFrame). Her mum için hangi koşulların sağlandığını gösteren
+    uint16 maske döner; 'long'/'short' bitleri giriş kararıdır.
+    """
+    open_, high, low, close = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    ema = np.asarray(ind['ema200'], dtype=np.float64)
+    atr = np.asarray(ind['atr'], dtype=np.float64)
+    upper = np.asarray(ind['upper_band'], dtype=np.float64)
+    lower = np.asarray(ind['lower_band'], dtype=np.float64)
+    macd = np.asarray(ind['macd'], dtype=np.float64)
+    macd_hist = np.asarray(ind['macd_hist'], dtype=np.float64)
+    band_distance_vs_atr = np.asarray(ind['band_distance_vs_atr'], dtype=np.float64)
+    n = len(close)
+
+    above_ema = (close > ema) & (open_ > ema)
+    below_ema = (close < ema) & (open_ < ema)
+
+    # Önceki mumun fitil koşulu (ilk mumun öncesi yok)
+    long_candle = np.zeros(n, dtype=bool)
+    short_candle = np.zeros(n, dtype=bool)
+    prev_open, prev_high, prev_low, prev_close = open_[:-1], high[:-1], low[:-1], close[:-1]
+    upper_wick = prev_high - prev_close
+    lower_wick = prev_close - prev_low
+    long_candle[1:] = (upper_wick < (prev_close - prev_open) / 2) | (upper_wick < wick_points)
+    short_candle[1:] = (lower_wick < (prev_open - prev_close) / 2) | (lower_wick < wick_points)
+
+    valid = ~(np.isnan(ema) | np.isnan(atr) | np.isnan(upper) | np.isnan(macd))
+    valid[1:] &= valid[:-1]
+    if n:
+        valid[0] = False
+
+    conditions = {
+        'valid': valid,
+        'above_ema': above_ema,
+        'below_ema': below_ema,
+        'donchian_long': high >= upper,
+        'donchian_short': low <= lower,
+        'long_candle': long_candle,
+        'short_candle': short_candle,
+        'macd_long': (macd > macd_threshold) & (macd_hist > 0),
+        'macd_short': (macd < -macd_threshold) & (macd_hist < 0),
+        'band_placement': ~((above_ema & (upper < ema)) | (below_ema & (lower > ema))),
+        'band_distance': band_distance_vs_atr > band_atr_ratio,
+    }
+    mask = np.zeros(n, dtype=MASK_DTYPE)
+    for name, held in conditions.items():
+        mask |= held.astype(MASK_DTYPE) << CONDITIONS.index(name)
+
+    if trading_mode != 'short':
+        mask[(mask & LONG_REQUIRED) == LONG_REQUIRED] |= BIT['long']
+    if trading_mode != 'long':
+        mask[(mask & SHORT_REQUIRED) == SHORT_REQUIRED] |= BIT['short']
+    return mask
+
+
+def has(mask, name):
+    """Maske (dizi veya tek değer) içinde koşul sağlanmış mı"""
+    return (mask & BIT[name]) != 0
+
+
+def conditions_at(value):
+    """Tek mumun maskesindeki sağlanan koşulların adları"""
+    value = int(value)
+    return [name for name in CONDITIONS if value & BIT[name]]
+
+
+def missing_for(value, side):
+    """Giriş için eksik kalan koşullar ('long' veya 'short')"""
+    value = int(value)
+    required = LONG_REQUIRED if side == 'long' else SHORT_REQUIRED
+    return [name for name in CONDITIONS if required & BIT[name] and not value & BIT[name]]
@@ -0,0 +1,110 @@
+import logging
+import os
+import pickle
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 4
+
+
+def load_snapshot(path):
+    """Anlık görüntüyü oku; yoksa, bozuksa veya sürümü farklıysa None.
+
+    Dosya botun kendi yazdığı yerel dosyadır (pickle); dışarıdan gelen
+    dosyalar yüklenmemelidir.
+    """
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Anlık görüntü okunamadı ({path}): {e}")
+        return None
+
+    if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+        logger.warning(f"Anlık görüntü sürümü uyumsuz, yok sayıldı ({path})")
+        return None
+    return snapshot
+
+
+class SnapshotWriter:
+    """Motor durumunu periyodik ve atomik olarak diske yazan yardımcı.
+
+    save() durumu çağıran thread'de serileştirir (tutarlı kopya), diske
+    yazma ve fsync arka plan thread'inde yapılır. Yazılmayı bekleyen eski
+    görüntü varsa yenisi onun yerine geçer. Dosya önce geçici isme yazılıp
+    os.replace ile değiştirilir; çökme anında ya eski ya yeni görüntü kalır.
+    """
+
+    def __init__(self, path, interval=60):
+        self.path = path
+        self.interval = interval
+        self.last_saved = 0.0
+        self.writes = 0
+        self.last_size = 0
+        self.last_duration = 0.0
+
+        self._pending = None
+        self._busy = False
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='state-snapshot')
+        self._thread.start()
+
+    def due(self):
+        return time.time() - self.last_saved >= self.interval
+
+    def save(self, state):
+        data = pickle.dumps({'version': SNAPSHOT_VERSION, 'saved_at': time.time(), 'state': state},
+                            protocol=pickle.HIGHEST_PROTOCOL)
+        self.last_saved = time.time()
+        with self._cond:
+            self._pending = data
+            self._cond.notify_all()
+
+    def close(self, timeout=5.0):
+        """Bekleyen görüntüyü yaz ve thread'i durdur; süre yetmezse False"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            while self._pending is not None or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.error(f"Anlık görüntü {timeout} sn içinde yazılamadı")
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+                data, self._pending = self._pending, None
+                self._busy = True
+            try:
+                self._write(data)
+            except OSError as e:
+                logger.error(f"Anlık görüntü yazılamadı ({self.path}): {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _write(self, data):
+        started = time.monotonic()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.writes += 1
+        self.last_size = len(data)
+        self.last_duration = time.monotonic() - started
@@ -0,0 +1,193 @@
+import importlib
+
+import numpy as np
+
+from indicator_graph import ATR, EMA, MACD, BandDistanceVsATR, Donchian, IndicatorGraph, compute_graph_arrays, resolve
+from signals import condition_mask, has
+
+
+class Strategy:
+    """Strateji eklentisi.
+
+    indicators() ihtiyaç duyulan indikatörleri takma adlarla bildirir:
+    {'ad': (Indicator, çıktı)}. evaluate() bu adlarla gelen dizilerden mum
+    başına signals.BIT maskesi üretir; en az 'long'/'short' bitleri
+    kullanılır, 'above_ema' biti trend gösterimi içindir.
+    """
+
+    name = 'strategy'
+    defaults = {}
+
+    def __init__(self, **params):
+        self.params = {**self.defaults, **params}
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(f'{k}={v}' for k, v in sorted(self.params.items()))})"
+
+    def indicators(self):
+        raise NotImplementedError
+
+    def evaluate(self, open_, high, low, close, ind, trading_mode='both'):
+        raise NotImplementedError
+
+
+class DonchianEmaMacd(Strategy):
+    """Botun özgün kuralları: Donchian kırılımı + EMA trendi + MACD (bkz. signals)"""
+
+    name = 'donchian_ema_macd'
+    defaults = {
+        'ema_period': 200,
+        'donchian_period': 20,
+        'atr_period': 14,
+        'macd_fast': 12,
+        'macd_slow': 26,
+        'macd_signal': 9,
+        'macd_threshold': 100,
+        'band_atr_ratio': 1.0,
+        'wick_points': 3,
+    }
+
+    def indicators(self):
+        p = self.params
+        donchian = Donchian(p['donchian_period'])
+        atr = ATR(p['atr_period'])
+        macd = MACD(p['macd_fast'], p['macd_slow'], p['macd_signal'])
+        # Takma adlar calculate_indicators'ın eski kolon adlarıyla aynı
+        return {
+            'ema200': (EMA(p['ema_period']), 'value'),
+            'atr': (atr, 'value'),
+            'upper_band': (donchian, 'upper'),
+            'lower_band': (donchian, 'lower'),
+            'middle_band': (donchian, 'middle'),
+            'band_distance': (donchian, 'distance'),
+            'band_distance_vs_atr': (BandDistanceVsATR(p['donchian_period'], p['atr_period']), 'value'),
+            'macd': (macd, 'macd'),
+            'macd_signal': (macd, 'signal'),
+            'macd_hist': (macd, 'hist'),
+        }
+
+    def evaluate(self, open_, high, low, close, ind, trading_mode='both'):
+        p = self.params
+        return condition_mask(open_, high, low, close, ind, macd_threshold=p['macd_threshold'],
+                              band_atr_ratio=p['band_atr_ratio'], wick_points=p['wick_points'],
+                              trading_mode=trading_mode)
+
+
+STRATEGIES = {DonchianEmaMacd.name: DonchianEmaMacd}
+
+
+def config_strategies(config):
+    """Config'teki strateji tanımları; yoksa eski tekil ayarlarla özgün kurallar"""
+    return config.get('strategies') or [{'name': DonchianEmaMacd.name, 'params': {
+        'ema_period': config.get('ema_period', 200),
+        'donchian_period': config.get('donchian_period', 20),
+        'macd_threshold': config.get('macd_threshold', 100),
+    }}]
+
+
+def load_strategy(spec):
+    """Config girdisinden strateji: 'ad', 'paket.modul:Sinif' veya {'name': ..., 'params': {...}}"""
+    if isinstance(spec, Strategy):
+        return spec
+    if isinstance(spec, str):
+        spec = {'name': spec}
+    name = spec['name']
+    if name in STRATEGIES:
+        cls = STRATEGIES[name]
+    elif ':' in name:
+        module_name, class_name = name.split(':', 1)
+        cls = getattr(importlib.import_module(module_name), class_name)
+    else:
+        raise ValueError(f"Bilinmeyen strateji: {name}")
+    return cls(**spec.get('params', {}))
+
+
+class StrategySet:
+    """Birlikte çalışan stratejiler ve ortak indikatör grafiğinin kolon adları.
+
+    İlk strateji birincildir: kolonları takma adlarıyla (ör. 'atr') DataFrame'e
+    yazılır, pozisyon seviyeleri bunlardan hesaplanır. Diğer stratejilerin
+    birincille ortak olmayan indikatörleri 'EMA(50)', 'Donchian(55).upper'
+    gibi adlarla eklenir; ortak olanlar tekrar hesaplanmaz/yazılmaz.
+    Isınması bitmemiş mumlarda her stratejinin sinyali kendi kolonlarına
+    göre ayrı ayrı susturulur; kısa ısınmalı strateji uzun olanı beklemez.
+    """
+
+    def __init__(self, strategies):
+        if not strategies:
+            raise ValueError("En az bir strateji gerekli")
+        self.strategies = list(strategies)
+        self.primary = self.strategies[0]
+
+        wanted = [strategy.indicators() for strategy in self.strategies]
+        self.indicators = resolve(indicator for aliases in wanted for indicator, _ in aliases.values())
+
+        names = {}
+        for alias, (indicator, output) in wanted[0].items():
+            names.setdefault((indicator.key, output), alias)
+        for indicator in self.indicators:
+            for output in indicator.outputs:
+                label = repr(indicator) if output == 'value' else f"{indicator!r}.{output}"
+                names.setdefault((indicator.key, output), label)
+        self.column_names = names
+
+        # Strateji başına takma ad -> DataFrame kolon adı
+        self.bindings = [
+            {alias: names[(indicator.key, output)] for alias, (indicator, output) in aliases.items()}
+            for aliases in wanted
+        ]
+
+        # En uzun ısınma + kuralların baktığı önceki mum + değerlendirilen son mum
+        self.min_history = max(indicator.lookback() for indicator in self.indicators) + 2
+
+    def history_limit(self, minimum=500):
+        """Çekilecek/tutulacak mum sayısı: ısınmadan sonra en az ısınma kadar mum kalsın"""
+        return max(minimum, 2 * self.min_history)
+
+    @property
+    def signature(self):
+        """İndikatör motoru önbellek anahtarı (aynı grafik = aynı motor)"""
+        return tuple(indicator.key for indicator in self.indicators)
+
+    def graph(self, capacity=500):
+        return IndicatorGraph(self.indicators, capacity=capacity)
+
+    def named(self, arrays):
+        """compute_graph_arrays çıktısını {DataFrame kolon adı: dizi} olarak adlandır"""
+        return {self.column_names[column]: values for column, values in arrays.items()}
+
+    def compute_arrays(self, ohlcv):
+        """Tüm geçmiş için vektörel kolonlar (backtest/tarama); her indikatör bir kez"""
+        return self.named(compute_graph_arrays(ohlcv, self.indicators))
+
+    def frame_columns(self, graph):
+        """graph.view() kolonlarının (timestamp hariç) DataFrame adları, sırasıyla"""
+        return [self.column_names[column] for column in graph.columns]
+
+    def evaluate(self, columns, trading_mode='both'):
+        """{kolon adı: dizi} penceresinden [(strateji, maske)]"""
+        results = []
+        for strategy, binding in zip(self.strategies, self.bindings):
+            ind = {alias: columns[name] for alias, name in binding.items()}
+            mask = strategy.evaluate(columns['open'], columns['high'], columns['low'], columns['close'],
+                                     ind, trading_mode=trading_mode)
+            # Bu stratejinin kolonlarından biri henüz boşsa o mumda sinyali yok
+            warm = np.ones(len(mask), dtype=bool)
+            for values in ind.values():
+                warm &= ~np.isnan(np.asarray(values, dtype=np.float64))
+            mask[~warm] = 0
+            results.append((strategy, mask))
+        return results
+
+    def entry_signals(self, columns, trading_mode='both'):
+        """Mum başına (long, short) bool dizileri; aynı mumda config sırasında ilk sinyal geçerli"""
+        n = len(columns['close'])
+        long_signal = np.zeros(n, dtype=bool)
+        short_signal = np.zeros(n, dtype=bool)
+        decided = np.zeros(n, dtype=bool)
+        for _, mask in self.evaluate(columns, trading_mode=trading_mode):
+            is_long, is_short = has(mask, 'long') & ~decided, has(mask, 'short') & ~decided
+            long_signal |= is_long
+            short_signal |= is_short
+            decided |= is_long | is_short
+        return long_signal, short_signal
@@ -0,0 +1,155 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+from multiprocessing import shared_memory
+import os
+import time
+
+import numpy as np
+
+from backtest import (DEFAULT_PARAMS, add_data_arguments, build_strategies, ignored_grid_keys, load_ohlcv_from_args,
+                      load_strategy_specs, run_backtest)
+from indicator_graph import compute_graph_arrays
+
+# Worker süreç durumu (_init_worker ile doldurulur)
+_shm = None
+_ohlcv = None
+_specs = None
+_indicator_cache = {}
+
+
+def build_grid(grid):
+    """{'donchian_period': [10, 20], ...} ızgarasından parametre kombinasyonları üret"""
+    keys = list(grid)
+    combos = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    # Aynı indikatör dizilerini paylaşan kombinasyonlar aynı worker'a düşsün
+    combos.sort(key=lambda c: (c.get('ema_period', DEFAULT_PARAMS['ema_period']),
+                               c.get('donchian_period', DEFAULT_PARAMS['donchian_period'])))
+    return combos
+
+
+def share_array(array):
+    """Diziyi paylaşımlı belleğe kopyala, (shm, shape, dtype) döndür"""
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, array.shape, array.dtype.str
+
+
+def attach_array(name, shape, dtype):
+    """Paylaşımlı bellekteki diziye kopyasız bağlan"""
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _init_worker(name, shape, dtype, specs=None):
+    global _shm, _ohlcv, _specs
+    _shm, _ohlcv = attach_array(name, shape, dtype)
+    _specs = specs
+    _indicator_cache.clear()
+
+
+def cached_indicators(ohlcv, cache, strategies):
+    """Aynı indikatör grafiği için dizileri bir kez hesapla (ör. sadece eşikler farklıysa)"""
+    key = strategies.signature
+    if key not in cache:
+        cache[key] = compute_graph_arrays(ohlcv, strategies.indicators)
+    return strategies.named(cache[key])
+
+
+def _run_combo(params, initial_balance):
+    strategies = build_strategies(params, _specs)
+    ind = cached_indicators(_ohlcv, _indicator_cache, strategies)
+    result = run_backtest(_ohlcv, params, initial_balance=initial_balance, indicators=ind, strategies=strategies)
+    return {**params, **result['summary']}
+
+
+def run_sweep(ohlcv, grid, workers=None, initial_balance=10000.0, sort_by='total_return', strategies=None):
+    """Parametre ızgarasını tüm çekirdeklerde backtest et, sonuçları sırala.
+
+    `strategies` config strateji tanımlarıdır (yoksa özgün kurallar); ızgara
+    birincil stratejinin parametrelerini ezer.
+    """
+    combos = build_grid(grid)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(combos) // (workers * 4))
+
+    shm, shape, dtype = share_array(np.asarray(ohlcv, dtype=np.float64))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, shape, dtype, strategies)) as pool:
+            results = list(pool.map(_run_combo, combos, itertools.repeat(initial_balance),
+                                    chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    reverse = sort_by != 'max_drawdown'
+    results.sort(key=lambda r: r[sort_by], reverse=reverse)
+    return results
+
+
+def format_table(results, top=20):
+    """Sıralı sonuçları düz metin tablo olarak biçimlendir"""
+    if not results:
+        return "Sonuç yok"
+    param_keys = [k for k in results[0] if k not in
+                  ('total_return', 'max_drawdown', 'trade_count', 'win_rate', 'final_balance')]
+    header = param_keys + ['return%', 'maxDD%', 'trades', 'win%']
+    lines = ['  '.join(f"{h:>15}" for h in header)]
+    for r in results[:top]:
+        cells = [str(r[k]) for k in param_keys] + [
+            f"{r['total_return'] * 100:+.2f}",
+            f"{r['max_drawdown'] * 100:.2f}",
+            str(r['trade_count']),
+            f"{r['win_rate'] * 100:.1f}",
+        ]
+        lines.append('  '.join(f"{c:>15}" for c in cells))
+    return '\n'.join(lines)
+
+
+def _parse_list(value, cast=float):
+    return [cast(v) for v in value.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Paralel parametre taraması')
+    add_data_arguments(parser)
+    parser.add_argument('--config', default=None, help='stratejiler bu config.json dosyasından okunur')
+    parser.add_argument('--donchian-period', default='20', help='örnek: 10,20,30')
+    parser.add_argument('--ema-period', default='200', help='örnek: 100,200')
+    parser.add_argument('--stop-atr-mult', default='2', help='örnek: 1.5,2,2.5')
+    parser.add_argument('--target-atr-mult', default='4', help='örnek: 3,4,5')
+    parser.add_argument('--macd-threshold', default='100', help='örnek: 50,100')
+    parser.add_argument('--mode', choices=['long', 'short', 'both'], default='both')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--sort', default='total_return',
+                        choices=['total_return', 'max_drawdown', 'trade_count', 'win_rate'])
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    grid = {
+        'donchian_period': _parse_list(args.donchian_period, int),
+        'ema_period': _parse_list(args.ema_period, int),
+        'stop_atr_mult': _parse_list(args.stop_atr_mult),
+        'target_atr_mult': _parse_list(args.target_atr_mult),
+        'macd_threshold': _parse_list(args.macd_threshold),
+        'trading_mode': [args.mode],
+    }
+
+    specs = load_strategy_specs(args.config)
+    ignored = ignored_grid_keys(grid, specs)
+    if ignored:
+        print(f"⚠️ Birincil strateji bu parametreleri kullanmıyor: {', '.join(ignored)}")
+
+    ohlcv = load_ohlcv_from_args(args)
+    started = time.perf_counter()
+    results = run_sweep(ohlcv, grid, workers=args.workers, sort_by=args.sort, strategies=specs)
+    elapsed = time.perf_counter() - started
+
+    print(f"🔢 {len(results)} kombinasyon, {elapsed:.1f} sn")
+    print(format_table(results, top=args.top))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class _Outgoing:
+    __slots__ = ('chat_id', 'payload', 'coalesce_key', 'enqueued_at', 'attempts')
+
+    def __init__(self, chat_id, payload, coalesce_key):
+        self.chat_id = chat_id
+        self.payload = payload
+        self.coalesce_key = coalesce_key
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class TelegramDispatcher:
+    """Giden Telegram mesajları için arka plan kuyruğu.
+
+    Trading thread'i sadece enqueue() maliyetini öder. Worker sohbet başına
+    en az `per_chat_interval` saniye arayla gönderir, 429 cevabındaki
+    retry_after süresine uyar, ağ hatalarında artan beklemeyle tekrar dener.
+    Aynı coalesce_key ile kuyrukta bekleyen mesaj varsa yenisi onun yerine
+    geçer (ör. art arda basılan "Yenile" butonları).
+    """
+
+    def __init__(self, send_func, per_chat_interval=1.0, max_retries=5, max_queue=1000, on_sent=None):
+        self.send_func = send_func
+        self.on_sent = on_sent
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        self.max_queue = max_queue
+
+        self._queue = deque()
+        self._pending_keys = {}
+        self._last_sent = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._busy = False
+        self._thread = None
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+
+    def start(self):
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name='telegram-dispatcher')
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def depth(self):
+        return len(self._queue)
+
+    def enqueue(self, chat_id, payload, coalesce_key=None):
+        """Mesajı kuyruğa ekle; gönderim arka planda yapılır"""
+        with self._cond:
+            if coalesce_key is not None:
+                existing = self._pending_keys.get((chat_id, coalesce_key))
+                if existing is not None:
+                    existing.payload = payload
+                    self.coalesced += 1
+                    return True
+
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                logger.warning("Telegram kuyruğu dolu, mesaj atıldı")
+                return False
+
+            item = _Outgoing(chat_id, payload, coalesce_key)
+            self._queue.append(item)
+            if coalesce_key is not None:
+                self._pending_keys[(chat_id, coalesce_key)] = item
+            self._cond.notify()
+            return True
+
+    def flush(self, timeout=5.0):
+        """Kuyruk boşalana kadar (en fazla `timeout` sn) bekle"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._queue or self._busy) and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self):
+        return {
+            'queue_depth': self.depth(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+            'last_latency': self.last_latency,
+            'avg_latency': self._latency_total / self.sent if self.sent else 0.0,
+            'max_latency': self.max_latency,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running and not self._queue:
+                    return
+                item = self._queue.popleft()
+                if item.coalesce_key is not None:
+                    self._pending_keys.pop((item.chat_id, item.coalesce_key), None)
+                self._busy = True
+
+            try:
+                self._deliver(item)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _deliver(self, item):
+        delay = 1.0
+        while True:
+            # Sohbet başına hız limiti
+            wait = self._last_sent.get(item.chat_id, 0) + self.per_chat_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            item.attempts += 1
+            retry_after = None
+            try:
+                result = self.send_func(item.payload)
+                self._last_sent[item.chat_id] = time.monotonic()
+                if result.get('ok'):
+                    latency = time.monotonic() - item.enqueued_at
+                    self.sent += 1
+                    self.last_latency = latency
+                    self.max_latency = max(self.max_latency, latency)
+                    self._latency_total += latency
+                    if self.on_sent is not None:
+                        self.on_sent(latency)
+                    return
+                if result.get('error_code') == 429:
+                    retry_after = result.get('parameters', {}).get('retry_after', delay)
+                elif result.get('error_code', 500) < 500:
+                    # 400/403 gibi kalıcı hatalar tekrar denenmez
+                    logger.error(f"Telegram mesaj hatası: {result}")
+                    self.failed += 1
+                    return
+            except Exception as e:
+                logger.error(f"Telegram gönderme hatası: {e}")
+
+            if item.attempts >= self.max_retries:
+                self.failed += 1
+                logger.error(f"Telegram mesajı {item.attempts} denemeden sonra gönderilemedi")
+                return
+            self.retries += 1
+            time.sleep(retry_after if retry_after is not None else delay)
+            delay = min(delay * 2, 30)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Modüller depo kökünde düz dosyalar
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_ohlcv(n=2000, seed=42, step_ms=900_000):
+    """Rastgele yürüyüşten sentetik (n, 6) OHLCV dizisi"""
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 50, n))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    high = np.maximum(open_, close) + rng.uniform(0, 40, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 40, n)
+    ts = np.arange(n) * step_ms + 1_600_000_000_000
+    return np.column_stack([ts, open_, high, low, close, rng.uniform(1, 100, n)]).astype(np.float64)
+
+
+@pytest.fixture
+def ohlcv():
+    return make_ohlcv()
@@ -0,0 +1,86 @@
+import numpy as np
+
+from backtest import run_backtest, simulate, summarize
+
+
+def _bars(closes, highs=None, lows=None):
+    closes = np.asarray(closes, dtype=np.float64)
+    highs = closes + 1 if highs is None else np.asarray(highs, dtype=np.float64)
+    lows = closes - 1 if lows is None else np.asarray(lows, dtype=np.float64)
+    ts = np.arange(len(closes)) * 900_000.0
+    return np.column_stack([ts, closes, highs, lows, closes, np.ones(len(closes))])
+
+
+def _run(ohlcv, atr=10.0, long_at=(), short_at=(), **kwargs):
+    n = len(ohlcv)
+    ind = {'atr': np.full(n, atr) if np.isscalar(atr) else np.asarray(atr, dtype=np.float64)}
+    long_signal = np.zeros(n, dtype=bool)
+    short_signal = np.zeros(n, dtype=bool)
+    long_signal[list(long_at)] = True
+    short_signal[list(short_at)] = True
+    return simulate(ohlcv, ind, long_signal, short_signal, **kwargs)
+
+
+def test_long_take_profit_and_sizing():
+    # Giriş 100, ATR 10: SL 80, TP 140; risk %2 -> 200 / 20 = 10 adet
+    ohlcv = _bars([100, 110, 120, 130, 139], highs=[101, 111, 121, 131, 141])
+    trades, equity, open_position = _run(ohlcv, long_at=[0])
+    assert open_position is None
+    (trade,) = trades
+    assert (trade['exit_reason'], trade['exit_index'], trade['exit_price']) == ('take_profit', 4, 140.0)
+    assert trade['position_size'] == 10.0
+    assert trade['profit'] == 400.0
+    assert equity[-1] == 10400.0
+
+
+def test_stop_loss_wins_when_both_levels_hit_in_one_bar():
+    ohlcv = _bars([100, 100], highs=[101, 150], lows=[99, 70])
+    (trade,), _, _ = _run(ohlcv, long_at=[0])
+    assert (trade['exit_reason'], trade['exit_price']) == ('stop_loss', 80.0)
+
+    (trade,), _, _ = _run(ohlcv, short_at=[0])
+    assert (trade['side'], trade['exit_reason'], trade['exit_price']) == ('short', 'stop_loss', 120.0)
+
+
+def test_cvd_exit_on_atr_spike_against_the_position():
+    ohlcv = _bars([100, 101, 99, 98])
+    atr = [10, 10, 16, 16]
+    (trade,), _, _ = _run(ohlcv, atr=atr, long_at=[0])
+    assert (trade['exit_reason'], trade['exit_index'], trade['exit_price']) == ('cvd_exit', 2, 99.0)
+
+
+def test_end_of_data_closes_or_carries_the_position():
+    ohlcv = _bars([100, 101, 102])
+    (trade,), _, _ = _run(ohlcv, long_at=[0])
+    assert (trade['exit_reason'], trade['exit_index'], trade['exit_price']) == ('end_of_data', 2, 102.0)
+
+    trades, equity, open_position = _run(ohlcv, long_at=[0], close_at_end=False)
+    assert trades == [] and open_position['entry_index'] == 0
+    # Açık pozisyon mum kapanışından değerlenir
+    np.testing.assert_allclose(equity, [10000.0, 10010.0, 10020.0])
+
+
+def test_zero_atr_skips_the_entry():
+    ohlcv = _bars([100, 101, 102, 103])
+    trades, equity, _ = _run(ohlcv, atr=[0, 0, 10, 10], long_at=[0, 2])
+    assert [t['entry_index'] for t in trades] == [2]
+
+
+def test_drawdown_inside_an_open_trade_is_reported():
+    # Pozisyon TP'ye gitmeden önce stop'a yaklaşır: gerçekleşen kâr pozitif, düşüş yine görünür
+    ohlcv = _bars([100, 85, 90, 139], highs=[101, 86, 91, 141], lows=[99, 84, 89, 138])
+    trades, equity, _ = _run(ohlcv, long_at=[0])
+    assert trades[0]['exit_reason'] == 'take_profit'
+    summary = summarize(trades, equity)
+    np.testing.assert_allclose(summary['max_drawdown'], 150 / 10000)
+    assert summary['final_balance'] == 10400.0
+
+
+def test_run_backtest_uses_vectorised_strategy_columns(ohlcv):
+    result = run_backtest(ohlcv, {'ema_period': 50, 'donchian_period': 10, 'macd_threshold': 20})
+    assert result['summary']['trade_count'] == len(result['trades']) > 0
+    assert len(result['equity']) == len(ohlcv)
+    entries = [t['entry_index'] for t in result['trades']]
+    exits = [t['exit_index'] for t in result['trades']]
+    # Tek pozisyon: yeni giriş önceki çıkıştan sonra
+    assert all(entry > exit_ for entry, exit_ in zip(entries[1:], exits))
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from exchange_gateway import ExchangeGateway
+
+
+class SlowClient:
+    """İlk çağrıyı `release` açılana kadar bekleten sahte ccxt istemcisi"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.requests = []
+        self.fail = False
+
+    def fetch_ticker(self, symbol, params=None):
+        self.requests.append(('fetch_ticker', symbol, params))
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError('borsa hatası')
+        return {'symbol': symbol, 'last': 100.0, 'params': params}
+
+    def fetch_balance(self, params=None):
+        self.requests.append(('fetch_balance', params))
+        self.release.wait(5)
+        return {'type': (params or {}).get('type', 'spot')}
+
+
+def _run_concurrently(gateway, calls, waiters):
+    """Çağrıları ayrı iş parçacıklarında başlat, `waiters` kadar isteğin birleşmesini bekle"""
+    results = [None] * len(calls)
+
+    def run(i, call):
+        try:
+            results[i] = call()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i, call)) for i, call in enumerate(calls)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while gateway.coalesced < waiters and time.monotonic() < deadline:
+        time.sleep(0.001)
+    gateway.client.release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_concurrent_tickers_share_one_request():
+    gateway = ExchangeGateway(SlowClient())
+    results = _run_concurrently(gateway, [lambda: gateway.fetch_ticker('BTC/USDT')] * 5, waiters=4)
+
+    assert len(gateway.client.requests) == 1
+    assert all(result is results[0] for result in results)
+    assert gateway.stats()['calls'] == 1
+    assert gateway.stats()['coalesced'] == 4
+    assert gateway.stats()['inflight'] == 0
+
+
+def test_different_params_are_not_coalesced():
+    gateway = ExchangeGateway(SlowClient())
+    calls = [lambda: gateway.fetch_balance(),
+             lambda: gateway.fetch_balance({'type': 'future'}),
+             lambda: gateway.fetch_balance({'type': 'future'}),
+             lambda: gateway.fetch_ticker('BTC/USDT', {'type': 'future'}),
+             lambda: gateway.fetch_ticker('BTC/USDT')]
+    spot, future, future_again, future_ticker, spot_ticker = _run_concurrently(gateway, calls, waiters=1)
+
+    assert len(gateway.client.requests) == 4
+    assert spot == {'type': 'spot'}
+    assert future == {'type': 'future'}
+    assert future_again is future
+    assert future_ticker['params'] == {'type': 'future'}
+    assert spot_ticker['params'] is None
+
+
+def test_leader_error_reaches_every_waiter():
+    gateway = ExchangeGateway(SlowClient())
+    gateway.client.fail = True
+    results = _run_concurrently(gateway, [lambda: gateway.fetch_ticker('BTC/USDT')] * 3, waiters=2)
+
+    assert len(gateway.client.requests) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # Hata uçuştaki kaydı temizler: sonraki çağrı yeni istek yapar
+    gateway.client.fail = False
+    assert gateway.fetch_ticker('BTC/USDT')['last'] == 100.0
+    assert len(gateway.client.requests) == 2
+
+
+def test_gather_keeps_order_and_returns_errors_in_place():
+    gateway = ExchangeGateway(SlowClient(), max_workers=3)
+    gateway.client.release.set()
+
+    def boom():
+        raise ValueError('kötü istek')
+
+    ticker, error, balance = gateway.gather(lambda: gateway.fetch_ticker('ETH/USDT'), boom,
+                                            lambda: gateway.fetch_balance())
+    assert ticker['symbol'] == 'ETH/USDT'
+    assert isinstance(error, ValueError)
+    assert balance == {'type': 'spot'}
+
+
+def test_gather_runs_calls_concurrently():
+    gateway = ExchangeGateway(SlowClient(), max_workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+    # İki çağrı da bariyerde buluşmadan ilerleyemez: sırayla çalışsa zaman aşımı olur
+    assert gateway.gather(barrier.wait, barrier.wait) in ([0, 1], [1, 0])
+
+
+def test_other_methods_pass_through():
+    gateway = ExchangeGateway(SlowClient())
+    assert gateway.requests is gateway.client.requests
+    with pytest.raises(AttributeError):
+        gateway.create_order
@@ -0,0 +1,144 @@
+import threading
+import time
+
+from exchange_pool import ExchangeClientPool, RateLimiter
+
+
+def test_burst_within_capacity_does_not_wait():
+    limiter = RateLimiter(rate_per_second=100)
+    started = time.monotonic()
+    for _ in range(100):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_weight_above_capacity_waits_off_the_debt():
+    limiter = RateLimiter(rate_per_second=100)
+    started = time.monotonic()
+    limiter.acquire(150)  # kapasite 100: 50 jetonluk borç, ~0.5 sn
+    elapsed = time.monotonic() - started
+    assert 0.4 < elapsed < 2.0
+
+
+def test_concurrent_requests_share_the_budget():
+    limiter = RateLimiter(rate_per_second=200)
+    threads = [threading.Thread(target=limiter.acquire, args=(40,)) for _ in range(10)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    # 400 ağırlık, 200 kapasite, 200/sn: en az ~1 sn
+    assert not any(thread.is_alive() for thread in threads)
+    assert time.monotonic() - started >= 0.9
+
+
+class FakeClient:
+    """ccxt gibi: istekler throttle(cost) çağırır, market bilgisi tembel yüklenir"""
+
+    def __init__(self, options, load_seconds=0.0):
+        self.options = options
+        self.load_seconds = load_seconds
+        self.markets = None
+        self.loads = []
+        self.fail = False
+
+    def throttle(self, cost=None):
+        raise AssertionError('havuz throttle() yönlendirmesini kurmadı')
+
+    def load_markets(self, reload=False, params={}):
+        if self.markets is not None and not reload:
+            return self.markets
+        self.loads.append(reload)
+        time.sleep(self.load_seconds)
+        if self.fail:
+            raise ConnectionError('exchangeInfo alınamadı')
+        self.markets = {'BTC/USDT': {'symbol': 'BTC/USDT', 'precision': {'amount': 5}}}
+        return self.markets
+
+    def fetch_ticker(self, symbol, params=None):
+        self.load_markets()
+        self.throttle(40)
+        return {'symbol': symbol, 'last': 100.0}
+
+    def market(self, symbol):
+        return self.markets[symbol]
+
+
+CONFIG = {'api_key': 'test', 'secret': 'test'}
+
+
+def _pool(clients, load_seconds=0.0, fail=False, **kwargs):
+    def factory(options):
+        client = FakeClient(options, load_seconds)
+        client.fail = fail
+        clients.append(client)
+        return client
+    return ExchangeClientPool(CONFIG, factory=factory, **kwargs)
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+def test_client_throttle_draws_from_shared_limiter(monkeypatch):
+    clients = []
+    pool = _pool(clients, rate_limit=1000)
+    weights = []
+    acquire = pool.limiter.acquire
+    monkeypatch.setattr(pool.limiter, 'acquire', lambda weight=1.0: (weights.append(weight), acquire(weight)))
+
+    pool.get('spot').fetch_ticker('BTC/USDT')
+    pool.get('futures').fetch_ticker('BTC/USDT')
+    clients[0].throttle()
+    assert weights == [40, 40, 1]
+    assert clients[1].options['options'] == {'defaultType': 'future'}
+    assert pool.get('spot') is pool.get('spot')
+    assert len(clients) == 2
+    pool.close()
+
+
+def test_markets_refresh_on_schedule_without_get():
+    clients = []
+    pool = _pool(clients, markets_ttl=0.05)
+    pool.get('spot')
+    # get() tekrar çağrılmadan periyodik yenilenir
+    assert _wait_for(lambda: len(clients[0].loads) >= 3)
+    pool.close()
+    assert not pool._refresher.is_alive()
+    loads = len(clients[0].loads)
+    time.sleep(0.1)
+    assert len(clients[0].loads) == loads
+    assert clients[0].loads[:3] == [False, True, True]
+
+
+def test_lazy_ccxt_load_waits_for_background_load():
+    clients = []
+    pool = _pool(clients, load_seconds=0.1)
+    client = pool.get('spot')
+    assert _wait_for(lambda: clients[0].loads)
+
+    # ccxt'nin istek içi load_markets() çağrısı ikinci bir yükleme başlatmaz
+    threads = [threading.Thread(target=client.fetch_ticker, args=('BTC/USDT',)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert clients[0].loads == [False]
+    assert pool.market('BTC/USDT')['precision'] == {'amount': 5}
+    assert clients[0].loads == [False]
+    pool.close()
+
+
+def test_failed_market_load_is_retried():
+    clients = []
+    pool = _pool(clients, fail=True, retry_seconds=0.05)
+    pool.get('spot')
+    assert _wait_for(lambda: len(clients[0].loads) >= 2)
+    clients[0].fail = False
+    assert _wait_for(lambda: clients[0].markets is not None)
+    assert 'spot' in pool._markets_loaded_at
+    pool.close()
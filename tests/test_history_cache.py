@@ -0,0 +1,41 @@
+import numpy as np
+
+from history_cache import HistoryCache
+
+
+def _exchange(rows=3000):
+    from bench import FakeExchange
+
+    return FakeExchange(['BTC/USDT'], timeframe='15m', rows=rows, headroom=0)
+
+
+def test_ensure_backfills_a_cache_that_starts_too_late(tmp_path):
+    exchange = _exchange()
+    data = exchange.data['BTC/USDT']
+    cache = HistoryCache('BTC/USDT', '15m', str(tmp_path))
+    # Sadece son 100 kapanmış mum var (son satır oluşmakta olan mum)
+    cache.append(data[-101:-1], now_ms=int(data[-1, 0]))
+
+    cache.ensure(exchange, 300)
+
+    stored = cache.load()
+    assert len(stored) >= 300
+    assert not cache.find_gaps()
+    np.testing.assert_array_equal(stored, data[-1 - len(stored):-1])
+
+
+def test_ensure_skips_the_gap_of_a_very_old_cache(tmp_path):
+    exchange = _exchange()
+    data = exchange.data['BTC/USDT']
+    cache = HistoryCache('BTC/USDT', '15m', str(tmp_path))
+    cache.append(data[:50], now_ms=int(data[-1, 0]))
+
+    added = cache.ensure(exchange, 300)
+
+    # Aradaki ~2600 mum indirilmez, sadece gereken pencere
+    assert 300 <= added < 400
+    assert exchange.calls <= 2
+    recent = cache.load(limit=300)
+    assert np.all(np.diff(recent[:, 0]) == 900_000)
+    np.testing.assert_array_equal(recent, data[-301:-1])
+    np.testing.assert_array_equal(cache.load()[:50], data[:50])
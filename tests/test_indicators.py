@@ -0,0 +1,77 @@
+import numpy as np
+
+from indicator_graph import IndicatorGraph, check_talib_parity, compute_graph_arrays
+from strategies import DonchianEmaMacd
+
+
+def _indicators(**params):
+    return [indicator for indicator, _ in DonchianEmaMacd(**params).indicators().values()]
+
+
+def test_graph_matches_talib(ohlcv):
+    assert check_talib_parity(ohlcv, _indicators()) == {}
+
+
+def test_graph_matches_talib_short_periods(ohlcv):
+    assert check_talib_parity(ohlcv[:300], _indicators(ema_period=50, donchian_period=10)) == {}
+
+
+def test_partial_candle_is_revised_when_closed(ohlcv):
+    indicators = _indicators()
+    expected = compute_graph_arrays(ohlcv, indicators)
+    graph = IndicatorGraph(indicators, capacity=len(ohlcv))
+    graph.update_many(ohlcv[:-1])
+
+    # Son mum önce yarım gelir, sonra kapanmış haliyle aynı zaman damgasıyla revize edilir
+    candle = ohlcv[-1]
+    partial = candle.copy()
+    partial[2] = partial[4] = candle[1]
+    partial[3] = min(candle[1], candle[3])
+    graph.update(partial)
+    assert len(graph.view()) == len(ohlcv)
+    graph.update(candle)
+    assert len(graph.view()) == len(ohlcv)
+
+    last = graph.view(1)[0]
+    for column, values in expected.items():
+        np.testing.assert_allclose(last[1 + graph.index[column]], values[-1], rtol=1e-9, atol=1e-6)
+
+
+def test_older_candle_is_ignored(ohlcv):
+    graph = IndicatorGraph(_indicators(), capacity=len(ohlcv))
+    graph.update_many(ohlcv[:500])
+    before = graph.view().copy()
+    assert graph.update(ohlcv[100]) is None
+    np.testing.assert_array_equal(graph.view(), before)
+
+
+def test_update_many_resumes_from_pending_candle(ohlcv):
+    whole = IndicatorGraph(_indicators(), capacity=len(ohlcv))
+    whole.update_many(ohlcv)
+    resumed = IndicatorGraph(_indicators(), capacity=len(ohlcv))
+    resumed.update_many(ohlcv[:1000])
+    # Örtüşen pencere: bekleyen mumdan itibaren devam eder
+    resumed.update_many(ohlcv[900:])
+    np.testing.assert_array_equal(resumed.view(), whole.view())
+
+
+def test_lookback_matches_leading_nans(ohlcv):
+    arrays = compute_graph_arrays(ohlcv, _indicators(ema_period=50, donchian_period=10))
+    graph = IndicatorGraph(_indicators(ema_period=50, donchian_period=10))
+    for node in graph.nodes:
+        for output in node.outputs:
+            values = arrays[(node.key, output)]
+            assert np.isnan(values[:node.lookback()]).all()
+            assert not np.isnan(values[node.lookback()])
+
+
+def test_rolling_extreme_matches_pandas(ohlcv):
+    import pandas as pd
+
+    from indicators import rolling_extreme
+
+    for period in (1, 20, 55):
+        np.testing.assert_array_equal(rolling_extreme(ohlcv[:, 2], period, 'max'),
+                                      pd.Series(ohlcv[:, 2]).rolling(period).max().to_numpy())
+        np.testing.assert_array_equal(rolling_extreme(ohlcv[:, 3], period, 'min'),
+                                      pd.Series(ohlcv[:, 3]).rolling(period).min().to_numpy())
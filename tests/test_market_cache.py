@@ -0,0 +1,140 @@
+import threading
+import time
+
+from market_cache import MarketDataCache
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Loader:
+    """Her çağrıda artan değer döndürür; `gate` açılana kadar bekleyebilir"""
+
+    def __init__(self):
+        self.calls = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        self.entered.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError('borsa yok')
+        return self.calls
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return predicate()
+
+
+def test_fresh_stale_and_expired_transitions():
+    clock = FakeClock()
+    cache = MarketDataCache(clock=clock)
+    loader = Loader()
+
+    assert cache.get('ticker', 'BTC/USDT', loader) == 1  # ilk istek: senkron yükleme
+    clock.now += 4.9
+    assert cache.get('ticker', 'BTC/USDT', loader) == 1  # taze
+    assert loader.calls == 1
+
+    clock.now += 0.2  # 5.1 sn: bayat, eski değer hemen döner
+    assert cache.get('ticker', 'BTC/USDT', loader) == 1
+    assert _wait_for(lambda: not cache._refreshing)
+    assert loader.calls == 2
+    assert cache.get('ticker', 'BTC/USDT', loader) == 2  # arka plan yenilemesi yazıldı
+
+    clock.now += 31.0  # bayat sınırı da aşıldı: senkron
+    assert cache.get('ticker', 'BTC/USDT', loader) == 3
+    assert cache.stats['ticker'] == {'hits': 2, 'stale_hits': 1, 'misses': 2}
+    assert cache.hit_ratio() == 3 / 5
+
+
+def test_stale_entry_starts_a_single_background_refresh():
+    clock = FakeClock()
+    cache = MarketDataCache(clock=clock)
+    loader = Loader()
+    cache.get('balance', 'spot', loader)
+
+    clock.now += 60.0
+    loader.gate.clear()
+    loader.entered.clear()
+    results = [cache.get('balance', 'spot', loader) for _ in range(20)]
+    assert loader.entered.wait(5)
+    # Yenileme sürerken gelen istekler bayat değeri alır, yeni yenileme başlatmaz
+    results += [cache.get('balance', 'spot', loader) for _ in range(20)]
+    assert results == [1] * 40
+    assert loader.calls == 2
+    assert cache.stats['balance']['stale_hits'] == 40
+
+    loader.gate.set()
+    assert _wait_for(lambda: not cache._refreshing)
+    assert cache.get('balance', 'spot', loader) == 2
+    assert loader.calls == 2
+
+
+def test_failed_refresh_keeps_stale_value_and_retries():
+    clock = FakeClock()
+    cache = MarketDataCache(clock=clock)
+    loader = Loader()
+    cache.get('ohlcv', ('BTC/USDT', '15m'), loader)
+
+    clock.now += 100.0
+    loader.fail = True
+    assert cache.get('ohlcv', ('BTC/USDT', '15m'), loader) == 1
+    assert _wait_for(lambda: not cache._refreshing)
+    assert loader.calls == 2
+
+    loader.fail = False
+    assert cache.get('ohlcv', ('BTC/USDT', '15m'), loader) == 1
+    assert _wait_for(lambda: not cache._refreshing)
+    assert loader.calls == 3
+    assert cache.get('ohlcv', ('BTC/USDT', '15m'), loader) == 3
+
+
+def test_keys_are_cached_separately():
+    clock = FakeClock()
+    cache = MarketDataCache(ttls={'ticker': (10, 10)}, clock=clock)
+    btc, eth = Loader(), Loader()
+    cache.get('ticker', 'BTC/USDT', btc)
+    cache.get('ticker', 'ETH/USDT', eth)
+    cache.get('ticker', 'BTC/USDT', btc)
+    assert (btc.calls, eth.calls) == (1, 1)
+
+    # Bayat penceresi sıfır: süresi geçen kayıt senkron yüklenir
+    clock.now += 10.0
+    assert cache.get('ticker', 'BTC/USDT', btc) == 2
+    assert not cache._refreshing
+
+
+def test_put_and_invalidate():
+    clock = FakeClock()
+    cache = MarketDataCache(clock=clock)
+    loader = Loader()
+
+    cache.put('ticker', 'BTC/USDT', {'last': 100.0})
+    assert cache.get('ticker', 'BTC/USDT', loader) == {'last': 100.0}
+    cache.put('balance', 'spot', 'bakiye')
+
+    cache.invalidate('ticker')
+    assert cache.get('ticker', 'BTC/USDT', loader) == 1
+    assert cache.get('balance', 'spot', loader) == 'bakiye'
+    cache.invalidate()
+    assert cache.get('balance', 'spot', loader) == 2
+
+
+def test_unknown_kind_is_never_cached():
+    cache = MarketDataCache(clock=FakeClock())
+    loader = Loader()
+    assert [cache.get('orderbook', 'BTC/USDT', loader) for _ in range(3)] == [1, 2, 3]
+    assert cache.stats['orderbook']['misses'] == 3
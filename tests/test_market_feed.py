@@ -0,0 +1,53 @@
+import threading
+
+from history_cache import HistoryCache
+
+
+def test_cold_warmup_downloads_outside_data_lock(tmp_path):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=600, headroom=10)
+    history_dir = str(tmp_path / 'history')
+    bot = make_bot(load_bot_module(), exchange, str(tmp_path), ['BTC/USDT'], {'history_dir': history_dir})
+
+    blocked = []
+    fetch_ohlcv = exchange.fetch_ohlcv
+
+    def checked_fetch(*args, **kwargs):
+        # İndirme sürerken başka bir thread (Telegram, portföy) data_lock'u alabilmeli
+        def probe():
+            if bot.data_lock.acquire(timeout=1):
+                bot.data_lock.release()
+            else:
+                blocked.append(args)
+
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return fetch_ohlcv(*args, **kwargs)
+
+    exchange.fetch_ohlcv = checked_fetch
+    df = bot.fetch_recent_data(limit=500)
+
+    assert not blocked
+    assert len(df)
+    assert len(HistoryCache('BTC/USDT', '15m', history_dir)) == len(df)
+
+
+def test_concurrent_warmups_do_not_duplicate_cached_rows(tmp_path):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=600, headroom=10)
+    history_dir = str(tmp_path / 'history')
+    bot = make_bot(load_bot_module(), exchange, str(tmp_path), ['BTC/USDT'], {'history_dir': history_dir})
+
+    threads = [threading.Thread(target=bot.fetch_recent_data) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    cache = HistoryCache('BTC/USDT', '15m', history_dir)
+    stored = cache.load()
+    assert len(stored) == len(set(stored[:, 0].tolist()))
+    assert not cache.find_gaps()
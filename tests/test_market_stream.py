@@ -0,0 +1,97 @@
+import json
+import time
+
+import numpy as np
+
+from history_cache import HistoryCache
+from market_stream import MarketStream, ReplayWebSocketServer, parse_message
+
+
+def kline_message(candle, closed, symbol='BTCUSDT', interval='15m'):
+    ts, open_, high, low, close, volume = candle
+    return {'stream': f"{symbol.lower()}@kline_{interval}", 'data': {
+        'e': 'kline', 's': symbol,
+        'k': {'t': int(ts), 'i': interval, 'o': str(open_), 'h': str(high), 'l': str(low),
+              'c': str(close), 'v': str(volume), 'x': closed},
+    }}
+
+
+def trade_message(price, qty, ts):
+    return {'stream': 'btcusdt@aggTrade', 'data': {'e': 'aggTrade', 'p': str(price), 'q': str(qty), 'T': ts}}
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_parse_message():
+    candle = [1_600_000_000_000, 1.0, 2.0, 0.5, 1.5, 10.0]
+    assert parse_message(json.dumps(kline_message(candle, True))) == ('kline', candle, True)
+    assert parse_message(json.dumps(trade_message(1.5, 0.1, 42))) == ('trade', 1.5, 0.1, 42)
+
+
+def test_stream_reconnects_after_server_close():
+    candle = [1_600_000_000_000, 1.0, 2.0, 0.5, 1.5, 10.0]
+    server = ReplayWebSocketServer([kline_message(candle, False), kline_message(candle, True),
+                                    trade_message(1.5, 0.1, 42)], close_after=True).start()
+    klines, trades, reconnects = [], [], []
+    stream = MarketStream('BTC/USDT', '15m', url=server.url,
+                          on_kline=lambda c, closed: klines.append((c, closed)),
+                          on_trade=lambda *t: trades.append(t),
+                          on_reconnect=lambda: reconnects.append(len(klines)))
+    stream.start()
+    try:
+        # Sunucu her bağlantıda mesajları gönderip kapatır: istemci yeniden bağlanıp on_reconnect çağırır
+        assert wait_for(lambda: reconnects and len(klines) >= 4)
+    finally:
+        stream.stop()
+        server.stop()
+
+    assert server.connections >= 2
+    assert stream.reconnects >= 1
+    assert reconnects[0] == 2  # ilk bağlantıda değil, kopmadan sonra
+    assert klines[:2] == [(candle, False), (candle, True)]
+    assert trades[0] == (1.5, 0.1, 42)
+
+
+def test_bot_stream_backfills_on_reconnect_and_persists_closed_candles(tmp_path):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=600, headroom=10)
+    history_dir = str(tmp_path / 'history')
+    data = exchange.data['BTC/USDT']
+    live = data[exchange.end]
+    server = ReplayWebSocketServer([kline_message(live, False), kline_message(live, True)],
+                                   close_after=True)
+    bot = make_bot(load_bot_module(), exchange, str(tmp_path), ['BTC/USDT'], {
+        'market_data_mode': 'stream',
+        'stream_url': server.url,
+        'history_dir': history_dir,
+    })
+    bot.bot_running = True
+    bot.run_strategy_step = lambda df, state=None: None
+    server.start()
+    bot.start_market_stream()
+    try:
+        feed = bot.get_market_feed('BTC/USDT', '15m')
+        cache = HistoryCache('BTC/USDT', '15m', history_dir)
+        # Kapanan akış mumu diske eklenir
+        assert wait_for(lambda: cache.last_timestamp() == int(live[0]))
+
+        # Bağlantı kopukken üç mum daha kapanır; yeniden bağlanınca REST ile tamamlanır
+        exchange.advance(3)
+        assert wait_for(lambda: bot.market_stream.reconnects >= 1
+                        and feed.base.last_timestamp() == int(data[exchange.end - 1, 0]))
+        assert wait_for(lambda: cache.last_timestamp() == int(data[exchange.end - 1, 0]))
+    finally:
+        bot.stop_market_stream()
+        server.stop()
+
+    stored = cache.load()
+    np.testing.assert_array_equal(stored[-4:], data[exchange.end - 4:exchange.end])
+    assert not cache.find_gaps()
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pandas as pd
+
+from price_watcher import PriceWatcher
+
+
+class _Recorder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, context, reason, price):
+        self.calls.append((context, reason, price))
+
+
+def test_levels_fire_once():
+    recorder = _Recorder()
+    watcher = PriceWatcher(recorder)
+    watcher.arm('BTC/USDT', 'long', stop_loss=95.0, take_profit=110.0, context='long')
+    watcher.arm('ETH/USDT', 'short', stop_loss=12.0, take_profit=9.0, context='short')
+
+    assert not watcher.on_price('BTC/USDT', 100.0)
+    assert watcher.on_price('BTC/USDT', 94.5)
+    assert not watcher.on_price('BTC/USDT', 93.0)
+    assert not watcher.on_price('ETH/USDT', 10.0)
+    assert watcher.on_price('ETH/USDT', 9.0)
+
+    assert recorder.calls == [('long', 'stop_loss', 94.5), ('short', 'take_profit', 9.0)]
+    assert watcher.triggers == 2
+    assert watcher.symbols() == []
+    assert watcher.last_price == {'BTC/USDT': 93.0, 'ETH/USDT': 9.0}
+
+
+def test_concurrent_prices_fire_once():
+    recorder = _Recorder()
+    watcher = PriceWatcher(recorder)
+    watcher.arm('BTC/USDT', 'long', stop_loss=95.0, take_profit=110.0)
+    barrier = threading.Barrier(8, timeout=5)
+    fired = []
+
+    def feed(price):
+        barrier.wait()
+        fired.append(watcher.on_price('BTC/USDT', price))
+
+    threads = [threading.Thread(target=feed, args=(90.0 - i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert fired.count(True) == 1
+    assert len(recorder.calls) == 1
+    assert watcher.triggers == 1
+
+
+class _RearmingPrice(float):
+    """Eski seviyeyle karşılaştırılırken pozisyonu kapatıp yenisini açar (yarış anı)"""
+
+    def __new__(cls, value, rearm):
+        price = super().__new__(cls, value)
+        price.rearm = rearm
+        return price
+
+    def __le__(self, other):
+        self.rearm()
+        return float(self) <= other
+
+
+def test_rearm_between_check_and_disarm_does_not_fire_stale_level():
+    recorder = _Recorder()
+    watcher = PriceWatcher(recorder)
+    watcher.arm('BTC/USDT', 'long', stop_loss=95.0, take_profit=110.0, context='eski')
+
+    def rearm():
+        watcher.disarm('BTC/USDT')
+        watcher.arm('BTC/USDT', 'long', stop_loss=80.0, take_profit=100.0, context='yeni')
+
+    assert not watcher.on_price('BTC/USDT', _RearmingPrice(94.0, rearm))
+    assert recorder.calls == []
+    assert watcher.armed('BTC/USDT')
+    # Yeni seviyeler normal çalışır
+    assert watcher.on_price('BTC/USDT', 79.0)
+    assert recorder.calls == [('yeni', 'stop_loss', 79.0)]
+
+
+def test_trigger_callback_can_rearm():
+    watcher = PriceWatcher(lambda context, reason, price: watcher.arm(
+        'BTC/USDT', 'short', stop_loss=price * 1.1, take_profit=price * 0.8))
+    watcher.arm('BTC/USDT', 'long', stop_loss=95.0, take_profit=110.0)
+
+    assert watcher.on_price('BTC/USDT', 111.0)
+    # Yeni short seviyeleri 111'in çevresinde: eski TP tekrar tetiklenmez
+    assert not watcher.on_price('BTC/USDT', 112.0)
+    assert watcher.triggers == 1
+
+
+class _Feed:
+    def stop(self):
+        pass
+
+
+def _bot(tmp_path):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    module = load_bot_module()
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=600, headroom=10)
+    bot = make_bot(module, exchange, str(tmp_path), ['BTC/USDT'], {'intrabar_exits': True})
+    return bot
+
+
+def _open(bot, close, atr=2.0):
+    # Ayrı fiyat akışı bağlantısı açılmasın
+    bot.price_feeds['BTC/USDT'] = _Feed()
+    assert bot.enter_position('buy', pd.DataFrame({'close': [close], 'atr': [atr]}))
+
+
+def test_bot_closes_position_on_watched_stop(tmp_path):
+    bot = _bot(tmp_path)
+    _open(bot, 100.0)
+    stop = bot.stop_loss
+
+    assert bot.price_watcher.on_price('BTC/USDT', stop - 0.5)
+    assert bot.position is None
+    trade, = bot.trades
+    assert (trade['exit_reason'], trade['exit_price']) == ('stop_loss', stop - 0.5)
+    assert not bot.price_watcher.on_price('BTC/USDT', stop - 1.0)
+    assert len(bot.trades) == 1
+
+
+def test_bot_ignores_trigger_for_replaced_position(tmp_path):
+    bot = _bot(tmp_path)
+    _open(bot, 100.0)
+    stale_stop = bot.stop_loss
+
+    # Trading thread'i pozisyon kilidini tutarken fiyat izleyici eski SL'yi yakalar
+    with bot.position_lock:
+        watcher = threading.Thread(target=bot.price_watcher.on_price, args=('BTC/USDT', stale_stop - 0.5))
+        watcher.start()
+        deadline = time.monotonic() + 5
+        while bot.price_watcher.triggers == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        # Tetik kilidi beklerken pozisyon sinyalle kapanır ve yenisi açılır
+        bot.exit_position('signal', 99.0)
+        _open(bot, 90.0)
+        fresh_stop = bot.stop_loss
+
+    watcher.join(timeout=5)
+    assert not watcher.is_alive()
+    assert bot.position == 'long'
+    assert bot.entry_price == 90.0
+    assert [trade['exit_reason'] for trade in bot.trades] == ['signal']
+    assert bot.price_watcher.armed('BTC/USDT')
+    assert bot.price_watcher.on_price('BTC/USDT', fresh_stop - 0.1)
+    assert bot.position is None
+    assert [trade['exit_reason'] for trade in bot.trades] == ['signal', 'stop_loss']
@@ -0,0 +1,78 @@
+import numpy as np
+
+from rolling_stats import RollingWindowStats
+
+
+def test_snapshot_matches_window_recomputation(ohlcv):
+    stats = RollingWindowStats(size=24, trend_bars=4)
+    stats.update_many(ohlcv[:100])
+
+    window = ohlcv[76:100]
+    snapshot = stats.snapshot()
+    assert snapshot['count'] == 24
+    assert snapshot['high'] == window[:, 2].max()
+    assert snapshot['low'] == window[:, 3].min()
+    assert np.isclose(snapshot['mean'], window[:, 4].mean())
+    assert snapshot['recent_closes'] == window[-4:, 4].tolist()
+    assert np.isclose(snapshot['change'], window[-1, 4] - window[-2, 4])
+
+
+def _running_bot(tmp_path, timeframe):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=600, headroom=10)
+    bot = make_bot(load_bot_module(), exchange, str(tmp_path), ['BTC/USDT'], {'timeframe': timeframe})
+    bot.timeframe = timeframe
+    # Saat, fikstürün son görünen mumunun içinde
+    last_ts = exchange.fetch_ohlcv('BTC/USDT', limit=1)[-1][0]
+    bot.clock = lambda: last_ts / 1000 + 60
+    bot.loop_scheduler = bot.create_loop_scheduler()
+    bot.run_strategy_step = lambda df, state=None: None
+    bot.bot_running = True
+    return bot, exchange
+
+
+def test_report_needs_only_the_cached_ticker(tmp_path):
+    bot, exchange = _running_bot(tmp_path, '4h')
+    bot.run_scheduled_step('entry')
+
+    calls = exchange.calls
+    bot.send_hourly_report()
+    bot.send_hourly_report()
+
+    # Mumlar döngünün istatistiklerinden, fiyat tek (önbellekli) ticker isteğinden
+    assert exchange.calls == calls + 1
+    assert len(bot.sent) == 2 and 'Saatlik BTC Raporu' in bot.sent[-1]
+
+
+def test_report_price_is_live_within_the_hour(tmp_path):
+    bot, exchange = _running_bot(tmp_path, '4h')
+    bot.run_scheduled_step('entry')
+    bot.send_hourly_report()
+    before = exchange.fetch_ticker('BTC/USDT')['last']
+    assert f"${before:,.2f}" in bot.sent[-1]
+
+    # Aynı saat içinde fiyat değişir; ticker önbelleğinin bayat sınırı (30 sn) aşılır
+    exchange.advance()
+    now = bot.clock() + 45
+    bot.clock = lambda: now
+    bot.send_hourly_report()
+    after = exchange.fetch_ticker('BTC/USDT')['last']
+    assert after != before
+    assert f"${after:,.2f}" in bot.sent[-1]
+
+
+def test_exit_tick_refreshes_stale_report_stats(tmp_path):
+    bot, exchange = _running_bot(tmp_path, '4h')
+    bot.run_scheduled_step('entry')
+    exchange.calls = 0
+
+    # Pozisyon yokken ara kontrol sadece bayat istatistik için istek atar
+    bot.run_scheduled_step('exit')
+    assert exchange.calls == 0
+
+    with bot.data_lock:
+        bot.report_stats.reset()
+    bot.run_scheduled_step('exit')
+    assert exchange.calls == 1
+    assert len(bot.report_stats) == bot.report_stats.size
@@ -0,0 +1,106 @@
+import threading
+
+from scheduler import CandleScheduler, FixedIntervalScheduler
+
+
+class FakeClock:
+    """sleep() saati ilerletir; `oversleep` her uykuya eklenen gecikme"""
+
+    def __init__(self, now, oversleep=0.0):
+        self.now = now
+        self.oversleep = oversleep
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds + self.oversleep
+
+
+def _scheduler(clock, timeframe='15m', **kwargs):
+    return CandleScheduler(timeframe, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_entries_wake_on_candle_grid_plus_grace():
+    clock = FakeClock(1000.3)
+    scheduler = _scheduler(clock, grace_seconds=2.0)
+
+    woke = [scheduler.wait() for _ in range(3)]
+    assert woke == [('entry', 1802.0), ('entry', 2702.0), ('entry', 3602.0)]
+    assert clock.now == 3602.0
+    assert scheduler.current_candle_start() == 3600.0
+    assert scheduler.current_candle_start(3599.9) == 2700.0
+    assert scheduler.missed_deadlines == 0
+    assert scheduler.max_lateness == 0.0
+
+
+def test_exit_checks_interleave_with_entries():
+    clock = FakeClock(1000.3)
+    scheduler = _scheduler(clock, grace_seconds=2.0, exit_interval=60)
+
+    woke = []
+    while not woke or woke[-1][0] != 'entry':
+        woke.append(scheduler.wait())
+    assert woke[0] == ('exit', 1020.0)
+    # Sınırdaki çıkış kontrolü girişten önce, sonraki çıkış ızgarada devam eder
+    assert woke[-2:] == [('exit', 1800.0), ('entry', 1802.0)]
+    assert [deadline for _, deadline in woke[:-1]] == [1020.0 + 60 * i for i in range(14)]
+    assert scheduler.wait() == ('exit', 1860.0)
+
+
+def test_work_duration_does_not_drift_the_grid():
+    clock = FakeClock(10.0)
+    scheduler = _scheduler(clock, timeframe='1m', grace_seconds=1.0)
+
+    for i in range(1, 50):
+        kind, deadline = scheduler.wait()
+        assert deadline == 60.0 * i + 1.0
+        assert clock.now == deadline
+        clock.now += 7.3  # işlenen tur
+    assert scheduler.max_lateness == 0.0
+
+
+def test_late_wakeups_are_measured():
+    clock = FakeClock(10.0, oversleep=0.4)
+    scheduler = _scheduler(clock, timeframe='1m', grace_seconds=1.0, tolerance=5.0)
+
+    assert scheduler.wait() == ('entry', 61.0)
+    assert scheduler.wait() == ('entry', 121.0)
+    assert abs(scheduler.max_lateness - 0.4) < 1e-9
+    assert scheduler.missed_deadlines == 0
+
+
+def test_missed_deadlines_skip_stale_boundaries():
+    clock = FakeClock(10.0)
+    scheduler = _scheduler(clock, timeframe='1m', grace_seconds=1.0, tolerance=5.0)
+    assert scheduler.wait() == ('entry', 61.0)
+
+    clock.now += 200.0  # üç sınır boyunca takılan tur
+    kind, deadline = scheduler.wait()
+    assert (kind, deadline) == ('entry', 121.0)
+    assert clock.sleeps == [51.0]
+    assert scheduler.missed_deadlines == 1
+    assert scheduler.max_lateness == 140.0
+
+    # Biriken 181/241 sınırları atlanır, ızgaraya geri dönülür
+    assert scheduler.wait() == ('entry', 301.0)
+    assert scheduler.missed_deadlines == 1
+
+
+def test_fixed_interval_ticks():
+    clock = FakeClock(1000.0)
+    scheduler = FixedIntervalScheduler(interval=30, clock=clock, sleep=clock.sleep)
+    assert [scheduler.wait() for _ in range(3)] == [('tick', 1020.0), ('tick', 1050.0), ('tick', 1080.0)]
+
+
+def test_stop_interrupts_wait():
+    scheduler = CandleScheduler('1h', grace_seconds=2.0)
+    woke = []
+    thread = threading.Thread(target=lambda: woke.append(scheduler.wait()))
+    thread.start()
+    scheduler.stop()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert woke == [None]
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_ohlcv
+from signals import BIT, CONDITIONS, LONG_REQUIRED, SHORT_REQUIRED, condition_mask, conditions_at, has, missing_for
+from strategies import DonchianEmaMacd, StrategySet
+
+
+def _reference(df, i, trading_mode='both'):
+    """Eski check_entry_conditions kuralları, i. mum için satır satır (pandas)"""
+    current = df.iloc[i]
+    prev = df.iloc[i - 1]
+
+    above_ema = (current['close'] > current['ema200'] and current['open'] > current['ema200'])
+    below_ema = (current['close'] < current['ema200'] and current['open'] < current['ema200'])
+
+    donchian_long = current['high'] >= current['upper_band']
+    donchian_short = current['low'] <= current['lower_band']
+
+    long_candle_condition = ((prev['high'] - prev['close']) < ((prev['close'] - prev['open']) / 2) or
+                             (prev['high'] - prev['close']) < 3)
+    short_candle_condition = ((prev['close'] - prev['low']) < ((prev['open'] - prev['close']) / 2) or
+                              (prev['close'] - prev['low']) < 3)
+
+    macd_long = current['macd'] > 100 and current['macd_hist'] > 0
+    macd_short = current['macd'] < -100 and current['macd_hist'] < 0
+
+    donchian_band_placement = True
+    if above_ema and current['upper_band'] < current['ema200']:
+        donchian_band_placement = False
+    if below_ema and current['lower_band'] > current['ema200']:
+        donchian_band_placement = False
+
+    sufficient_band_distance = current['band_distance_vs_atr'] > 1.0
+
+    # Eski akış dropna sonrası çalışırdı: bu veya önceki mumda boş indikatör = sinyal yok
+    valid = not df.iloc[i - 1:i + 1][['ema200', 'atr', 'upper_band', 'macd']].isna().any().any()
+
+    long_signal = (valid and above_ema and donchian_long and long_candle_condition and
+                   macd_long and donchian_band_placement and sufficient_band_distance)
+    short_signal = (valid and below_ema and donchian_short and short_candle_condition and
+                    macd_short and donchian_band_placement and sufficient_band_distance)
+    if trading_mode == 'long':
+        short_signal = False
+    elif trading_mode == 'short':
+        long_signal = False
+
+    return {
+        'valid': valid,
+        'above_ema': above_ema,
+        'below_ema': below_ema,
+        'donchian_long': donchian_long,
+        'donchian_short': donchian_short,
+        'long_candle': long_candle_condition,
+        'short_candle': short_candle_condition,
+        'macd_long': macd_long,
+        'macd_short': macd_short,
+        'band_placement': donchian_band_placement,
+        'band_distance': sufficient_band_distance,
+        'long': long_signal,
+        'short': short_signal,
+    }
+
+
+def _frame(ohlcv):
+    df = pd.DataFrame(ohlcv[:, 1:5], columns=['open', 'high', 'low', 'close'])
+    for name, values in StrategySet([DonchianEmaMacd()]).compute_arrays(ohlcv).items():
+        df[name] = values
+    return df
+
+
+@pytest.fixture(scope='module')
+def frame():
+    # Daha oynak seri: her iki yönde de yeterince sinyal olsun
+    ohlcv = make_ohlcv(n=1200, seed=7)
+    ohlcv[:, 1:5] = 30000 + (ohlcv[:, 1:5] - 30000) * 2
+    return _frame(ohlcv)
+
+
+@pytest.mark.parametrize('trading_mode', ['both', 'long', 'short'])
+def test_mask_matches_reference_bit_by_bit(frame, trading_mode):
+    mask = condition_mask(frame['open'], frame['high'], frame['low'], frame['close'], frame,
+                          trading_mode=trading_mode)
+    assert mask.dtype == np.uint16
+    assert not has(mask[0], 'valid')
+
+    for i in range(1, len(frame)):
+        expected = _reference(frame, i, trading_mode)
+        actual = {name: bool(has(mask[i], name)) for name in CONDITIONS}
+        assert actual == expected, f"mum {i}"
+
+
+def test_reference_window_has_signals(frame):
+    mask = condition_mask(frame['open'], frame['high'], frame['low'], frame['close'], frame)
+    # Karşılaştırma anlamlı olsun: iki yönde de giriş ve ısınma bölgesi var
+    assert has(mask, 'long').sum() > 0
+    assert has(mask, 'short').sum() > 0
+    assert (~has(mask, 'valid')).sum() > 100
+
+
+def test_missing_for_lists_unmet_requirements(frame):
+    mask = condition_mask(frame['open'], frame['high'], frame['low'], frame['close'], frame)
+    for i in range(1, len(frame)):
+        expected = _reference(frame, i)
+        for side, required in (('long', LONG_REQUIRED), ('short', SHORT_REQUIRED)):
+            names = [name for name in CONDITIONS if required & BIT[name]]
+            assert missing_for(mask[i], side) == [name for name in names if not expected[name]]
+            assert (missing_for(mask[i], side) == []) == expected[side]
+        assert conditions_at(mask[i]) == [name for name in CONDITIONS if expected[name]]
+
+
+def test_missing_for_single_values():
+    assert missing_for(LONG_REQUIRED, 'long') == []
+    assert missing_for(LONG_REQUIRED & ~BIT['macd_long'], 'long') == ['macd_long']
+    assert missing_for(0, 'short') == ['valid', 'below_ema', 'donchian_short', 'short_candle',
+                                       'macd_short', 'band_placement', 'band_distance']
+    # long koşulları short için eksikleri kapatmaz
+    assert missing_for(LONG_REQUIRED, 'short') == ['below_ema', 'donchian_short', 'short_candle', 'macd_short']
+    assert conditions_at(BIT['valid'] | BIT['long']) == ['valid', 'long']
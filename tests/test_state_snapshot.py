@@ -0,0 +1,53 @@
+import logging
+import threading
+
+from indicator_graph import IndicatorGraph
+from state_snapshot import load_snapshot
+
+
+def test_save_state_is_consistent_while_trading_thread_updates(tmp_path, caplog, monkeypatch):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=500, headroom=400)
+    bot = make_bot(load_bot_module(), exchange, str(tmp_path), ['BTC/USDT'])
+    bot.timeframe = '15m'
+    bot.bot_running = True
+
+    # Anlık görüntüye giren indikatör motoru sadece data_lock altında değişmeli
+    unlocked = []
+    update = IndicatorGraph.update
+
+    def checked_update(self, candle):
+        if not bot.data_lock._is_owned():
+            unlocked.append(candle[0])
+        return update(self, candle)
+
+    monkeypatch.setattr(IndicatorGraph, 'update', checked_update)
+
+    stop = threading.Event()
+
+    def saver():
+        # Telegram / fiyat izleyici thread'lerindeki save_state(force=True) çağrıları
+        while not stop.is_set():
+            bot.save_state(force=True)
+
+    thread = threading.Thread(target=saver)
+    with caplog.at_level(logging.ERROR):
+        thread.start()
+        try:
+            for _ in range(300):
+                exchange.advance()
+                bot.run_strategy_step(bot.fetch_recent_data())
+        finally:
+            stop.set()
+            thread.join()
+        bot.save_state(force=True)
+        assert bot.snapshot_writer.close(timeout=5)
+
+    assert not unlocked
+    assert not [r for r in caplog.records if 'Durum kaydedilemedi' in r.getMessage()]
+    snapshot = load_snapshot(bot.snapshot_writer.path)
+    assert snapshot is not None
+    engines = snapshot['state']['indicator_engines']
+    assert engines and all(engine.last_timestamp() == int(exchange.data['BTC/USDT'][exchange.end - 1, 0])
+                           for engine in engines.values())
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from backtest import run_backtest
+from signals import has
+from strategies import DonchianEmaMacd, StrategySet
+
+# Hiç sinyal vermeyen, uzun ısınmalı ikinci strateji
+QUIET = {'name': 'donchian_ema_macd', 'params': {'ema_period': 450, 'macd_threshold': 1e9}}
+
+
+def test_shared_indicators_are_computed_once():
+    strategies = StrategySet([DonchianEmaMacd(), DonchianEmaMacd(ema_period=50)])
+    keys = [indicator.key for indicator in strategies.indicators]
+    assert len(keys) == len(set(keys))
+    assert sum(key[0] == 'ATR' for key in keys) == 1
+    assert sum(key[0] == 'EMA' for key in keys) == 2
+    # EMA(200): 199 boş mum + önceki mum + son mum
+    assert strategies.min_history == 201
+    assert StrategySet([DonchianEmaMacd(ema_period=300)]).history_limit() == 2 * 301
+
+
+def test_long_warmup_does_not_mute_other_strategies(ohlcv):
+    alone = StrategySet([DonchianEmaMacd(ema_period=50)])
+    both = StrategySet([DonchianEmaMacd(ema_period=50), DonchianEmaMacd(ema_period=450, macd_threshold=1e9)])
+    columns = {'open': ohlcv[:, 1], 'high': ohlcv[:, 2], 'low': ohlcv[:, 3], 'close': ohlcv[:, 4]}
+
+    (_, expected), = alone.evaluate({**columns, **alone.compute_arrays(ohlcv)})
+    (_, primary), (_, quiet) = both.evaluate({**columns, **both.compute_arrays(ohlcv)})
+
+    np.testing.assert_array_equal(primary, expected)
+    assert not quiet[:449].any()
+    assert (has(primary[60:449], 'long') | has(primary[60:449], 'short')).any()
+
+
+def test_backtest_unaffected_by_quiet_long_warmup_strategy(ohlcv):
+    single = run_backtest(ohlcv, {'ema_period': 50})
+    strategies = StrategySet([DonchianEmaMacd(ema_period=50), DonchianEmaMacd(ema_period=450, macd_threshold=1e9)])
+    combined = run_backtest(ohlcv, {'ema_period': 50}, strategies=strategies)
+    assert combined['trades'] == single['trades']
+
+
+def test_bot_keeps_warmup_rows_per_strategy(tmp_path):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    module = load_bot_module()
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=1000, headroom=10)
+    primary = {'name': 'donchian_ema_macd', 'params': {'ema_period': 50}}
+    (tmp_path / 'single').mkdir()
+    (tmp_path / 'both').mkdir()
+    single = make_bot(module, exchange, str(tmp_path / 'single'), ['BTC/USDT'], {'strategies': [primary]})
+    both = make_bot(module, exchange, str(tmp_path / 'both'), ['BTC/USDT'], {'strategies': [primary, QUIET]})
+
+    assert both.history_limit == 2 * both.strategies.min_history == 902
+    df = both.fetch_recent_data()
+    assert len(df) == both.history_limit
+
+    out = both.calculate_indicators(df.copy())
+    assert len(out) == len(df)
+    expected = single.check_entry_conditions(single.calculate_indicators(df.copy()))['mask']
+    np.testing.assert_array_equal(both.check_entry_conditions(out)['mask'], expected)
+
+
+def test_entry_after_exit_tick_does_not_rebuild_graph(tmp_path, monkeypatch):
+    from bench import FakeExchange, load_bot_module, make_bot
+
+    module = load_bot_module()
+    exchange = FakeExchange(['BTC/USDT'], timeframe='15m', rows=1000, headroom=10)
+    (tmp_path / 'live').mkdir()
+    (tmp_path / 'fresh').mkdir()
+    bot = make_bot(module, exchange, str(tmp_path / 'live'), ['BTC/USDT'])
+    fresh = make_bot(module, exchange, str(tmp_path / 'fresh'), ['BTC/USDT'])
+
+    df = bot.fetch_recent_data()
+    bot.calculate_indicators(df.copy())
+    fresh.calculate_indicators(df.copy())
+    engine, = bot.indicator_engines.values()
+    resets = []
+    monkeypatch.setattr(engine, 'reset', lambda: resets.append(1))
+
+    for _ in range(5):
+        exchange.advance()
+        df = bot.fetch_recent_data()
+        # Çıkış kontrolü oluşan mumu, giriş turu sadece kapanmış mumları görür
+        bot.calculate_indicators(df.copy())
+        closed = df.iloc[:-1]
+        out = bot.calculate_indicators(closed.copy())
+
+        # Aynı turları çıkış kontrolü olmadan gören bot ile birebir aynı
+        expected = fresh.calculate_indicators(closed.copy())
+        pd.testing.assert_frame_equal(out, expected)
+        assert engine.last_timestamp() == df.index.as_unit('ms').asi8[-1]
+
+    assert resets == []
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+
+import telegram_dispatcher
+from telegram_dispatcher import TelegramDispatcher, _Outgoing
+
+
+class FakeTime:
+    """sleep() saati ilerletir, gerçekten beklemez"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class StubSession:
+    """sendMessage yerine geçer: sıradaki hazır cevabı döndürür, yoksa ok"""
+
+    def __init__(self, clock=None, responses=()):
+        self.clock = clock
+        self.responses = list(responses)
+        self.requests = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def send(self, payload):
+        self.release.wait(5)
+        self.requests.append((self.clock.now if self.clock else None, payload))
+        response = self.responses.pop(0) if self.responses else {'ok': True}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(telegram_dispatcher, 'time', fake)
+    return fake
+
+
+def test_same_key_replaces_queued_message():
+    session = StubSession()
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0)
+    dispatcher.enqueue(1, {'text': 'eski'}, coalesce_key='refresh')
+    dispatcher.enqueue(1, {'text': 'yeni'}, coalesce_key='refresh')
+    dispatcher.enqueue(2, {'text': 'başka sohbet'}, coalesce_key='refresh')
+    dispatcher.enqueue(1, {'text': 'anahtarsız'})
+    assert dispatcher.depth() == 3
+    assert dispatcher.coalesced == 1
+
+    dispatcher.start()
+    assert dispatcher.flush(timeout=5)
+    assert [payload['text'] for _, payload in session.requests] == ['yeni', 'başka sohbet', 'anahtarsız']
+
+    # Gönderilen mesajın anahtarı serbest kalır: yenisi ayrı kuyruğa girer
+    dispatcher.enqueue(1, {'text': 'tekrar'}, coalesce_key='refresh')
+    dispatcher.stop(timeout=5)
+    assert dispatcher.sent == 4
+    assert dispatcher.coalesced == 1
+
+
+def test_full_queue_drops_new_messages():
+    dispatcher = TelegramDispatcher(StubSession().send, max_queue=2)
+    assert dispatcher.enqueue(1, {'text': 'a'})
+    assert dispatcher.enqueue(1, {'text': 'b'}, coalesce_key='refresh')
+    assert not dispatcher.enqueue(1, {'text': 'c'})
+    assert dispatcher.dropped == 1
+    # Bekleyen anahtarın üzerine yazmak kuyruk dolu olsa da çalışır
+    assert dispatcher.enqueue(1, {'text': 'd'}, coalesce_key='refresh')
+    assert dispatcher.depth() == 2
+
+
+def test_per_chat_interval(clock):
+    session = StubSession(clock)
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=1.0)
+    for chat_id in (1, 1, 2, 1):
+        dispatcher._deliver(_Outgoing(chat_id, {'chat_id': chat_id}, None))
+
+    # Sohbet 2 sohbet 1'in limitini beklemez
+    assert [(at, payload['chat_id']) for at, payload in session.requests] == [
+        (1000.0, 1), (1001.0, 1), (1001.0, 2), (1002.0, 1)]
+    assert dispatcher.sent == 4
+
+
+def test_429_waits_retry_after_then_resends(clock):
+    session = StubSession(clock, [{'ok': False, 'error_code': 429, 'parameters': {'retry_after': 7}}])
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0)
+    dispatcher._deliver(_Outgoing(1, {'text': 'a'}, None))
+
+    assert clock.sleeps == [7]
+    assert [at for at, _ in session.requests] == [1000.0, 1007.0]
+    assert dispatcher.sent == 1
+    assert dispatcher.retries == 1
+    assert dispatcher.last_latency == 7.0
+
+
+def test_network_errors_back_off_exponentially(clock):
+    session = StubSession(clock, [ConnectionError('ağ'), ConnectionError('ağ'), {'ok': False, 'error_code': 502}])
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0)
+    dispatcher._deliver(_Outgoing(1, {'text': 'a'}, None))
+
+    assert clock.sleeps == [1.0, 2.0, 4.0]
+    assert len(session.requests) == 4
+    assert dispatcher.sent == 1
+    assert dispatcher.retries == 3
+
+
+def test_permanent_error_and_retry_limit(clock):
+    session = StubSession(clock, [{'ok': False, 'error_code': 400}])
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0, max_retries=3)
+    dispatcher._deliver(_Outgoing(1, {'text': 'kalıcı'}, None))
+    assert len(session.requests) == 1
+    assert clock.sleeps == []
+
+    session.responses = [ConnectionError('ağ')] * 3
+    dispatcher._deliver(_Outgoing(1, {'text': 'geçici'}, None))
+    assert len(session.requests) == 4
+    assert dispatcher.failed == 2
+    assert dispatcher.sent == 0
+
+
+def test_stop_drains_queue():
+    session = StubSession()
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0).start()
+    for i in range(20):
+        dispatcher.enqueue(i % 3, {'text': str(i)})
+    dispatcher.stop(timeout=5)
+
+    assert dispatcher.sent == 20
+    assert dispatcher.depth() == 0
+    dispatcher._thread.join(timeout=5)
+    assert not dispatcher._thread.is_alive()
+
+
+def test_stop_gives_up_after_timeout():
+    session = StubSession()
+    session.release.clear()
+    dispatcher = TelegramDispatcher(session.send, per_chat_interval=0).start()
+    dispatcher.enqueue(1, {'text': 'takılan'})
+    dispatcher.enqueue(1, {'text': 'bekleyen'})
+
+    assert not dispatcher.flush(timeout=0.05)
+    dispatcher.stop(timeout=0.05)
+    assert dispatcher.sent == 0
+
+    # Takılan istek dönünce worker kuyruğu boşaltıp çıkar
+    session.release.set()
+    dispatcher._thread.join(timeout=5)
+    assert not dispatcher._thread.is_alive()
+    assert dispatcher.sent == 2
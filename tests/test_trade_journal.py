@@ -0,0 +1,153 @@
+from datetime import datetime
+import sqlite3
+import threading
+import time
+
+import trade_journal
+from trade_journal import TradeJournal
+
+# EXTRA_COLUMNS öncesi şema: exit_price/exit_timestamp yok
+BASELINE_SCHEMA = '''
+    CREATE TABLE trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT, symbol TEXT, side TEXT, amount REAL, price REAL,
+        stop_loss REAL, take_profit REAL, profit REAL, status TEXT,
+        exit_reason TEXT, balance_after REAL, market_trend TEXT
+    )
+'''
+
+
+def _rows(db_path, query='SELECT id, symbol, status, exit_price, exit_reason FROM trades ORDER BY id'):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def _entry(journal, symbol='BTC/USDT', price=100.0):
+    return journal.record_entry(symbol, 'long', 1.0, price, price * 0.98, price * 1.04)
+
+
+def test_queued_records_are_written_in_batches(tmp_path, monkeypatch):
+    gate = threading.Event()
+    sizes = []
+    write = TradeJournal._write
+
+    def slow_write(self, conn, ops):
+        sizes.append(len(ops))
+        gate.wait(5)
+        write(self, conn, ops)
+
+    monkeypatch.setattr(TradeJournal, '_write', slow_write)
+    journal = TradeJournal(str(tmp_path / 'trades.db'), batch_size=5)
+    _entry(journal)
+    deadline = time.monotonic() + 5
+    while not sizes and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    # Yazıcı ilk kayıtta beklerken gelenler kuyrukta birikir
+    started = time.monotonic()
+    keys = [_entry(journal, price=100.0 + i) for i in range(11)]
+    assert time.monotonic() - started < 0.5
+    assert journal.pending() == 11
+
+    gate.set()
+    assert journal.close(timeout=5)
+    assert sizes == [1, 5, 5, 1]
+    assert journal.written == 12
+    assert journal.batches == 4
+    assert len(keys) == len(set(keys))
+    assert len(_rows(journal.db_path)) == 12
+
+
+def test_baseline_database_gets_extra_columns(tmp_path):
+    db_path = str(tmp_path / 'trades.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute(BASELINE_SCHEMA)
+    conn.execute("INSERT INTO trades (timestamp, symbol, side, price, status) "
+                 "VALUES ('2024-01-01 00:00:00', 'BTC/USDT', 'long', 100.0, 'open')")
+    conn.commit()
+    conn.close()
+
+    for _ in range(2):  # ikinci açılış şemayı tekrar değiştirmeye çalışmaz
+        journal = TradeJournal(db_path)
+        assert journal.close(timeout=5)
+
+    columns = {row[1] for row in _rows(db_path, 'PRAGMA table_info(trades)')}
+    assert set(trade_journal.EXTRA_COLUMNS) <= columns
+    indexes = {row[0] for row in _rows(db_path, "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert set(trade_journal.INDEXES) <= indexes
+    assert _rows(db_path) == [(1, 'BTC/USDT', 'open', None, None)]
+
+    # Eski açık kayıt yeni kolonlarla kapatılabilir
+    journal = TradeJournal(db_path)
+    journal.record_exit(None, 'BTC/USDT', 104.0, 4.0, 'take_profit', 10004.0)
+    assert journal.close(timeout=5)
+    assert _rows(db_path) == [(1, 'BTC/USDT', 'closed', 104.0, 'take_profit')]
+
+
+def test_exit_without_known_key_closes_latest_open_row(tmp_path):
+    db_path = str(tmp_path / 'trades.db')
+    journal = TradeJournal(db_path)
+    _entry(journal, price=100.0)
+    _entry(journal, 'ETH/USDT', price=10.0)
+    _entry(journal, price=110.0)
+    assert journal.close(timeout=5)
+
+    # Yeniden başlatma: anahtarlar kayboldu
+    journal = TradeJournal(db_path)
+    journal.record_exit(1, 'BTC/USDT', 112.0, 2.0, 'signal', 10002.0)
+    journal.record_exit(None, 'SOL/USDT', 20.0, -1.0, 'stop_loss', 10001.0)
+    assert journal.close(timeout=5)
+
+    assert _rows(db_path) == [
+        (1, 'BTC/USDT', 'open', None, None),
+        (2, 'ETH/USDT', 'open', None, None),
+        (3, 'BTC/USDT', 'closed', 112.0, 'signal'),
+        # Açık kaydı olmayan çıkış ayrı satır olarak saklanır
+        (4, 'SOL/USDT', 'closed', 20.0, 'stop_loss'),
+    ]
+
+
+def test_known_key_closes_its_own_row(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    first = _entry(journal, price=100.0)
+    _entry(journal, price=110.0)
+    exit_at = datetime(2024, 1, 2, 3, 4, 5)
+    journal.record_exit(first, 'BTC/USDT', 98.0, -2.0, 'stop_loss', 9998.0, timestamp=exit_at)
+    assert journal.close(timeout=5)
+
+    assert _rows(journal.db_path)[:2] == [(1, 'BTC/USDT', 'closed', 98.0, 'stop_loss'),
+                                          (2, 'BTC/USDT', 'open', None, None)]
+    trade, = journal.closed_trades()
+    assert trade['entry_price'] == 100.0
+    assert trade['exit_date'] == exit_at
+    assert trade['balance_after'] == 9998.0
+
+
+def test_close_flushes_pending_records(tmp_path):
+    journal = TradeJournal(str(tmp_path / 'trades.db'), batch_size=7)
+    for i in range(50):
+        key = _entry(journal, price=100.0 + i)
+        journal.record_exit(key, 'BTC/USDT', 101.0 + i, 1.0, 'signal', 10000.0 + i)
+
+    assert journal.close(timeout=5)
+    assert not journal._thread.is_alive()
+    assert journal.pending() == 0
+    assert journal.written == 100
+    assert len(journal.closed_trades()) == 50
+    assert len(journal.closed_trades(limit=3)) == 3
+
+
+def test_close_reports_timeout(tmp_path, monkeypatch):
+    gate = threading.Event()
+    write = TradeJournal._write
+    monkeypatch.setattr(TradeJournal, '_write', lambda self, conn, ops: (gate.wait(5), write(self, conn, ops)))
+    journal = TradeJournal(str(tmp_path / 'trades.db'))
+    _entry(journal)
+
+    assert not journal.close(timeout=0.05)
+    gate.set()
+    journal._thread.join(timeout=5)
+    assert len(_rows(journal.db_path)) == 1
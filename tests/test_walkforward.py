@@ -0,0 +1,82 @@
+import numpy as np
+
+from backtest import build_strategies, entry_signals, simulate
+from walkforward import make_windows, run_walkforward
+
+DAY_MS = 86_400_000
+
+
+def _signals(ohlcv, params):
+    strategies = build_strategies(params)
+    ind = strategies.compute_arrays(ohlcv)
+    return (ind, *entry_signals(ohlcv, ind, params, strategies))
+
+
+def test_open_position_carries_across_contiguous_slices(ohlcv):
+    params = {'ema_period': 50, 'donchian_period': 10, 'macd_threshold': 20}
+    ind, long_signal, short_signal = _signals(ohlcv, params)
+    whole, _, _ = simulate(ohlcv, ind, long_signal, short_signal, params)
+
+    # Kesim noktası açık bir pozisyonun ortasına denk gelsin
+    trade = next(t for t in whole if t['exit_index'] - t['entry_index'] > 2)
+    cut = trade['entry_index'] + 1
+
+    def part(start, end):
+        return (ohlcv[start:end], {k: v[start:end] for k, v in ind.items()},
+                long_signal[start:end], short_signal[start:end])
+
+    first, equity, carried = simulate(*part(0, cut), params, close_at_end=False)
+    assert carried is not None and carried['entry_index'] == trade['entry_index']
+    carried['entry_index'] -= cut
+    second, _, _ = simulate(*part(cut, len(ohlcv)), params, equity[-1], position=carried)
+    for t in second:
+        t['entry_index'] += cut
+        t['exit_index'] += cut
+    assert first + second == whole
+
+
+def test_out_of_sample_folds_match_one_continuous_run(ohlcv):
+    grid = {'ema_period': [50], 'donchian_period': [10], 'macd_threshold': [20]}
+    result = run_walkforward(ohlcv, grid, train_ms=5 * DAY_MS, test_ms=2 * DAY_MS, workers=1)
+
+    windows = make_windows(ohlcv[:, 0], 5 * DAY_MS, 2 * DAY_MS)
+    start, end = windows[0][1], max(test_end for _, _, test_end in windows)
+    params = {k: v[0] for k, v in grid.items()}
+    ind, long_signal, short_signal = _signals(ohlcv, params)
+    expected, expected_equity, _ = simulate(ohlcv[start:end], {k: v[start:end] for k, v in ind.items()},
+                                            long_signal[start:end], short_signal[start:end], params)
+
+    assert [t['exit_reason'] for t in result['trades']] == [t['exit_reason'] for t in expected]
+    assert [t['exit_index'] for t in result['trades']] == [t['exit_index'] + start for t in expected]
+    assert any(fold['carried_out'] for fold in result['folds'])
+    # Devreden pozisyon pencere sınırında da piyasa değeriyle sürer: tek sürekli eğri
+    np.testing.assert_allclose(result['equity'], expected_equity)
+
+
+def test_configured_strategies_are_optimized(ohlcv):
+    grid = {'ema_period': [50], 'donchian_period': [10]}
+    quiet = [{'name': 'donchian_ema_macd', 'params': {'macd_threshold': 1e9}}]
+    default = run_walkforward(ohlcv, grid, train_ms=5 * DAY_MS, test_ms=2 * DAY_MS, workers=1)
+    configured = run_walkforward(ohlcv, grid, train_ms=5 * DAY_MS, test_ms=2 * DAY_MS, workers=1,
+                                 strategies=quiet)
+    assert default['summary']['trade_count'] > 0
+    assert configured['summary']['trade_count'] == 0
+    assert np.all(configured['equity'] == 10000.0)
+
+
+def test_overlapping_test_windows_are_trimmed(ohlcv):
+    windows = make_windows(ohlcv[:, 0], 5 * DAY_MS, 3 * DAY_MS, step_ms=DAY_MS)
+    tested = [w for w in windows if w[2] > w[1]]
+    for (_, _, test_end), (_, next_train_end, _) in zip(tested, tested[1:]):
+        assert test_end == next_train_end
+
+    grid = {'ema_period': [50], 'donchian_period': [10], 'macd_threshold': [20]}
+    result = run_walkforward(ohlcv, grid, train_ms=5 * DAY_MS, test_ms=3 * DAY_MS, step_ms=DAY_MS, workers=1)
+    start, end = tested[0][1], tested[-1][2]
+    assert len(result['equity']) == end - start
+
+    params = {k: v[0] for k, v in grid.items()}
+    ind, long_signal, short_signal = _signals(ohlcv, params)
+    expected, _, _ = simulate(ohlcv[start:end], {k: v[start:end] for k, v in ind.items()},
+                              long_signal[start:end], short_signal[start:end], params)
+    assert [t['exit_index'] for t in result['trades']] == [t['exit_index'] + start for t in expected]
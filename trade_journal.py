@@ -0,0 +1,203 @@
+from datetime import datetime
+import itertools
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS trades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        symbol TEXT,
+        side TEXT,
+        amount REAL,
+        price REAL,
+        stop_loss REAL,
+        take_profit REAL,
+        profit REAL,
+        status TEXT,
+        exit_reason TEXT,
+        balance_after REAL,
+        market_trend TEXT
+    )
+'''
+
+# Eski veritabanlarına sonradan eklenen kolonlar
+EXTRA_COLUMNS = {
+    'exit_price': 'REAL',
+    'exit_timestamp': 'TEXT',
+}
+
+INDEXES = {
+    'idx_trades_timestamp': 'timestamp',
+    'idx_trades_symbol': 'symbol',
+    'idx_trades_status': 'status',
+}
+
+_STOP = object()
+
+
+def connect(db_path, timeout=5.0):
+    """WAL modunda bağlantı: okuyucular yazarı, yazar okuyucuları beklemez"""
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL'da NORMAL: commit'te fsync yok, checkpoint'te var (çökmede son commit'ler gidebilir, dosya bozulmaz)
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def setup_schema(conn):
+    conn.execute(SCHEMA)
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(trades)')}
+    for column, column_type in EXTRA_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f'ALTER TABLE trades ADD COLUMN {column} {column_type}')
+    for name, column in INDEXES.items():
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON trades ({column})')
+    conn.commit()
+
+
+class TradeJournal:
+    """İşlem giriş/çıkışlarını SQLite'a arka planda (write-behind) yazan günlük.
+
+    record_entry()/record_exit() sadece kuyruğa ekler; yazıcı thread
+    kuyrukta biriken işlemleri `batch_size`'a kadar tek transaction'da işler.
+    Trading thread'i disk beklemesi yaşamaz. close() kuyruğu en fazla
+    `timeout` saniye boşaltmaya çalışır.
+    """
+
+    def __init__(self, db_path, batch_size=100):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+
+        conn = connect(db_path)
+        setup_schema(conn)
+        conn.close()
+
+        self._queue = queue.Queue()
+        self._keys = itertools.count(1)
+        self._row_ids = {}
+        self._thread = threading.Thread(target=self._run, daemon=True, name='trade-journal')
+        self._thread.start()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def record_entry(self, symbol, side, amount, price, stop_loss, take_profit,
+                     market_trend=None, timestamp=None):
+        """Açılan pozisyonu kaydet; record_exit için anahtar döndür"""
+        key = next(self._keys)
+        timestamp = (timestamp or datetime.now()).isoformat(sep=' ')
+        self._queue.put(('entry', key, (timestamp, symbol, side, amount, price,
+                                        stop_loss, take_profit, 'open', market_trend)))
+        return key
+
+    def record_exit(self, key, symbol, exit_price, profit, exit_reason, balance_after,
+                    timestamp=None):
+        """Pozisyon kapanışını kaydet (anahtar yoksa paritenin son açık kaydı kapanır)"""
+        timestamp = (timestamp or datetime.now()).isoformat(sep=' ')
+        self._queue.put(('exit', key, (symbol, exit_price, profit, exit_reason,
+                                       balance_after, timestamp)))
+
+    def close(self, timeout=5.0):
+        """Bekleyen kayıtları yaz ve yazıcıyı durdur; süre yetmezse False"""
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"İşlem günlüğü {timeout} sn içinde boşaltılamadı "
+                         f"({self.pending()} kayıt bekliyor)")
+            return False
+        return True
+
+    def _run(self):
+        conn = connect(self.db_path)
+        try:
+            while True:
+                # Kuyrukta birikmiş ne varsa tek transaction'a topla
+                batch = [self._queue.get()]
+                while batch[-1] is not _STOP and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                stop = batch[-1] is _STOP
+                ops = [op for op in batch if op is not _STOP]
+                if ops:
+                    self._write(conn, ops)
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def _write(self, conn, ops):
+        started = time.monotonic()
+        try:
+            with conn:
+                for kind, key, values in ops:
+                    if kind == 'entry':
+                        cursor = conn.execute(
+                            'INSERT INTO trades (timestamp, symbol, side, amount, price, stop_loss, '
+                            'take_profit, status, market_trend) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                            values)
+                        self._row_ids[key] = cursor.lastrowid
+                    else:
+                        self._write_exit(conn, key, values)
+            self.written += len(ops)
+            self.batches += 1
+        except sqlite3.Error as e:
+            self.failed += len(ops)
+            logger.error(f"İşlem günlüğü yazılamadı ({len(ops)} kayıt): {e}")
+            return
+        logger.debug(f"{len(ops)} günlük kaydı {time.monotonic() - started:.3f} sn'de yazıldı")
+
+    def _write_exit(self, conn, key, values):
+        symbol, exit_price, profit, exit_reason, balance_after, timestamp = values
+        row_id = self._row_ids.pop(key, None)
+        if row_id is None:
+            # Yeniden başlatma sonrası: anahtar bilinmiyor, paritenin son açık kaydı
+            row = conn.execute("SELECT id FROM trades WHERE symbol = ? AND status = 'open' "
+                               "ORDER BY id DESC LIMIT 1", (symbol,)).fetchone()
+            row_id = row[0] if row else None
+        if row_id is None:
+            logger.warning(f"{symbol} için açık işlem kaydı bulunamadı, çıkış ayrı kaydedildi")
+            row_id = conn.execute('INSERT INTO trades (timestamp, symbol) VALUES (?, ?)',
+                                  (timestamp, symbol)).lastrowid
+        conn.execute('UPDATE trades SET exit_price = ?, profit = ?, exit_reason = ?, balance_after = ?, '
+                     "exit_timestamp = ?, status = 'closed' WHERE id = ?",
+                     (exit_price, profit, exit_reason, balance_after, timestamp, row_id))
+
+    def closed_trades(self, limit=None):
+        """Kapanmış işlemleri bot'un trade kaydı biçiminde (eskiden yeniye) döndür"""
+        conn = connect(self.db_path)
+        try:
+            query = ("SELECT symbol, side, price, exit_timestamp, exit_price, profit, exit_reason, "
+                     "balance_after FROM trades WHERE status = 'closed' ORDER BY id DESC")
+            params = ()
+            if limit is not None:
+                query += ' LIMIT ?'
+                params = (limit,)
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+
+        trades = []
+        for symbol, side, price, exit_ts, exit_price, profit, reason, balance_after in reversed(rows):
+            trades.append({
+                'symbol': symbol,
+                'side': side,
+                'entry_price': price,
+                'exit_date': datetime.fromisoformat(exit_ts) if exit_ts else None,
+                'exit_price': exit_price,
+                'profit': profit or 0.0,
+                'exit_reason': reason,
+                'balance_after': balance_after,
+            })
+        return trades
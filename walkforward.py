@@ -0,0 +1,273 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+import itertools
+import os
+import time
+
+import numpy as np
+
+from backtest import (DEFAULT_PARAMS, add_data_arguments, build_strategies, entry_signals, ignored_grid_keys,
+                      load_ohlcv_from_args, load_strategy_specs, simulate, summarize)
+from candle_store import timeframe_to_ms
+from sweep import _parse_list, attach_array, build_grid, cached_indicators, share_array
+
+# Worker süreç durumu (_init_worker ile doldurulur)
+_shm = None
+_ohlcv = None
+_windows = ()
+_specs = None
+_indicator_cache = {}
+
+LOWER_IS_BETTER = ('max_drawdown',)
+
+
+def make_windows(timestamps, train_ms, test_ms, step_ms=None):
+    """Kayan in-sample/out-of-sample pencereleri: [(train_start, train_end, test_end)] satır indeksleri.
+
+    Test pencereleri ardışıktır ve örtüşmez: step < test ise her test
+    aralığı sonraki pencerenin eğitim sonunda kesilir (aynı mumlar iki kez
+    sayılmasın), step > test ise aralarında test edilmeyen boşluk kalır.
+    Son pencere geçmişin sonuna kadar eğitilir ve test aralığı boştur;
+    önerilen güncel parametreler bu pencereden gelir.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    step_ms = step_ms or test_ms
+    n = len(timestamps)
+    windows = []
+    if n == 0:
+        return windows
+    start_ts = timestamps[0]
+    while True:
+        train_start = int(np.searchsorted(timestamps, start_ts))
+        train_end = int(np.searchsorted(timestamps, start_ts + train_ms))
+        test_end = int(np.searchsorted(timestamps, start_ts + train_ms + test_ms))
+        if train_end >= n:
+            break
+        if windows and windows[-1][2] > train_end:
+            # Örtüşme: önceki test aralığı bu pencerenin testi başlayınca biter
+            windows[-1] = windows[-1][:2] + (train_end,)
+        windows.append((train_start, train_end, test_end))
+        start_ts += step_ms
+    # Güncel parametreler: geçmişin son `train_ms` kadarı
+    last_start = int(np.searchsorted(timestamps, timestamps[-1] - train_ms, side='right'))
+    windows.append((last_start, n, n))
+    return windows
+
+
+def _window(ohlcv, ind, long_signal, short_signal, start, end):
+    return (ohlcv[start:end], {name: values[start:end] for name, values in ind.items()},
+            long_signal[start:end], short_signal[start:end])
+
+
+def _init_worker(name, shape, dtype, windows, specs=None):
+    global _shm, _ohlcv, _windows, _specs
+    _shm, _ohlcv = attach_array(name, shape, dtype)
+    _windows = windows
+    _specs = specs
+    _indicator_cache.clear()
+
+
+def _score_combo(params, initial_balance):
+    """Kombinasyonun her in-sample penceredeki özeti.
+
+    İndikatörler ve sinyaller tüm geçmiş üzerinde bir kez hesaplanıp
+    pencerelere dilimlenir: hepsi nedensel olduğundan dilim, pencere
+    başında ısınma dahil ayrı hesapla aynıdır.
+    """
+    p = {**DEFAULT_PARAMS, **params}
+    strategies = build_strategies(params, _specs)
+    ind = cached_indicators(_ohlcv, _indicator_cache, strategies)
+    long_signal, short_signal = entry_signals(_ohlcv, ind, p, strategies)
+    summaries = []
+    for train_start, train_end, _ in _windows:
+        window = _window(_ohlcv, ind, long_signal, short_signal, train_start, train_end)
+        trades, equity, _ = simulate(*window, p, initial_balance)
+        summaries.append(summarize(trades, equity, initial_balance))
+    return params, summaries
+
+
+def pick_best(scored, fold, metric='total_return', min_trades=1):
+    """`fold` penceresinde metriğe göre en iyi (parametreler, özet)"""
+    candidates = [(params, summaries[fold]) for params, summaries in scored]
+    eligible = [c for c in candidates if c[1]['trade_count'] >= min_trades] or candidates
+    if metric in LOWER_IS_BETTER:
+        return min(eligible, key=lambda c: c[1][metric])
+    return max(eligible, key=lambda c: c[1][metric])
+
+
+def run_walkforward(ohlcv, grid, train_ms, test_ms, step_ms=None, workers=None, initial_balance=10000.0,
+                    metric='total_return', min_trades=1, strategies=None):
+    """Her in-sample pencerede ızgarayı paralel tara, en iyiyi sonraki out-of-sample
+    pencerede çalıştır ve test sonuçlarını tek bakiye eğrisinde birleştir.
+
+    `strategies` config strateji tanımlarıdır (yoksa özgün kurallar); ızgara
+    birincil stratejinin parametrelerini ezer. Test penceresi sonunda açık
+    kalan pozisyon, sonraki pencere bitişikse özgün SL/TP'siyle oraya devreder
+    (yeni parametreler o kapanana kadar giriş yapmaz); değilse veya son
+    pencereyse 'end_of_data' ile kapatılır.
+    """
+    ohlcv = np.asarray(ohlcv, dtype=np.float64)
+    windows = make_windows(ohlcv[:, 0], train_ms, test_ms, step_ms)
+    combos = build_grid(grid)
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(combos) // (workers * 4))
+
+    shm, shape, dtype = share_array(ohlcv)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, shape, dtype, windows, strategies)) as pool:
+            scored = list(pool.map(_score_combo, combos, itertools.repeat(initial_balance),
+                                   chunksize=chunksize))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Out-of-sample: seçilen parametreler art arda, bakiye ve açık pozisyon pencereden pencereye taşınır
+    tested = [fold for fold, (_, train_end, test_end) in enumerate(windows) if test_end > train_end]
+    cache = {}
+    folds = []
+    trades = []
+    equity = []
+    balance = initial_balance
+    carried = None
+    for fold, (train_start, train_end, test_end) in enumerate(windows):
+        params, in_sample = pick_best(scored, fold, metric, min_trades)
+        result = {
+            'train_start': train_start,
+            'train_end': train_end,
+            'test_end': test_end,
+            'params': params,
+            'in_sample': in_sample,
+            'out_of_sample': None,
+            'carried_in': carried is not None,
+            'carried_out': False,
+        }
+        if test_end > train_end:
+            p = {**DEFAULT_PARAMS, **params}
+            fold_set = build_strategies(params, strategies)
+            ind = cached_indicators(ohlcv, cache, fold_set)
+            long_signal, short_signal = entry_signals(ohlcv, ind, p, fold_set)
+            window = _window(ohlcv, ind, long_signal, short_signal, train_end, test_end)
+            next_fold = tested[tested.index(fold) + 1] if fold != tested[-1] else None
+            contiguous = next_fold is not None and windows[next_fold][1] == test_end
+            if carried is not None:
+                carried = {**carried, 'entry_index': carried['entry_index'] - train_end}
+            fold_trades, fold_equity, carried = simulate(*window, p, balance, position=carried,
+                                                         close_at_end=not contiguous)
+            for trade in fold_trades:
+                trade['entry_index'] += train_end
+                trade['exit_index'] += train_end
+            if carried is not None:
+                carried['entry_index'] += train_end
+                result['carried_out'] = True
+            result['out_of_sample'] = summarize(fold_trades, fold_equity, balance)
+            trades.extend(fold_trades)
+            equity.append(fold_equity)
+            # Devreden pozisyonun gerçekleşmemiş kârı bakiyeye katılmaz (sonraki pencerede kapanınca eklenir)
+            balance += sum(trade['profit'] for trade in fold_trades)
+        folds.append(result)
+
+    equity = np.concatenate(equity) if equity else np.zeros(0)
+    return {
+        'folds': folds,
+        'trades': trades,
+        'equity': equity,
+        'summary': summarize(trades, equity, initial_balance),
+        'combos': len(combos),
+    }
+
+
+def _date(ohlcv, index):
+    index = min(index, len(ohlcv) - 1)
+    return datetime.fromtimestamp(ohlcv[index, 0] / 1000, timezone.utc).strftime('%Y-%m-%d')
+
+
+def format_folds(ohlcv, folds):
+    """Pencere başına seçilen parametreler ve in/out-of-sample getirileri"""
+    labels = [' '.join(f"{k}={v}" for k, v in fold['params'].items() if k != 'trading_mode') for fold in folds]
+    width = max(len(label) for label in labels + ['parametreler'])
+    lines = [f"{'in-sample':>23}  {'out-of-sample':>23}  {'parametreler':<{width}}  {'IS%':>8}  {'OOS%':>8}  {'işlem':>6}"]
+    for fold, params in zip(folds, labels):
+        train = f"{_date(ohlcv, fold['train_start'])} → {_date(ohlcv, fold['train_end'] - 1)}"
+        oos = fold['out_of_sample']
+        test = f"{_date(ohlcv, fold['train_end'])} → {_date(ohlcv, fold['test_end'] - 1)}" if oos else '(güncel)'
+        cells = [
+            f"{train:>23}",
+            f"{test:>23}",
+            f"{params:<{width}}",
+            f"{fold['in_sample']['total_return'] * 100:>+8.2f}",
+            f"{oos['total_return'] * 100:>+8.2f}" if oos else f"{'-':>8}",
+            f"{oos['trade_count']:>6}" if oos else f"{'-':>6}",
+        ]
+        lines.append('  '.join(cells))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward parametre optimizasyonu')
+    add_data_arguments(parser)
+    parser.add_argument('--config', default=None, help='stratejiler bu config.json dosyasından okunur')
+    parser.add_argument('--train', default='90d', help='in-sample pencere süresi (örnek: 90d, 12w)')
+    parser.add_argument('--test', default='7d', help='out-of-sample pencere süresi')
+    parser.add_argument('--step', default=None, help='pencere kaydırma adımı (varsayılan: --test; küçükse test aralıkları kesilir)')
+    parser.add_argument('--donchian-period', default='10,20,30', help='örnek: 10,20,30')
+    parser.add_argument('--ema-period', default='100,200', help='örnek: 100,200')
+    parser.add_argument('--stop-atr-mult', default='2', help='örnek: 1.5,2,2.5')
+    parser.add_argument('--target-atr-mult', default='4', help='örnek: 3,4,5')
+    parser.add_argument('--macd-threshold', default='100', help='örnek: 50,100')
+    parser.add_argument('--mode', choices=['long', 'short', 'both'], default='both')
+    parser.add_argument('--metric', default='total_return',
+                        choices=['total_return', 'max_drawdown', 'trade_count', 'win_rate'])
+    parser.add_argument('--min-trades', type=int, default=3,
+                        help='in-sample seçimde en az işlem sayısı (yoksa tüm kombinasyonlar)')
+    parser.add_argument('--capital', type=float, default=10000.0)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    grid = {
+        'donchian_period': _parse_list(args.donchian_period, int),
+        'ema_period': _parse_list(args.ema_period, int),
+        'stop_atr_mult': _parse_list(args.stop_atr_mult),
+        'target_atr_mult': _parse_list(args.target_atr_mult),
+        'macd_threshold': _parse_list(args.macd_threshold),
+        'trading_mode': [args.mode],
+    }
+
+    specs = load_strategy_specs(args.config)
+    ignored = ignored_grid_keys(grid, specs)
+    if ignored:
+        print(f"⚠️ Birincil strateji bu parametreleri kullanmıyor: {', '.join(ignored)}")
+
+    ohlcv = load_ohlcv_from_args(args)
+    started = time.perf_counter()
+    result = run_walkforward(
+        ohlcv, grid,
+        train_ms=timeframe_to_ms(args.train),
+        test_ms=timeframe_to_ms(args.test),
+        step_ms=timeframe_to_ms(args.step) if args.step else None,
+        workers=args.workers,
+        initial_balance=args.capital,
+        metric=args.metric,
+        min_trades=args.min_trades,
+        strategies=specs,
+    )
+    elapsed = time.perf_counter() - started
+
+    summary = result['summary']
+    tested = sum(1 for fold in result['folds'] if fold['out_of_sample'])
+    print(f"🔢 {result['combos']} kombinasyon × {len(result['folds'])} pencere, {elapsed:.1f} sn")
+    print(format_folds(ohlcv, result['folds']))
+    print(f"📊 Out-of-sample ({tested} pencere): İşlem: {summary['trade_count']}  "
+          f"✅ Başarı: {summary['win_rate'] * 100:.1f}%")
+    print(f"💰 Getiri: {summary['total_return'] * 100:+.2f}%  📉 Maks. düşüş: {summary['max_drawdown'] * 100:.2f}%")
+    print(f"💵 Son bakiye: ${summary['final_balance']:,.2f}")
+    carried = sum(1 for fold in result['folds'] if fold['carried_out'])
+    if carried:
+        print(f"↪️ Sonraki pencereye açık devreden pozisyon: {carried}")
+    current = result['folds'][-1]['params']
+    print(f"⚙️ Güncel öneri: donchian_period={current['donchian_period']} ema_period={current['ema_period']}")
+
+
+if __name__ == '__main__':
+    main()